@@ -0,0 +1,39 @@
+"""
+Core module for Soplos Grub Editor.
+GRUB configuration, environment detection and translations, usable
+without GTK. Importing this package loads nothing else: the classes below
+are imported from their modules on first access, and only
+core.application and core.theme_manager load GTK.
+"""
+
+from importlib import import_module
+
+# Application information
+APP_ID = "org.soplos.grubeditor"
+APP_NAME = "Soplos GRUB Editor"
+APP_VERSION = "2.0.2"
+
+__version__ = APP_VERSION
+
+# Public name -> module defining it
+_LAZY_ATTRIBUTES = {
+    'GrubManager': 'grub_manager',
+    'get_grub_manager': 'grub_manager',
+    'EnvironmentDetector': 'environment',
+    'get_environment_detector': 'environment',
+    'I18nManager': 'i18n_manager',
+    'get_i18n_manager': 'i18n_manager',
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f'{__name__}.{module}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -17,11 +17,7 @@ from .theme_manager import get_theme_manager, initialize_theming
 from .i18n_manager import get_i18n_manager, initialize_i18n, _
 from .grub_manager import get_grub_manager
 from utils.logger import log_info, log_error, log_warning
-
-# Constants (Move to a config file ideally, but here for now)
-APP_ID = "org.soplos.grubeditor"
-APP_NAME = "Soplos GRUB Editor"
-APP_VERSION = "2.0.2"
+from . import APP_ID, APP_NAME, APP_VERSION
 
 
 class SoplosGrubEditorApplication(Gtk.Application):
@@ -62,25 +58,7 @@ class SoplosGrubEditorApplication(Gtk.Application):
     def on_shutdown(self, app):
         """Called when the application shuts down."""
         log_info(_("Shutting down Soplos Grub Editor..."))
-        self._cleanup_garbage()
 
-    def _cleanup_garbage(self):
-        """Remove __pycache__ and other temporary files."""
-        try:
-            import shutil
-            root_path = self.app_path
-            
-            # Clean __pycache__
-            for root, dirs, files in os.walk(root_path):
-                if '__pycache__' in dirs:
-                    pycache_path = os.path.join(root, '__pycache__')
-                    try:
-                        shutil.rmtree(pycache_path, ignore_errors=True)
-                    except Exception:
-                        pass
-        except Exception as e:
-            log_warning(_("Cleanup warning: {err}").format(err=e))
-    
     def on_startup(self, app):
         """Called when the application starts up."""
         log_info(_("Starting {name} v{ver}...").format(name=APP_NAME, ver=APP_VERSION))
@@ -98,6 +76,9 @@ class SoplosGrubEditorApplication(Gtk.Application):
         """Called when the application is activated."""
         if self.main_window is None:
             self._create_main_window()
+            if self.main_window:
+                # Regenerate grub.cfg only if its inputs changed, once the window is up
+                GLib.idle_add(self._synchronize_grub_cfg)
         
         # Present the window
         if self.main_window:
@@ -153,9 +134,6 @@ class SoplosGrubEditorApplication(Gtk.Application):
         """Initialize the GRUB manager."""
         try:
             self.grub_manager = get_grub_manager()
-            # Silently update GRUB on startup to ensure latest entries are visible
-            log_info(_("Synchronizing GRUB configuration..."))
-            self.grub_manager.silent_update_grub()
             
             # Pre-load config to check for errors/access
             self.grub_manager.read_config()
@@ -163,6 +141,28 @@ class SoplosGrubEditorApplication(Gtk.Application):
         except Exception as e:
             log_error(_("Error initializing GRUB Manager: {err}").format(err=e))
     
+    def _synchronize_grub_cfg(self):
+        """Regenerate grub.cfg in the background if it is out of date."""
+        if self.main_window is None or self.grub_manager is None:
+            return False
+        if os.geteuid() != 0:
+            # Started without privileges: regenerating would prompt for
+            # authentication before the user asked for any change.
+            if self.grub_manager.is_grub_cfg_stale():
+                log_info(_("grub.cfg is out of date; it will be regenerated on the next apply"))
+            return False
+        if self.grub_manager.is_grub_cfg_stale():
+            log_info(_("Synchronizing GRUB configuration..."))
+            self.main_window.run_update_grub(self._on_synchronized)
+        else:
+            log_info(_("GRUB configuration is up to date"))
+        return False
+
+    def _on_synchronized(self, success, cancelled):
+        """Refresh the views after the startup regeneration."""
+        if success and self.main_window:
+            self.main_window.reload_views()
+
     def _setup_application_properties(self):
         """Setup application-wide properties."""
         GLib.set_prgname(APP_ID)
@@ -0,0 +1,312 @@
+"""
+Command-line interface for Soplos Grub Editor.
+Drives GrubManager directly for scripts, SSH sessions and configuration
+management. This module and everything it imports must not load gi/GTK.
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import contextlib
+from typing import Dict, List, Optional
+
+from core.i18n_manager import _
+from core.grub_manager import GrubManager
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_NOT_FOUND = 3
+
+KEY_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Color names accepted by GRUB's color_normal / color_highlight
+GRUB_COLORS = frozenset([
+    'black', 'blue', 'green', 'cyan', 'red', 'magenta', 'brown', 'light-gray',
+    'dark-gray', 'light-blue', 'light-green', 'light-cyan', 'light-red',
+    'light-magenta', 'yellow', 'white',
+])
+
+
+class CommandError(Exception):
+    """Raised by a command to exit with a message and an exit code."""
+
+    def __init__(self, message: str, code: int = EXIT_FAILURE):
+        super().__init__(message)
+        self.code = code
+
+
+def _parse_assignment(text: str):
+    key, sep, value = text.partition('=')
+    if not sep or not KEY_RE.match(key):
+        raise CommandError(_("Expected KEY=VALUE, got '{}'").format(text), EXIT_USAGE)
+    if not value:
+        # save_config() removes keys set to '': that is what unset is for
+        raise CommandError(_("Empty value for {}: use 'unset {}' to remove it").format(key, key),
+                           EXIT_USAGE)
+    return key, value
+
+
+def _check_color(color: Optional[str]) -> Optional[str]:
+    """Validate a 'foreground/background' pair of GRUB color names."""
+    if color is None:
+        return None
+    parts = color.split('/')
+    if len(parts) != 2 or not all(part in GRUB_COLORS for part in parts):
+        raise CommandError(_("Invalid color '{}': expected FOREGROUND/BACKGROUND GRUB color names")
+                           .format(color), EXIT_USAGE)
+    return color
+
+
+def _entry_dict(index: int, entry) -> Dict:
+    return {
+        'index': index,
+        'name': entry.name,
+        'title': entry.title,
+        'id': entry.id,
+        'type': entry.type,
+        'enabled': entry.enabled,
+    }
+
+
+def _update(manager: GrubManager, args) -> Dict:
+    """Regenerate grub.cfg if --update was given."""
+    if not getattr(args, 'update', False):
+        return {}
+    if not manager.update_grub(_progress(args)):
+        raise CommandError(_("Failed to update GRUB"))
+    return {'updated': True}
+
+
+def _progress(args):
+    if args.json or args.quiet:
+        return None
+    return lambda line, fraction: sys.stderr.write(line + '\n')
+
+
+def cmd_get(manager: GrubManager, args) -> Dict:
+    config = manager.config
+    if not args.keys:
+        return {'values': dict(config)}
+    missing = [key for key in args.keys if key not in config]
+    if missing:
+        raise CommandError(_("Not set: {}").format(', '.join(missing)), EXIT_NOT_FOUND)
+    return {'values': {key: config[key] for key in args.keys}}
+
+
+def cmd_set(manager: GrubManager, args) -> Dict:
+    values = dict(_parse_assignment(text) for text in args.assignments)
+    if not manager.save_config(values):
+        raise CommandError(_("Failed to save /etc/default/grub"))
+    return dict({'values': values}, **_update(manager, args))
+
+
+def cmd_unset(manager: GrubManager, args) -> Dict:
+    for key in args.keys:
+        if not KEY_RE.match(key):
+            raise CommandError(_("Invalid key '{}'").format(key), EXIT_USAGE)
+    if not manager.remove_config_keys(args.keys):
+        raise CommandError(_("Failed to save /etc/default/grub"))
+    return dict({'removed': args.keys}, **_update(manager, args))
+
+
+def cmd_list_entries(manager: GrubManager, args) -> Dict:
+    if args.predicted:
+        entries = manager.get_predicted_menu_entries()
+    else:
+        entries = manager.get_menu_entries()
+    return {'entries': [_entry_dict(i, entry) for i, entry in enumerate(entries)]}
+
+
+def cmd_set_default(manager: GrubManager, args) -> Dict:
+    reference = args.entry
+    if reference != 'saved' and not reference.isdigit():
+        # Installed kernels count even before grub.cfg lists them
+        entries = manager.get_predicted_menu_entries()
+        if not any(reference in (entry.name, entry.id) for entry in entries) and not args.force:
+            raise CommandError(_("No menu entry named '{}'").format(reference), EXIT_NOT_FOUND)
+    values = {'GRUB_DEFAULT': reference}
+    if reference == 'saved':
+        values['GRUB_SAVEDEFAULT'] = 'true'
+    if not manager.save_config(values):
+        raise CommandError(_("Failed to save /etc/default/grub"))
+    return dict({'values': values}, **_update(manager, args))
+
+
+def cmd_apply_theme(manager: GrubManager, args) -> Dict:
+    theme = args.theme
+    if os.sep in theme:
+        theme_path = os.path.abspath(theme)
+    else:
+        theme_path = os.path.join(manager.THEMES_DIR, theme, 'theme.txt')
+    if not os.path.isfile(theme_path):
+        raise CommandError(_("Theme not found: {}").format(theme_path), EXIT_NOT_FOUND)
+    if not manager.apply_theme_settings(theme_path):
+        raise CommandError(_("Failed to apply theme"))
+    return dict({'theme': theme_path}, **_update(manager, args))
+
+
+def cmd_set_background(manager: GrubManager, args) -> Dict:
+    if args.clear and args.image:
+        raise CommandError(_("Give either IMAGE or --clear, not both"), EXIT_USAGE)
+    if args.clear:
+        background = ''
+    elif args.image:
+        background = os.path.abspath(args.image)
+    else:
+        background = manager.config.get('GRUB_BACKGROUND', '')
+    if args.image and not os.path.isfile(background):
+        raise CommandError(_("Background image not found: {}").format(background), EXIT_NOT_FOUND)
+    colors = manager.custom_settings
+    normal = _check_color(args.normal) or colors.get('color_normal', '')
+    highlight = _check_color(args.highlight) or colors.get('color_highlight', '')
+    if not manager.save_custom_ui_settings(background, normal, highlight):
+        raise CommandError(_("Failed to save appearance settings"))
+    result = {'background': background, 'color_normal': normal, 'color_highlight': highlight}
+    return dict(result, **_update(manager, args))
+
+
+def cmd_install_font(manager: GrubManager, args) -> Dict:
+    installed = manager.install_font(args.font, args.size)
+    if not installed['ok']:
+        code = EXIT_NOT_FOUND if not os.path.isfile(args.font) else EXIT_FAILURE
+        raise CommandError(installed['error'], code)
+    result = {'font': installed['path']}
+    if args.apply:
+        if not manager.save_config({'GRUB_FONT': installed['path']}):
+            raise CommandError(_("Failed to save font configuration to /etc/default/grub"))
+        result['values'] = {'GRUB_FONT': installed['path']}
+    return dict(result, **_update(manager, args))
+
+
+def cmd_update(manager: GrubManager, args) -> Dict:
+    if not manager.update_grub(_progress(args), rescan_os=args.rescan_os):
+        raise CommandError(_("Failed to update GRUB"))
+    return {'updated': True}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the command-line interface."""
+    def output_options(parser, default):
+        parser.add_argument('--json', action='store_true', default=default,
+                            help=_("print results as JSON"))
+        parser.add_argument('-q', '--quiet', action='store_true', default=default,
+                            help=_("only print errors"))
+
+    # Output options are accepted before or after the command; a subcommand
+    # leaves them alone unless given, so "--json get" keeps --json
+    common = argparse.ArgumentParser(add_help=False)
+    output_options(common, argparse.SUPPRESS)
+
+    parser = argparse.ArgumentParser(
+        prog='soplos-grub-editor',
+        description=_("Edit the GRUB configuration without the graphical interface."))
+    output_options(parser, False)
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+
+    def command(name, handler, help_text, update=True):
+        sub = commands.add_parser(name, help=help_text, parents=[common])
+        sub.set_defaults(handler=handler)
+        if update:
+            sub.add_argument('--update', action='store_true',
+                             help=_("regenerate grub.cfg afterwards"))
+        return sub
+
+    sub = command('get', cmd_get, _("print /etc/default/grub values"), update=False)
+    sub.add_argument('keys', nargs='*', metavar='KEY')
+
+    sub = command('set', cmd_set, _("set /etc/default/grub values"))
+    sub.add_argument('assignments', nargs='+', metavar='KEY=VALUE')
+
+    sub = command('unset', cmd_unset, _("remove /etc/default/grub keys"))
+    sub.add_argument('keys', nargs='+', metavar='KEY')
+
+    sub = command('list-entries', cmd_list_entries, _("list the boot menu entries"), update=False)
+    sub.add_argument('--predicted', action='store_true',
+                     help=_("include installed kernels missing from grub.cfg"))
+
+    sub = command('set-default', cmd_set_default, _("set the default boot entry"))
+    sub.add_argument('entry', metavar='ENTRY', help=_("index, name, id or 'saved'"))
+    sub.add_argument('--force', action='store_true', help=_("accept an unknown entry"))
+
+    sub = command('apply-theme', cmd_apply_theme, _("apply an installed GRUB theme"))
+    sub.add_argument('theme', metavar='THEME', help=_("theme name or theme.txt path"))
+
+    sub = command('set-background', cmd_set_background,
+                  _("use a background image and menu colors instead of a theme"))
+    sub.add_argument('image', nargs='?', metavar='IMAGE',
+                     help=_("background image (default: keep the current one)"))
+    sub.add_argument('--clear', action='store_true', help=_("remove the background image"))
+    sub.add_argument('--normal', metavar='FG/BG', help=_("menu colors, e.g. white/black"))
+    sub.add_argument('--highlight', metavar='FG/BG', help=_("selected entry colors"))
+
+    sub = command('install-font', cmd_install_font, _("convert and install a TTF/OTF font"))
+    sub.add_argument('font', metavar='FONT')
+    sub.add_argument('--size', type=int, default=16)
+    sub.add_argument('--apply', action='store_true', help=_("set it as GRUB_FONT"))
+
+    sub = command('update', cmd_update, _("regenerate grub.cfg"), update=False)
+    sub.add_argument('--rescan-os', action='store_true',
+                     help=_("probe other operating systems again"))
+    return parser
+
+
+# Names of the subcommands: an argument naming one selects the command-line
+# interface instead of the graphical one
+COMMANDS = frozenset(['get', 'set', 'unset', 'list-entries', 'set-default', 'apply-theme',
+                      'set-background', 'install-font', 'update'])
+
+
+def _print_text(result: Dict, out):
+    for key, value in result.get('values', {}).items():
+        out.write(f'{key}={value}\n')
+    for entry in result.get('entries', []):
+        state = '' if entry['enabled'] else ' ' + _("(hidden)")
+        out.write(f"{entry['index']}\t{entry['name']}{state}\n")
+
+
+def run_cli(argv: List[str]) -> int:
+    """
+    Run a command.
+
+    Args:
+        argv: Arguments after the program name
+
+    Returns:
+        Exit status: EXIT_OK, EXIT_FAILURE, EXIT_USAGE or EXIT_NOT_FOUND
+    """
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK
+
+    # Results go to stdout; logs and anything else printed go to stderr
+    out = sys.stdout
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(sys.stderr)
+    logging.getLogger().setLevel(logging.ERROR if args.json or args.quiet else logging.WARNING)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            result = args.handler(GrubManager(), args)
+            code, error = EXIT_OK, None
+        except CommandError as e:
+            result, code, error = {}, e.code, str(e)
+        except KeyboardInterrupt:
+            result, code, error = {}, EXIT_FAILURE, _("Interrupted")
+
+    if args.json:
+        json.dump(dict(result, ok=code == EXIT_OK, error=error), out, ensure_ascii=False)
+        out.write('\n')
+    else:
+        _print_text(result, out)
+        if error:
+            sys.stderr.write(f'soplos-grub-editor: {error}\n')
+    return code
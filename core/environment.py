@@ -4,18 +4,43 @@ Focused, small implementation that:
 - seeds hints from `SOPLOS_ENV_FILE` written by the non-privileged launcher
 - prefers `SOPLOS_*` overrides when present
 - uses common XDG variables
-- falls back to `loginctl` when elevated to determine session type
+- falls back to the systemd session records in /run/systemd/sessions when
+  elevated to determine session type, and to /proc for the desktop
+
+Detection runs once per process: `detect_all()` memoizes an immutable
+result that every caller shares, until `refresh()`. The launcher runs
+`detect_launcher()` before pkexec (environment variables and settings
+files only: no GTK import, no subprocess) and passes the result on as JSON
+with `handoff_environment()`; the elevated process adopts it instead of
+detecting again.
 """
 
 import os
-import subprocess
-from typing import Dict, Optional
+import json
+import threading
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Set
 from enum import Enum
 from pathlib import Path
 import pwd
 import configparser
 import re
 
+# Filesystem locations read by the detectors (injectable for tests)
+PROC_DIR = '/proc'
+SESSIONS_DIR = '/run/systemd/sessions'
+RUN_USER_DIR = '/run/user'
+
+# Process names identifying a desktop when no variable names it
+DESKTOP_PROCESSES = (
+    ('gnome-shell', 'gnome'),
+    ('plasmashell', 'kde'),
+    ('xfwm4', 'xfce'),
+)
+
+# Variable carrying the launcher's detection result (see to_json())
+HANDOFF_VARIABLE = 'SOPLOS_ENVIRONMENT'
+
 
 class DesktopEnvironment(Enum):
     GNOME = "gnome"
@@ -36,29 +61,168 @@ class ThemeType(Enum):
     UNKNOWN = "unknown"
 
 
+def running_processes(names: Iterable[str], proc_dir: str = PROC_DIR) -> Set[str]:
+    """Return which of names run, matched exactly like 'pgrep -x'.
+
+    Reads /proc/<pid>/comm in a single pass; comm holds at most 15
+    characters, so longer names are compared truncated.
+    """
+    wanted = {name[:15]: name for name in names}
+    found = set()
+    try:
+        pids = [entry for entry in os.listdir(proc_dir) if entry.isdigit()]
+    except OSError:
+        return found
+    for pid in pids:
+        try:
+            with open(os.path.join(proc_dir, pid, 'comm'), 'r', encoding='utf-8',
+                      errors='replace') as f:
+                comm = f.read().rstrip('\n')
+        except OSError:
+            # Exited meanwhile
+            continue
+        if comm in wanted:
+            found.add(wanted[comm])
+            if len(found) == len(wanted):
+                break
+    return found
+
+
+def read_sessions(user: Optional[str] = None, sessions_dir: str = SESSIONS_DIR) -> List[Dict[str, str]]:
+    """Return the logind session records (KEY=VALUE files), optionally of one user.
+
+    Each record has the keys systemd-logind writes (USER, UID, STATE,
+    ACTIVE, TYPE, DESKTOP...) plus ID, the session id.
+    """
+    sessions = []
+    try:
+        names = sorted(os.listdir(sessions_dir))
+    except OSError:
+        return sessions
+    for name in names:
+        if name.endswith('.ref'):
+            continue
+        record = {'ID': name}
+        try:
+            with open(os.path.join(sessions_dir, name), 'r', encoding='utf-8',
+                      errors='replace') as f:
+                for line in f:
+                    key, sep, value = line.rstrip('\n').partition('=')
+                    if sep and not key.startswith('#'):
+                        record[key] = value
+        except OSError:
+            continue
+        if user is None or record.get('USER') == user:
+            sessions.append(record)
+    return sessions
+
+
 class EnvironmentDetector:
-    def __init__(self):
+    def __init__(self, proc_dir: str = PROC_DIR, sessions_dir: str = SESSIONS_DIR,
+                 run_user_dir: str = RUN_USER_DIR):
+        self.proc_dir = proc_dir
+        self.sessions_dir = sessions_dir
+        self.run_user_dir = run_user_dir
         self._desktop = DesktopEnvironment.UNKNOWN
         self._display = DisplayProtocol.UNKNOWN
         self._theme = ThemeType.LIGHT
         self._gtk_theme_name = None
+        # Memoized result of detect_all(), None until detected
+        self._info: Optional[Mapping[str, Optional[str]]] = None
+        self._lock = threading.Lock()
 
-    def detect_all(self) -> Dict[str, str]:
-        # Load parent-provided hints if available (kept for backward compat)
-        self.load_parent_hints()
+    def detect_all(self) -> Mapping[str, Optional[str]]:
+        """Return the detection result, detecting on the first call only.
 
-        self._detect_desktop()
-        self._detect_display()
-        self._detect_theme()
+        The result is a read-only mapping shared by every caller; use
+        refresh() to detect again.
+        """
+        info = self._info
+        if info is not None:
+            return info
+        with self._lock:
+            if self._info is None:
+                # Load parent-provided hints if available (kept for backward compat)
+                self.load_parent_hints()
+                if not self._load_handoff():
+                    self._run_detectors()
+            return self._info
+
+    def refresh(self) -> Mapping[str, Optional[str]]:
+        """Detect again, ignoring the memoized and the launcher's result."""
+        with self._lock:
+            self._run_detectors()
+            return self._info
+
+    def detect_launcher(self) -> Mapping[str, Optional[str]]:
+        """Detect from environment variables and settings files only.
+
+        Used by the unprivileged launcher before pkexec, so the polkit
+        prompt is not delayed by a GTK import or process lookups.
+        """
+        with self._lock:
+            self._run_detectors(launcher=True)
+            return self._info
 
-        return {
+    def _run_detectors(self, launcher: bool = False):
+        self._gtk_theme_name = None
+        self._detect_desktop(probe_processes=not launcher)
+        self._detect_display()
+        self._detect_theme(use_gtk=not launcher)
+        self._info = MappingProxyType({
             'desktop_environment': self._desktop.value,
             'display_protocol': self._display.value,
             'theme_type': self._theme.value,
             'gtk_theme_name': self._gtk_theme_name,
+        })
+
+    def to_json(self) -> str:
+        """Serialize the detection result, e.g. for the elevated process."""
+        return json.dumps(dict(self.detect_all()), separators=(',', ':'))
+
+    def load_json(self, data: str) -> bool:
+        """Adopt a result serialized by to_json(); False if it is invalid."""
+        try:
+            info = json.loads(data)
+            desktop = DesktopEnvironment(info['desktop_environment'])
+            display = DisplayProtocol(info['display_protocol'])
+            theme = ThemeType(info['theme_type'])
+            gtk_theme_name = info.get('gtk_theme_name') or None
+        except (ValueError, TypeError, KeyError):
+            return False
+        if gtk_theme_name is not None and not isinstance(gtk_theme_name, str):
+            return False
+        self._desktop, self._display, self._theme = desktop, display, theme
+        self._gtk_theme_name = gtk_theme_name
+        self._info = MappingProxyType({
+            'desktop_environment': desktop.value,
+            'display_protocol': display.value,
+            'theme_type': theme.value,
+            'gtk_theme_name': gtk_theme_name,
+        })
+        return True
+
+    def handoff_environment(self) -> Dict[str, str]:
+        """Environment variables passing the detection result to the elevated process.
+
+        HANDOFF_VARIABLE holds the complete result; the others are the
+        overrides GTK and the theme manager read directly.
+        """
+        info = self.detect_all()
+        return {
+            HANDOFF_VARIABLE: self.to_json(),
+            'SOPLOS_DESKTOP': info['desktop_environment'],
+            'SOPLOS_SESSION_TYPE': info['display_protocol'],
+            'SOPLOS_THEME_TYPE': info['theme_type'],
+            'GTK_THEME': info['gtk_theme_name'] or '',
         }
 
-    def _detect_desktop(self):
+    def _load_handoff(self) -> bool:
+        """Adopt the launcher's result if HANDOFF_VARIABLE holds one."""
+        data = os.environ.get(HANDOFF_VARIABLE)
+        return bool(data) and self.load_json(data)
+
+    def _detect_desktop(self, probe_processes: bool = True):
         d = os.environ.get('SOPLOS_DESKTOP') or os.environ.get('XDG_CURRENT_DESKTOP')
         if not d:
             d = os.environ.get('XDG_SESSION_DESKTOP') or os.environ.get('DESKTOP_SESSION', '')
@@ -75,14 +239,15 @@ class EnvironmentDetector:
             self._desktop = DesktopEnvironment.XFCE
             return
 
+        if not probe_processes:
+            return
+
         # Small fallback: check a few common process names
-        for name, env in (('gnome-shell', DesktopEnvironment.GNOME), ('plasmashell', DesktopEnvironment.KDE), ('xfwm4', DesktopEnvironment.XFCE)):
-            try:
-                if subprocess.run(['pgrep', '-x', name], capture_output=True).returncode == 0:
-                    self._desktop = env
-                    return
-            except Exception:
-                pass
+        running = running_processes([name for name, _ in DESKTOP_PROCESSES], self.proc_dir)
+        for name, desktop in DESKTOP_PROCESSES:
+            if name in running:
+                self._desktop = DesktopEnvironment(desktop)
+                return
 
     def _detect_display(self):
         st = (os.environ.get('SOPLOS_SESSION_TYPE') or os.environ.get('XDG_SESSION_TYPE') or '').lower()
@@ -99,39 +264,26 @@ class EnvironmentDetector:
             self._display = DisplayProtocol.X11
             return
 
-        # When elevated, try to query the active user's session via loginctl
+        # When elevated, read the active session of the user from logind
         sudo_user = os.environ.get('SUDO_USER')
         if os.geteuid() == 0 and sudo_user:
-            try:
-                # Find active session for user
-                r = subprocess.run(['loginctl', 'list-sessions', '--no-legend'], capture_output=True, text=True, timeout=2)
-                if r.returncode == 0 and r.stdout:
-                    for line in r.stdout.splitlines():
-                        parts = line.split()
-                        # ID UID USER SEAT TTY
-                        if len(parts) >= 3 and parts[2] == sudo_user:
-                            sid = parts[0]
-                            # Check if active
-                            r_state = subprocess.run(['loginctl', 'show-session', sid, '-p', 'State', '--value'], capture_output=True, text=True, timeout=1)
-                            if r_state.returncode == 0 and 'active' in (r_state.stdout or '').lower():
-                                r2 = subprocess.run(['loginctl', 'show-session', sid, '-p', 'Type', '--value'], capture_output=True, text=True, timeout=1)
-                                if r2.returncode == 0:
-                                    t = (r2.stdout or '').strip().lower()
-                                    if 'wayland' in t:
-                                        self._display = DisplayProtocol.WAYLAND
-                                        return
-                                    if 'x11' in t or 'xorg' in t:
-                                        self._display = DisplayProtocol.X11
-                                        return
-            except Exception:
-                pass
+            for session in read_sessions(sudo_user, self.sessions_dir):
+                if session.get('STATE') != 'active' and session.get('ACTIVE') != '1':
+                    continue
+                t = session.get('TYPE', '').lower()
+                if 'wayland' in t:
+                    self._display = DisplayProtocol.WAYLAND
+                    return
+                if 'x11' in t or 'xorg' in t:
+                    self._display = DisplayProtocol.X11
+                    return
 
             # Fallback: inspect the real user's runtime directory for wayland sockets
             try:
                 if sudo_user:
                     try:
                         pu = pwd.getpwnam(sudo_user)
-                        user_run = Path(f"/run/user/{pu.pw_uid}")
+                        user_run = Path(self.run_user_dir) / str(pu.pw_uid)
                         if user_run.exists():
                             for p in user_run.iterdir():
                                 if p.name.startswith('wayland-'):
@@ -164,7 +316,7 @@ class EnvironmentDetector:
                     
         return Path.home()
 
-    def _detect_theme(self):
+    def _detect_theme(self, use_gtk: bool = True):
         # Parent override is authoritative
         t = (os.environ.get('SOPLOS_THEME_TYPE') or '').lower()
         if t == 'dark':
@@ -174,30 +326,32 @@ class EnvironmentDetector:
             self._theme = ThemeType.LIGHT
             return
 
-        # Try Gtk.Settings when available
-        try:
-            import gi
-            gi.require_version('Gtk', '3.0')
-            from gi.repository import Gtk
-            s = Gtk.Settings.get_default()
-            if s is not None:
-                try:
-                    if s.get_property('gtk-application-prefer-dark-theme'):
-                        self._theme = ThemeType.DARK
-                        return
-                except Exception:
-                    pass
-                try:
-                    # Fallback: inspect theme name for 'dark' substring
-                    tn = s.get_property('gtk-theme-name')
-                    self._gtk_theme_name = tn
-                    if tn and isinstance(tn, str) and 'dark' in tn.lower():
-                        self._theme = ThemeType.DARK
-                        return
-                except Exception:
-                    pass
-        except Exception:
-            pass
+        # Try Gtk.Settings when available (not before pkexec: importing
+        # GTK there would delay the authorization prompt)
+        if use_gtk:
+            try:
+                import gi
+                gi.require_version('Gtk', '3.0')
+                from gi.repository import Gtk
+                s = Gtk.Settings.get_default()
+                if s is not None:
+                    try:
+                        if s.get_property('gtk-application-prefer-dark-theme'):
+                            self._theme = ThemeType.DARK
+                            return
+                    except Exception:
+                        pass
+                    try:
+                        # Fallback: inspect theme name for 'dark' substring
+                        tn = s.get_property('gtk-theme-name')
+                        self._gtk_theme_name = tn
+                        if tn and isinstance(tn, str) and 'dark' in tn.lower():
+                            self._theme = ThemeType.DARK
+                            return
+                    except Exception:
+                        pass
+            except Exception:
+                pass
 
         # Next fallback: check GTK config files (per-user and system)
         try:
@@ -273,26 +427,22 @@ class EnvironmentDetector:
     # Compatibility helpers for other modules expecting these properties
     @property
     def desktop_environment(self) -> DesktopEnvironment:
-        if self._desktop is None:
-            self._detect_desktop()
+        self.detect_all()
         return self._desktop
 
     @property
     def display_protocol(self) -> DisplayProtocol:
-        if self._display is None:
-            self._detect_display()
+        self.detect_all()
         return self._display
 
     @property
     def gtk_theme_name(self) -> Optional[str]:
-        if self._gtk_theme_name is None:
-            self._detect_theme()
+        self.detect_all()
         return self._gtk_theme_name
 
     @property
     def theme_type(self) -> ThemeType:
-        if self._theme is None:
-            self._detect_theme()
+        self.detect_all()
         return self._theme
 
     @property
@@ -356,5 +506,5 @@ def get_environment_detector() -> EnvironmentDetector:
     return _environment_detector
 
 
-def detect_environment() -> Dict[str, str]:
+def detect_environment() -> Mapping[str, Optional[str]]:
     return get_environment_detector().detect_all()
@@ -0,0 +1,193 @@
+"""
+grub.cfg staleness tracking for Soplos Grub Editor.
+Records a fingerprint of every input grub-mkconfig reads at the last
+successful generation, so regeneration can be skipped when nothing changed.
+"""
+
+import os
+import glob
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from core.state import get_state_dir, load_json, save_json
+
+# Small text inputs, compared by content so that a file which was only
+# touched does not trigger a regeneration.
+CONTENT_INPUTS = [
+    '/etc/default/grub',
+    '/etc/default/grub.d/*.cfg',
+    '/etc/grub.d/*',
+    '/boot/grub/custom.cfg',
+]
+
+# Kernel images and initrds are large; size and mtime are enough.
+STAT_INPUTS = [
+    '/boot/vmlinuz-*',
+    '/boot/initrd.img-*',
+    '/boot/initramfs-*',
+]
+
+STAMP_NAME = 'generation-stamp.json'
+
+
+def _hash_file(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def fingerprint_inputs() -> Dict[str, Dict]:
+    """
+    Fingerprint every grub-mkconfig input currently present.
+
+    Returns:
+        Mapping of path to its mode, size, mtime and (for small text
+        inputs) content hash
+    """
+    fingerprint = {}
+    for patterns, hashed in ((CONTENT_INPUTS, True), (STAT_INPUTS, False)):
+        for pattern in patterns:
+            for path in glob.glob(pattern):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entry = {'mode': st.st_mode, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+                if hashed:
+                    entry['sha256'] = _hash_file(path)
+                fingerprint[path] = entry
+    return fingerprint
+
+
+def output_signature(grub_cfg: str) -> Optional[list]:
+    """Return [mtime_ns, size] of grub.cfg, or None if it does not exist."""
+    try:
+        st = os.stat(grub_cfg)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def inputs_equal(recorded: Dict[str, Dict], current: Dict[str, Dict]) -> bool:
+    """Compare two fingerprints, by content where a hash is available."""
+    if recorded.keys() != current.keys():
+        return False
+    for path, now in current.items():
+        then = recorded[path]
+        if then.get('mode') != now['mode']:
+            return False
+        if now.get('sha256') and then.get('sha256'):
+            if then['sha256'] != now['sha256']:
+                return False
+        elif (then.get('size'), then.get('mtime_ns')) != (now['size'], now['mtime_ns']):
+            return False
+    return True
+
+
+class GenerationState:
+    """
+    Tracks whether grub.cfg is up to date with its inputs.
+    """
+
+    def __init__(self, grub_cfg: str):
+        """
+        Initialize the tracker.
+
+        Args:
+            grub_cfg: Path of the generated grub.cfg
+        """
+        self.grub_cfg = grub_cfg
+        self.stamp_path = get_state_dir() / STAMP_NAME
+
+    def load(self) -> Optional[Dict]:
+        """Return the stamp recorded at the last generation, if any."""
+        stamp = load_json(self.stamp_path)
+        return stamp if isinstance(stamp, dict) else None
+
+    def record(self, inputs: Optional[Dict[str, Dict]] = None,
+               config: Optional[Dict[str, str]] = None,
+               os_prober: Optional[str] = None) -> bool:
+        """
+        Record the current inputs and grub.cfg as a successful generation.
+
+        Args:
+            inputs: Input fingerprint, taken now if not given
+            config: /etc/default/grub values the generation used
+            os_prober: os-prober cache key of the disks the 30_os-prober
+                section was generated for
+        """
+        output = output_signature(self.grub_cfg)
+        if output is None:
+            return False
+        if inputs is None:
+            inputs = fingerprint_inputs()
+        stamp = {'output': output, 'inputs': inputs}
+        if config is not None:
+            stamp['config'] = config
+        if os_prober is not None:
+            stamp['os_prober'] = os_prober
+        return save_json(self.stamp_path, stamp)
+
+    def refresh_output(self, previous: Optional[list]) -> bool:
+        """
+        Adopt grub.cfg as the recorded output after it was rewritten
+        without regenerating it (hidden menu entries removed or restored).
+
+        Args:
+            previous: output_signature() of grub.cfg before the rewrite;
+                nothing is adopted unless the stamp recorded that file
+        """
+        stamp = self.load()
+        output = output_signature(self.grub_cfg)
+        if not stamp or previous is None or output is None or stamp.get('output') != previous:
+            return False
+        stamp['output'] = output
+        return save_json(self.stamp_path, stamp)
+
+    def changed_inputs(self) -> Optional[Tuple[Dict, List[str]]]:
+        """
+        List the inputs that changed since the last generation.
+
+        Returns:
+            (stamp, changed paths), or None if grub.cfg is not the file
+            recorded by the stamp (or the stamp lacks configuration values)
+        """
+        stamp = self.load()
+        if not stamp or 'config' not in stamp:
+            return None
+        if stamp.get('output') != output_signature(self.grub_cfg):
+            return None
+        recorded = stamp.get('inputs') or {}
+        current = fingerprint_inputs()
+        changed = [path for path in set(recorded) | set(current)
+                   if path not in recorded or path not in current
+                   or not inputs_equal({path: recorded[path]}, {path: current[path]})]
+        return stamp, sorted(changed)
+
+    def is_stale(self) -> bool:
+        """
+        Check whether grub.cfg needs to be regenerated.
+
+        grub.cfg is stale when it is missing or when any input differs from
+        the stamp recorded at the last generation. If grub.cfg was rewritten
+        outside the editor (or no stamp exists yet), fall back to comparing
+        modification times and adopt grub.cfg as the new baseline when it
+        is newer than all of its inputs.
+        """
+        output = output_signature(self.grub_cfg)
+        if output is None:
+            return True
+
+        current = fingerprint_inputs()
+        stamp = self.load()
+        if stamp and stamp.get('output') == output:
+            return not inputs_equal(stamp.get('inputs') or {}, current)
+
+        newest_input = max((entry['mtime_ns'] for entry in current.values()), default=0)
+        if newest_input > output[0]:
+            return True
+
+        self.record(current)
+        return False
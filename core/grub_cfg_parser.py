@@ -0,0 +1,394 @@
+"""
+grub.cfg parser for Soplos Grub Editor.
+Reads grub.cfg in a single streaming pass, following GRUB's quoting rules,
+and returns one compact record per menu entry with its hierarchy, id,
+classes, kernel, initrds and kernel arguments.
+
+Only the standard library is used, so the privileged helper can build the
+menu index with it.
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Commands loading a kernel / an initrd inside a menuentry
+LINUX_COMMANDS = frozenset(['linux', 'linux16', 'linuxefi', 'multiboot', 'multiboot2',
+                            'chainloader', 'kfreebsd', 'knetbsd', 'kopenbsd'])
+INITRD_COMMANDS = frozenset(['initrd', 'initrd16', 'initrdefi', 'module', 'module2'])
+
+# menuentry/submenu options taking a value
+VALUE_OPTIONS = frozenset(['--class', '--id', '--users', '--hotkey'])
+
+# grub-mkconfig sets menuentry_id_option="--id"
+ID_OPTION_WORDS = frozenset(['$menuentry_id_option', '${menuentry_id_option}'])
+
+# Variables pointing at the directory holding grub.cfg
+DIRECTORY_VARIABLES = ('${config_directory}', '$config_directory', '${prefix}', '$prefix')
+
+MAX_SOURCE_DEPTH = 8
+
+# Menu index: parsed entries saved as JSON, e.g. next to grub.cfg
+MENU_INDEX_NAME = 'menu-index.json'
+MENU_INDEX_VERSION = 2
+
+# Entry fields safe for a world-readable index (no kernel command lines)
+PUBLIC_FIELDS = ('title', 'name', 'id', 'classes', 'type', 'enabled')
+
+OPEN_BRACE = object()
+CLOSE_BRACE = object()
+
+
+class MenuEntry:
+    """A menu entry of grub.cfg."""
+
+    __slots__ = ('title', 'name', 'id', 'classes', 'linux', 'initrd', 'args', 'type', 'enabled')
+
+    # Keys of the dictionary form, e.g. as stored in the menu index
+    FIELDS = ('title', 'name', 'id', 'classes', 'linux', 'initrd', 'args', 'type', 'enabled')
+
+    def __init__(self, title: str, name: str, entry_id: Optional[str] = None,
+                 classes: Optional[List[str]] = None):
+        self.title = title
+        # Hierarchical name as used by GRUB_DEFAULT, e.g. "Advanced options>Debian"
+        self.name = name
+        self.id = entry_id
+        self.classes = classes or []
+        self.linux = ''
+        self.initrd: List[str] = []
+        self.args = ''
+        self.type = ''
+        self.enabled = True
+
+    def get(self, key: str, default=None):
+        """Dictionary-style access kept for the views ('display_name', 'path')."""
+        if key == 'display_name':
+            return self.title
+        if key == 'path':
+            return self.linux
+        value = getattr(self, key, None) if key in self.FIELDS else None
+        return default if value is None else value
+
+    def to_dict(self, fields=FIELDS) -> Dict:
+        return {field: getattr(self, field) for field in fields}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MenuEntry':
+        entry = cls(data.get('title', data.get('display_name', '')), data.get('name', ''),
+                    data.get('id'), data.get('classes'))
+        entry.linux = data.get('linux', '')
+        entry.initrd = data.get('initrd', [])
+        entry.args = data.get('args', '')
+        entry.type = data.get('type', '')
+        entry.enabled = data.get('enabled', True)
+        return entry
+
+    def __repr__(self):
+        return f'MenuEntry({self.name!r})'
+
+
+def entry_type(title: str, classes: List[str]) -> str:
+    """
+    Guess the kind of an entry from its title and classes.
+
+    Returns:
+        'recovery', 'memtest', 'firmware' or 'system' (untranslated)
+    """
+    text = ' '.join([title] + classes).lower()
+    if 'recovery' in text:
+        return 'recovery'
+    if 'memtest' in text:
+        return 'memtest'
+    if 'uefi' in text or 'firmware' in text:
+        return 'firmware'
+    return 'system'
+
+
+class _Tokenizer:
+    """
+    Splits GRUB script into statements (lists of words), one line at a
+    time. Quotes may span lines; unquoted braces are returned as the
+    OPEN_BRACE / CLOSE_BRACE markers.
+    """
+
+    def __init__(self):
+        self.quote = None
+        self.word = []
+        self.in_word = False
+        self.words = []
+
+    def _end_word(self):
+        if self.in_word:
+            self.words.append(''.join(self.word))
+            self.word = []
+            self.in_word = False
+
+    def feed(self, line: str) -> List[list]:
+        """Tokenize one line, returning the statements it completes."""
+        statements = []
+        # Fast path for the common lines without quoting or separators
+        if self.quote is None and not self.in_word and not any(c in line for c in '\'"\\;#{}'):
+            words = line.split()
+            if words:
+                statements.append(self.words + words)
+                self.words = []
+            elif self.words:
+                statements.append(self.words)
+                self.words = []
+            return statements
+
+        i = 0
+        n = len(line)
+        while i < n:
+            c = line[i]
+            if self.quote == "'":
+                if c == "'":
+                    self.quote = None
+                else:
+                    self.word.append(c)
+            elif self.quote == '"':
+                if c == '"':
+                    self.quote = None
+                elif c == '\\' and i + 1 < n and line[i + 1] in '$"\\\n':
+                    i += 1
+                    if line[i] != '\n':
+                        self.word.append(line[i])
+                else:
+                    self.word.append(c)
+            elif c in "'\"":
+                self.quote = c
+                self.in_word = True
+            elif c == '\\':
+                if i + 1 < n and line[i + 1] != '\n':
+                    self.word.append(line[i + 1])
+                    self.in_word = True
+                i += 1
+            elif c in ' \t\r':
+                self._end_word()
+            elif c in '\n;':
+                self._end_word()
+                if self.words:
+                    statements.append(self.words)
+                    self.words = []
+            elif c == '#' and not self.in_word:
+                break
+            elif c in '{}' and not self.in_word and (i + 1 >= n or line[i + 1] in ' \t\r\n;'):
+                self.words.append(OPEN_BRACE if c == '{' else CLOSE_BRACE)
+            else:
+                self.word.append(c)
+                self.in_word = True
+            i += 1
+
+        if self.quote is None and not line.endswith('\\\n'):
+            self._end_word()
+            if self.words:
+                statements.append(self.words)
+                self.words = []
+        return statements
+
+
+class _Parser:
+    """Builds MenuEntry records from tokenized statements."""
+
+    def __init__(self, config_directory: Optional[str]):
+        # None: do not follow 'source'
+        self.config_directory = config_directory
+        self.entries: List[MenuEntry] = []
+        # Open blocks: a submenu title, a MenuEntry, or None for other blocks
+        self.stack: list = []
+        self.sourced = set()
+
+    def parse_file(self, path: str, depth: int = 0):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            self.parse_lines(f, depth)
+
+    def parse_lines(self, lines: Iterable[str], depth: int = 0):
+        tokenizer = _Tokenizer()
+        for line in lines:
+            for statement in tokenizer.feed(line):
+                self.statement(statement, depth)
+
+    def _current_entry(self) -> Optional[MenuEntry]:
+        for block in reversed(self.stack):
+            if isinstance(block, MenuEntry):
+                return block
+        return None
+
+    def statement(self, words: list, depth: int):
+        while words:
+            head = words[0]
+            if head is CLOSE_BRACE:
+                if self.stack:
+                    self.stack.pop()
+                words = words[1:]
+                continue
+            if head is OPEN_BRACE:
+                self.stack.append(None)
+                words = words[1:]
+                continue
+            split = next((i for i, word in enumerate(words)
+                          if word is OPEN_BRACE or word is CLOSE_BRACE), None)
+            if split is None:
+                self.command(words, depth)
+                return
+            if words[split] is OPEN_BRACE:
+                self.open_block(words[:split])
+                words = words[split + 1:]
+            else:
+                self.command(words[:split], depth)
+                words = words[split:]
+
+    def open_block(self, header: list):
+        kind = header[0] if header else None
+        if kind not in ('menuentry', 'submenu'):
+            self.stack.append(None)
+            return
+        title, entry_id, classes = self._menu_arguments(header[1:])
+        if kind == 'submenu':
+            self.stack.append(title)
+            return
+        path = [block for block in self.stack if isinstance(block, str)]
+        entry = MenuEntry(title, '>'.join(path + [title]), entry_id, classes)
+        entry.type = entry_type(title, classes)
+        self.entries.append(entry)
+        self.stack.append(entry)
+
+    def _menu_arguments(self, words: list):
+        title = None
+        entry_id = None
+        classes = []
+        i = 0
+        while i < len(words):
+            word = words[i]
+            if word in ID_OPTION_WORDS:
+                word = '--id'
+            option, has_value, inline = word.partition('=')
+            if option in VALUE_OPTIONS:
+                if has_value:
+                    value = inline
+                else:
+                    i += 1
+                    value = words[i] if i < len(words) else ''
+                if option == '--class':
+                    classes.append(value)
+                elif option == '--id':
+                    entry_id = value
+            elif word.startswith('--'):
+                pass
+            elif title is None:
+                title = word
+            i += 1
+        return title or '', entry_id, classes
+
+    def command(self, words: list, depth: int):
+        if not words:
+            return
+        name = words[0]
+        entry = self._current_entry()
+        if entry is not None:
+            if name in LINUX_COMMANDS and len(words) > 1:
+                entry.linux = words[1]
+                entry.args = ' '.join(words[2:])
+            elif name in INITRD_COMMANDS and len(words) > 1:
+                entry.initrd = words[1:]
+        if name == 'source' and len(words) > 1:
+            self.source(words[1], depth)
+
+    def source(self, path: str, depth: int):
+        if self.config_directory is None:
+            return
+        for variable in DIRECTORY_VARIABLES:
+            path = path.replace(variable, self.config_directory)
+        if '$' in path or depth >= MAX_SOURCE_DEPTH:
+            return
+        path = os.path.normpath(path)
+        if path in self.sourced or not os.path.isfile(path):
+            return
+        self.sourced.add(path)
+        try:
+            self.parse_file(path, depth + 1)
+        except OSError:
+            pass
+
+
+def parse_grub_cfg(path: str, content: Optional[str] = None) -> List[MenuEntry]:
+    """
+    Parse the menu entries of grub.cfg, including submenus and files
+    included with 'source'.
+
+    Args:
+        path: Location of grub.cfg
+        content: Content of grub.cfg if it was already read
+
+    Raises:
+        OSError: grub.cfg cannot be read
+    """
+    parser = _Parser(os.path.dirname(os.path.abspath(path)))
+    parser.sourced.add(os.path.normpath(os.path.abspath(path)))
+    if content is None:
+        parser.parse_file(path)
+    else:
+        parser.parse_lines(content.splitlines(keepends=True))
+    return parser.entries
+
+
+def is_hidden(entry: MenuEntry, hidden) -> bool:
+    """Whether entry's id or hierarchical name is in hidden."""
+    return entry.name in hidden or (entry.id is not None and entry.id in hidden)
+
+
+def filter_grub_cfg(lines: Iterable[str], hidden) -> Iterator[str]:
+    """
+    Yield the lines of grub.cfg without the menuentry blocks whose id or
+    hierarchical name is in hidden, in a single pass.
+
+    Lines are held back only while a statement spans several lines (e.g.
+    a quoted title with a newline), so memory does not grow with the file.
+    """
+    parser = _Parser(None)
+    tokenizer = _Tokenizer()
+    group = []
+    # Stack depth of the hidden entry being skipped
+    hidden_depth = None
+    for line in lines:
+        group.append(line)
+        skip = hidden_depth is not None
+        for statement in tokenizer.feed(line):
+            count = len(parser.entries)
+            parser.statement(statement, 0)
+            for entry in parser.entries[count:]:
+                if hidden_depth is None and is_hidden(entry, hidden):
+                    skip = True
+                    if entry in parser.stack:
+                        hidden_depth = parser.stack.index(entry)
+            if hidden_depth is not None and len(parser.stack) <= hidden_depth:
+                hidden_depth = None
+        if tokenizer.quote is not None or tokenizer.in_word or tokenizer.words:
+            continue
+        if not skip:
+            yield from group
+        group = []
+    if hidden_depth is None:
+        yield from group
+
+
+def menu_index_path(grub_cfg: str) -> str:
+    """Return the location of the menu index written next to grub_cfg."""
+    return os.path.join(os.path.dirname(grub_cfg), MENU_INDEX_NAME)
+
+
+def build_menu_index(grub_cfg: list, entries: List[MenuEntry],
+                     fields=MenuEntry.FIELDS) -> Dict:
+    """
+    Return the JSON-serializable menu index of entries.
+
+    Args:
+        grub_cfg: [size, mtime_ns, sha256 or None] of the parsed grub.cfg
+        entries: Its menu entries
+        fields: Entry fields to include (PUBLIC_FIELDS for a
+            world-readable index)
+    """
+    return {
+        'version': MENU_INDEX_VERSION,
+        'grub_cfg': grub_cfg,
+        'entries': [entry.to_dict(fields) for entry in entries],
+    }
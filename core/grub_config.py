@@ -0,0 +1,215 @@
+"""
+Document model for /etc/default/grub.
+Keeps every line of the file (comments, commented-out keys, blank lines,
+duplicate assignments) so edits change only the lines they touch and the
+rest of the file is written back byte for byte. An assignment continued
+over several physical lines (backslash-newline, a quoted newline) is one
+logical line.
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.shell_eval import assignment_span, evaluate, logical_lines, quote
+
+# KEY=value, optionally prefixed by "export"
+ASSIGNMENT_RE = re.compile(r'^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)=(.*?)\s*$', re.S)
+
+# Commented-out assignment, e.g. "#GRUB_TERMINAL=console"
+COMMENTED_RE = re.compile(r'^\s*#+\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)=(.*?)\s*$', re.S)
+
+EDITOR_MARKER = '# Modified by Soplos GRUB Editor'
+
+
+def format_assignment(key: str, value: str) -> str:
+    """Return the line assigning value to key."""
+    return f'{key}={quote(value)}\n'
+
+
+class ConfigLine:
+    """One logical line of the file (one or more physical lines)."""
+
+    __slots__ = ('text', 'key', 'commented', 'removed')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.removed = False
+        match = ASSIGNMENT_RE.match(text)
+        if match and not text.lstrip().startswith('#'):
+            self.key, self.commented = match.group(1), False
+            return
+        match = COMMENTED_RE.match(text)
+        if match:
+            self.key, self.commented = match.group(1), True
+        else:
+            self.key, self.commented = None, False
+
+    def assign(self, key: str, value: str):
+        """
+        Rewrite an active assignment to value, keeping its indentation,
+        'export' prefix and whatever follows the assignment word (a
+        trailing comment, the newline).
+        """
+        span = assignment_span(self.text)
+        if span is None:
+            self.text = format_assignment(key, value)
+            return
+        start, end = span
+        self.text = f'{self.text[:start]}{key}={quote(value)}{self.text[end:]}'
+
+    @property
+    def raw_value(self) -> Optional[str]:
+        """The text after '=' of an assignment, or None."""
+        pattern = COMMENTED_RE if self.commented else ASSIGNMENT_RE
+        match = pattern.match(self.text) if self.key else None
+        return match.group(2) if match else None
+
+
+class GrubDefaultDocument:
+    """
+    Parsed /etc/default/grub.
+
+    Lines are never moved: removing a line leaves a tombstone, so the
+    key -> line index stays valid and every edit is O(1). Only setting a
+    key whose effective value refers to other variables evaluates the
+    document, once until the next edit.
+    """
+
+    def __init__(self, text: str = ''):
+        """
+        Parse text.
+
+        Args:
+            text: Content of /etc/default/grub
+        """
+        self.lines: List[ConfigLine] = []
+        # key -> active assignments, in file order
+        self._assignments: Dict[str, List[ConfigLine]] = {}
+        # key -> commented-out assignments, in file order
+        self._commented: Dict[str, List[ConfigLine]] = {}
+        self._has_marker = False
+        # evaluate() result of the current content, None once edited
+        self._evaluation = None
+        for text_line in logical_lines(text):
+            self._append(ConfigLine(text_line))
+
+    def _append(self, line: ConfigLine):
+        self._evaluation = None
+        self.lines.append(line)
+        if line.text.strip() == EDITOR_MARKER:
+            self._has_marker = True
+        if line.key:
+            index = self._commented if line.commented else self._assignments
+            index.setdefault(line.key, []).append(line)
+
+    def copy(self) -> 'GrubDefaultDocument':
+        """Return an independent copy, e.g. to edit before a write succeeds."""
+        return GrubDefaultDocument(self.serialize())
+
+    def serialize(self) -> str:
+        """Return the file content."""
+        return ''.join(line.text for line in self.lines if not line.removed)
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self._assignments.get(key))
+
+    def raw_items(self) -> Iterator[Tuple[str, str]]:
+        """Yield (key, raw value) for every active assignment, in file order."""
+        for line in self.lines:
+            if line.key and not line.commented and not line.removed:
+                yield line.key, line.raw_value
+
+    def get_raw(self, key: str) -> Optional[str]:
+        """Return the raw value of the effective (last) assignment of key."""
+        lines = self._assignments.get(key)
+        return lines[-1].raw_value if lines else None
+
+    def _effective(self, key: str):
+        """Return the shell_eval Assignment behind the value of key, or None."""
+        line = self._assignments[key][-1]
+        if '$' not in line.text and '`' not in line.text:
+            # A literal value does not depend on the rest of the file
+            return evaluate(line.text).provenance.get(key)
+        if self._evaluation is None:
+            self._evaluation = evaluate(self.serialize())
+        return self._evaluation.provenance.get(key)
+
+    def set(self, key: str, value: str):
+        """
+        Assign value to key.
+
+        The first assignment is rewritten in place and duplicates are
+        removed; otherwise the first commented-out assignment is
+        uncommented; otherwise the key is appended after the editor marker.
+        Nothing changes if the file already gives key exactly this value.
+        """
+        text = format_assignment(key, value)
+        assignments = self._assignments.get(key)
+        if assignments:
+            effective = self._effective(key)
+            if effective is not None and effective.exact and effective.value == value:
+                return
+            self._evaluation = None
+            first = assignments[0]
+            first.assign(key, value)
+            for duplicate in assignments[1:]:
+                duplicate.removed = True
+            self._assignments[key] = [first]
+            return
+
+        commented = self._commented.get(key)
+        if commented:
+            self._evaluation = None
+            line = commented.pop(0)
+            line.text = text
+            line.commented = False
+            self._assignments[key] = [line]
+            return
+
+        last = self._last_line()
+        if last is not None and not last.text.endswith('\n'):
+            last.text += '\n'
+        if not self._has_marker:
+            if last is not None and last.text.strip():
+                self._append(ConfigLine('\n'))
+            self._append(ConfigLine(EDITOR_MARKER + '\n'))
+        self._append(ConfigLine(text))
+
+    def unset(self, key: str) -> bool:
+        """
+        Delete every active assignment of key; commented-out ones are kept.
+
+        Returns:
+            True if the key was assigned
+        """
+        assignments = self._assignments.pop(key, None)
+        if not assignments:
+            return False
+        self._evaluation = None
+        for line in assignments:
+            line.removed = True
+        return True
+
+    def comment(self, key: str) -> bool:
+        """
+        Comment out every active assignment of key.
+
+        Returns:
+            True if the key was assigned
+        """
+        assignments = self._assignments.pop(key, None)
+        if not assignments:
+            return False
+        self._evaluation = None
+        for line in assignments:
+            line.text = ''.join('#' + physical for physical in
+                                line.text.lstrip().splitlines(keepends=True))
+            line.commented = True
+        self._commented.setdefault(key, [])[:0] = assignments
+        return True
+
+    def _last_line(self) -> Optional[ConfigLine]:
+        for line in reversed(self.lines):
+            if not line.removed:
+                return line
+        return None
@@ -0,0 +1,501 @@
+"""
+grub.cfg generation engine for Soplos Grub Editor.
+Runs the /etc/grub.d generator scripts the way grub-mkconfig does and can
+regenerate individual "### BEGIN /etc/grub.d/XX ###" sections of an
+existing grub.cfg, splicing their new output into place.
+"""
+
+import os
+import re
+import shutil
+import signal
+import fnmatch
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.logger import log_info, log_warning
+from core.i18n_manager import _
+from core.os_prober_cache import OS_PROBER_SCRIPT
+
+GRUB_D_DIR = "/etc/grub.d"
+
+# Scripts producing menu entries for the installed kernels
+LINUX_GENERATORS = ('10_linux', '20_linux_xen', '41_snapshots-btrfs')
+THEME_GENERATORS = ('05_*',)
+
+# Generators whose output depends on state no input fingerprint covers:
+# attached disks, firmware, btrfs snapshots
+UNTRACKED_GENERATORS = ('30_os-prober', '30_uefi-firmware', '41_snapshots-btrfs')
+
+# /etc/default/grub keys and the generator scripts whose output depends on
+# them (shell patterns on the script name). A changed key that is not
+# listed here forces a full regeneration: e.g. GRUB_SAVEDEFAULT, which
+# grub-mkconfig_lib's save_default_entry reads in every script that
+# writes menu entries, including third-party ones.
+KEY_GENERATORS = {}
+for _key in ('GRUB_DEFAULT', 'GRUB_TIMEOUT', 'GRUB_TIMEOUT_STYLE',
+             'GRUB_HIDDEN_TIMEOUT', 'GRUB_HIDDEN_TIMEOUT_QUIET', 'GRUB_RECORDFAIL_TIMEOUT',
+             'GRUB_BUTTON_CMOS_ADDRESS', 'GRUB_GFXMODE', 'GRUB_INIT_TUNE', 'GRUB_BADRAM',
+             'GRUB_TERMINAL', 'GRUB_TERMINAL_INPUT', 'GRUB_TERMINAL_OUTPUT',
+             'GRUB_SERIAL_COMMAND', 'GRUB_PRELOAD_MODULES'):
+    KEY_GENERATORS[_key] = ('00_header',)
+for _key in ('GRUB_THEME', 'GRUB_FONT', 'GRUB_BACKGROUND', 'GRUB_COLOR_NORMAL',
+             'GRUB_COLOR_HIGHLIGHT'):
+    KEY_GENERATORS[_key] = ('00_header',) + THEME_GENERATORS
+for _key in ('GRUB_CMDLINE_LINUX', 'GRUB_CMDLINE_LINUX_DEFAULT', 'GRUB_CMDLINE_LINUX_RECOVERY',
+             'GRUB_CMDLINE_XEN', 'GRUB_CMDLINE_XEN_DEFAULT', 'GRUB_DISABLE_RECOVERY',
+             'GRUB_DISABLE_LINUX_UUID', 'GRUB_DISABLE_LINUX_PARTUUID', 'GRUB_GFXPAYLOAD_LINUX',
+             'GRUB_EARLY_INITRD_LINUX_CUSTOM', 'GRUB_TOP_LEVEL', 'GRUB_TOP_LEVEL_XEN',
+             'GRUB_DISTRIBUTOR'):
+    KEY_GENERATORS[_key] = LINUX_GENERATORS
+KEY_GENERATORS['GRUB_DISABLE_SUBMENU'] = LINUX_GENERATORS + ('30_os-prober',)
+KEY_GENERATORS['GRUB_DISABLE_OS_PROBER'] = ('30_os-prober',)
+KEY_GENERATORS['GRUB_OS_PROBER_SKIP_LIST'] = ('30_os-prober',)
+del _key
+
+# Inputs whose changes only matter to specific generators. custom.cfg is
+# sourced at boot time by 41_custom, so editing it needs no regeneration.
+PATH_GENERATORS = (
+    ('/boot/vmlinuz-*', LINUX_GENERATORS),
+    ('/boot/initrd.img-*', LINUX_GENERATORS),
+    ('/boot/initramfs-*', LINUX_GENERATORS),
+    ('/boot/grub/custom.cfg', ()),
+)
+
+# Generators that only read the exported environment and the disks, so they
+# can run concurrently. Everything else (00_header, the 05_* theme scripts
+# that write background caches, third-party scripts) runs in order.
+PARALLEL_GENERATORS = ('10_linux', '20_linux_xen', '20_memtest86+', '30_os-prober',
+                       '30_uefi-firmware', '40_custom', '41_custom', '41_snapshots-btrfs')
+
+GRUB_CFG_PREAMBLE = (
+    "#\n"
+    "# DO NOT EDIT THIS FILE\n"
+    "#\n"
+    "# It is automatically generated by grub-mkconfig using templates\n"
+    "# from /etc/grub.d and settings from /etc/default/grub\n"
+    "#\n"
+)
+
+SECTION_BEGIN = re.compile(r'^### BEGIN (.+) ###$', re.MULTILINE)
+
+# Reproduces the environment grub-mkconfig exports to its scripts
+# (grub-mkconfig 2.06/2.12) and dumps it NUL-separated.
+ENVIRONMENT_SCRIPT = r'''
+set -e
+sysconfdir=/etc
+sbindir=/usr/sbin
+bindir=/usr/bin
+pkgdatadir="${pkgdatadir:-/usr/share/grub}"
+export pkgdatadir
+export TEXTDOMAIN=grub
+export TEXTDOMAINDIR=/usr/share/locale
+grub_probe="${sbindir}/grub-probe"
+. "${pkgdatadir}/grub-mkconfig_lib"
+
+GRUB_DEVICE="`${grub_probe} --target=device /`"
+GRUB_DEVICE_UUID="`${grub_probe} --device ${GRUB_DEVICE} --target=fs_uuid 2> /dev/null`" || true
+GRUB_DEVICE_PARTUUID="`${grub_probe} --device ${GRUB_DEVICE} --target=partuuid 2> /dev/null`" || true
+GRUB_DEVICE_BOOT="`${grub_probe} --target=device /boot`"
+GRUB_DEVICE_BOOT_UUID="`${grub_probe} --device ${GRUB_DEVICE_BOOT} --target=fs_uuid 2> /dev/null`" || true
+GRUB_DISABLE_OS_PROBER="true"
+GRUB_FS="`${grub_probe} --device ${GRUB_DEVICE} --target=fs 2> /dev/null || echo unknown`"
+if [ x"$GRUB_FS" = xunknown ]; then
+    GRUB_FS="$(stat -f -c %T / || echo unknown)"
+fi
+GRUB_EARLY_INITRD_LINUX_STOCK="intel-uc.img intel-ucode.img amd-uc.img amd-ucode.img early_ucode.cpio microcode.cpio"
+
+set -a
+if test -f ${sysconfdir}/default/grub ; then
+    . ${sysconfdir}/default/grub
+fi
+for x in ${sysconfdir}/default/grub.d/*.cfg ; do
+    if [ -e "${x}" ]; then
+        . "${x}"
+    fi
+done
+set +a
+
+if [ "x${GRUB_TERMINAL}" != "x" ] ; then
+    GRUB_TERMINAL_INPUT="${GRUB_TERMINAL}"
+    GRUB_TERMINAL_OUTPUT="${GRUB_TERMINAL}"
+fi
+if [ "x${GRUB_TERMINAL_OUTPUT}" = "x" ]; then
+    GRUB_TERMINAL_OUTPUT=gfxterm
+fi
+for x in ${GRUB_TERMINAL_OUTPUT}; do
+    case "x${x}" in
+        xgfxterm) ;;
+        xconsole | xserial | xofconsole | xvga_text) LANG=C; export LANG ;;
+        *) exit 1 ;;
+    esac
+done
+
+GRUB_ACTUAL_DEFAULT="$GRUB_DEFAULT"
+if [ "x${GRUB_ACTUAL_DEFAULT}" = "xsaved" ] ; then
+    GRUB_ACTUAL_DEFAULT="`"${bindir}/grub-editenv" - list | sed -n '/^saved_entry=/ s,^saved_entry=,,p'`"
+fi
+
+export GRUB_DEVICE GRUB_DEVICE_UUID GRUB_DEVICE_PARTUUID GRUB_DEVICE_BOOT \
+    GRUB_DEVICE_BOOT_UUID GRUB_DISABLE_OS_PROBER GRUB_FS GRUB_FONT \
+    GRUB_PRELOAD_MODULES GRUB_ACTUAL_DEFAULT GRUB_TERMINAL_INPUT \
+    GRUB_TERMINAL_OUTPUT GRUB_EARLY_INITRD_LINUX_STOCK
+env -0
+'''
+
+
+class GenerationError(Exception):
+    """Raised when grub.cfg cannot be (re)generated by this engine."""
+
+
+def is_generator_script(path: str) -> bool:
+    """Apply grub-mkconfig's rules for which /etc/grub.d files are run."""
+    name = os.path.basename(path)
+    if name.endswith('~') or (name.startswith('#') and name.endswith('#')):
+        return False
+    if '.dpkg-' in name or name.endswith(('.rpmsave', '.rpmnew', '.sig')):
+        return False
+    if name.startswith('README'):
+        return False
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def list_generator_scripts(grub_d: str = GRUB_D_DIR) -> List[str]:
+    """Return the generator scripts grub-mkconfig would run, in order."""
+    try:
+        names = sorted(os.listdir(grub_d))
+    except OSError:
+        return []
+    scripts = [os.path.join(grub_d, name) for name in names]
+    return [path for path in scripts if is_generator_script(path)]
+
+
+def split_sections(content: str) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+    """
+    Split a grub-mkconfig generated grub.cfg into its script sections.
+
+    Returns:
+        (preamble, [(script, output), ...]), or None if the file does not
+        have exactly the layout grub-mkconfig produces
+    """
+    matches = list(SECTION_BEGIN.finditer(content))
+    if not matches:
+        return None
+    # grub-mkconfig echoes an empty line before every BEGIN marker
+    preamble = content[:matches[0].start()]
+    if not preamble.endswith('\n\n'):
+        return None
+    preamble = preamble[:-1]
+
+    sections = []
+    for i, match in enumerate(matches):
+        script = match.group(1)
+        end_marker = f"### END {script} ###\n"
+        body_start = match.end() + 1
+        block_end = matches[i + 1].start() - 1 if i + 1 < len(matches) else len(content)
+        block = content[body_start:block_end]
+        if not block.endswith(end_marker):
+            return None
+        sections.append((script, block[:-len(end_marker)]))
+
+    if render_sections(preamble, sections) != content:
+        return None
+    return preamble, sections
+
+
+def render_sections(preamble: str, sections: Iterable[Tuple[str, str]]) -> str:
+    """Assemble grub.cfg text from its preamble and script sections."""
+    parts = [preamble]
+    for script, output in sections:
+        parts.append(f"\n### BEGIN {script} ###\n{output}### END {script} ###\n")
+    return ''.join(parts)
+
+
+def _generators_matching(patterns: Iterable[str], scripts: Iterable[str]) -> Set[str]:
+    return {script for script in scripts
+            if any(fnmatch.fnmatch(os.path.basename(script), p) for p in patterns)}
+
+
+def plan_incremental(changed_paths: Iterable[str], old_config: Dict[str, str],
+                     new_config: Dict[str, str], scripts: List[str],
+                     config_path: str = "/etc/default/grub") -> Optional[Set[str]]:
+    """
+    Work out which generator scripts must run again after inputs changed.
+
+    Args:
+        changed_paths: Inputs added, removed or modified since the last generation
+        old_config: /etc/default/grub values at the last generation
+        new_config: Current /etc/default/grub values
+        scripts: Generator scripts currently present
+
+    Returns:
+        The scripts to re-run, or None when a full regeneration is
+        required. Nothing tracked having changed also requires one, since
+        the update was asked for anyway; otherwise UNTRACKED_GENERATORS
+        always run again.
+    """
+    dirty = set()
+    for path in changed_paths:
+        if path == config_path:
+            for key in set(old_config) | set(new_config):
+                if old_config.get(key) == new_config.get(key):
+                    continue
+                patterns = KEY_GENERATORS.get(key)
+                if patterns is None:
+                    return None
+                dirty |= _generators_matching(patterns, scripts)
+        elif os.path.dirname(path) == GRUB_D_DIR:
+            # Added, removed or (un)marked executable scripts change the layout
+            if path not in scripts:
+                return None
+            dirty.add(path)
+        else:
+            for pattern, patterns in PATH_GENERATORS:
+                if fnmatch.fnmatch(path, pattern):
+                    dirty |= _generators_matching(patterns, scripts)
+                    break
+            else:
+                return None
+    if not dirty:
+        return None
+    return dirty | _generators_matching(UNTRACKED_GENERATORS, scripts)
+
+
+class GrubGenerator:
+    """
+    Runs /etc/grub.d generator scripts and installs the resulting grub.cfg.
+    Requires root.
+    """
+
+    def __init__(self, grub_cfg: str, grub_d: str = GRUB_D_DIR, os_prober_cache=None,
+                 source: Optional[str] = None):
+        """
+        Initialize the generator.
+
+        Args:
+            grub_cfg: Path of the grub.cfg to update
+            grub_d: Directory containing the generator scripts
+            os_prober_cache: Optional OsProberCache consulted instead of
+                running 30_os-prober when the disks are unchanged
+            source: grub.cfg whose sections are kept by
+                regenerate_sections(), if not grub_cfg (e.g. the copy
+                made before hidden entries were removed)
+        """
+        self.grub_cfg = grub_cfg
+        self.source = source or grub_cfg
+        self.grub_d = grub_d
+        self.os_prober_cache = os_prober_cache
+        self._processes = set()
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def build_environment(self) -> Dict[str, str]:
+        """Return the environment grub-mkconfig exports to its scripts."""
+        try:
+            result = subprocess.run(['sh', '-c', ENVIRONMENT_SCRIPT], capture_output=True,
+                                    stdin=subprocess.DEVNULL, env=dict(os.environ, LC_ALL='C'))
+        except OSError as e:
+            raise GenerationError(str(e))
+        if result.returncode != 0:
+            raise GenerationError(result.stderr.decode('utf-8', 'replace').strip())
+        env = {}
+        for item in result.stdout.split(b'\0'):
+            key, sep, value = item.decode('utf-8', 'surrogateescape').partition('=')
+            if sep:
+                env[key] = value
+        env.pop('LC_ALL', None)
+        if 'LC_ALL' in os.environ:
+            env['LC_ALL'] = os.environ['LC_ALL']
+        return env
+
+    def run_script(self, script: str, env: Dict[str, str],
+                   on_line: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Run one generator script.
+
+        Args:
+            script: Path of the script
+            env: Environment from build_environment()
+            on_line: Called with each diagnostic line the script prints
+
+        Returns:
+            The script's standard output
+        """
+        if self.os_prober_cache is not None and os.path.basename(script) == OS_PROBER_SCRIPT:
+            return self.os_prober_cache.run(script, env,
+                                            lambda: self._execute(script, env, on_line), on_line)
+        return self._execute(script, env, on_line)
+
+    def _execute(self, script: str, env: Dict[str, str],
+                 on_line: Optional[Callable[[str], None]] = None) -> str:
+        """Run a generator script as a cancellable child process."""
+        if self._cancelled.is_set():
+            raise GenerationError(_("cancelled"))
+        with tempfile.TemporaryFile() as stdout:
+            try:
+                process = subprocess.Popen([script], stdout=stdout, stderr=subprocess.PIPE,
+                                           stdin=subprocess.DEVNULL, env=env,
+                                           start_new_session=True)
+            except OSError as e:
+                raise GenerationError(str(e))
+            with self._lock:
+                self._processes.add(process)
+            try:
+                for line in process.stderr:
+                    line = line.decode('utf-8', 'replace').strip()
+                    if line and on_line:
+                        on_line(line)
+                returncode = process.wait()
+            finally:
+                with self._lock:
+                    self._processes.discard(process)
+            if self._cancelled.is_set():
+                raise GenerationError(_("cancelled"))
+            if returncode != 0:
+                raise GenerationError(_("{script} exited with status {code}").format(
+                    script=script, code=returncode))
+            stdout.seek(0)
+            return stdout.read().decode('utf-8', 'surrogateescape')
+
+    def cancel(self):
+        """Stop the running generator scripts; nothing gets installed."""
+        self._cancelled.set()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def regenerate_sections(self, scripts: Set[str],
+                            progress: Optional[Callable[[str, float], None]] = None) -> None:
+        """
+        Re-run only the given scripts and splice their output into grub.cfg.
+
+        Raises:
+            GenerationError: if grub.cfg does not have the expected layout
+                or a script fails; grub.cfg is left untouched
+        """
+        try:
+            with open(self.source, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                content = f.read()
+        except OSError as e:
+            raise GenerationError(str(e))
+
+        parsed = split_sections(content)
+        current = list_generator_scripts(self.grub_d)
+        if parsed is None or [script for script, _output in parsed[1]] != current:
+            raise GenerationError(_("grub.cfg layout does not match /etc/grub.d"))
+        preamble, sections = parsed
+
+        env = self.build_environment()
+        outputs = dict(sections)
+        for done, script in enumerate(s for s in current if s in scripts):
+            if progress:
+                progress(_("Running {script}").format(script=os.path.basename(script)),
+                         done / len(scripts))
+            outputs[script] = self.run_script(
+                script, env, lambda line: progress(line, done / len(scripts)) if progress else None)
+
+        self.install(render_sections(preamble, ((s, outputs[s]) for s in current)))
+
+    def generate(self, progress: Optional[Callable[[str, float], None]] = None,
+                 parallel: bool = True) -> None:
+        """
+        Generate and install a complete grub.cfg, like grub-mkconfig.
+
+        With parallel=True the independent generators (PARALLEL_GENERATORS)
+        run concurrently, one process each, while the remaining scripts run
+        in order; outputs are concatenated in canonical order either way.
+
+        Raises:
+            GenerationError: if a script fails; grub.cfg is left untouched
+        """
+        scripts = list_generator_scripts(self.grub_d)
+        if not scripts:
+            raise GenerationError(_("No generator scripts found in {dir}").format(dir=self.grub_d))
+        env = self.build_environment()
+        outputs = {}
+        done = []
+        done_lock = threading.Lock()
+
+        def report(line):
+            if progress:
+                progress(line, len(done) / len(scripts))
+
+        def run(script):
+            outputs[script] = self.run_script(script, env, report)
+            with done_lock:
+                done.append(script)
+            report(_("Finished {script}").format(script=os.path.basename(script)))
+
+        concurrent = [script for script in scripts
+                      if parallel and os.path.basename(script) in PARALLEL_GENERATORS]
+        report(_("Generating grub configuration file ..."))
+        if concurrent:
+            workers = min(len(concurrent), os.cpu_count() or 2)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='grub.d') as pool:
+                futures = [pool.submit(run, script) for script in concurrent]
+                try:
+                    for script in scripts:
+                        if script not in concurrent:
+                            run(script)
+                except GenerationError:
+                    self.cancel()
+                    raise
+                for future in futures:
+                    try:
+                        future.result()
+                    except GenerationError:
+                        self.cancel()
+                        raise
+        else:
+            for script in scripts:
+                run(script)
+
+        self.install(render_sections(GRUB_CFG_PREAMBLE, ((s, outputs[s]) for s in scripts)))
+
+    def install(self, content: str) -> None:
+        """
+        Syntax-check content and atomically replace grub.cfg with it,
+        keeping the previous file's permissions.
+        """
+        if self._cancelled.is_set():
+            raise GenerationError(_("cancelled"))
+        directory = os.path.dirname(self.grub_cfg)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.grub.cfg.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', errors='surrogateescape') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+
+            checker = shutil.which('grub-script-check')
+            if checker:
+                result = subprocess.run([checker, tmp_path], capture_output=True, text=True,
+                                        stdin=subprocess.DEVNULL)
+                if result.returncode != 0:
+                    raise GenerationError(_("Syntax errors in generated grub.cfg: {err}").format(
+                        err=result.stderr.strip()))
+
+            try:
+                st = os.stat(self.grub_cfg)
+                os.chmod(tmp_path, st.st_mode & 0o7777)
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, self.grub_cfg)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        log_info(_("Installed new {path}").format(path=self.grub_cfg))
@@ -5,12 +5,42 @@ interacting with grub-mkconfig, and managing grub-btrfs integration.
 """
 
 import os
+import re
+import glob
+import hashlib
 import shutil
+import signal
+import threading
 import subprocess
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from utils.logger import log_info, log_error, log_warning
 from core.i18n_manager import _
+from core.generation_state import GenerationState, output_signature
+from core.state import get_cache_dir, load_json, save_json
+from core.grub_generator import (GrubGenerator, GenerationError,
+                                 list_generator_scripts, plan_incremental)
+from core.os_prober_cache import (OS_PROBER_SCRIPT, OS_PROBER_SETTINGS, OsProberCache,
+                                  cache_key)
+from core.privileged_helper import get_privileged_helper
+from core.transaction import GrubTransaction
+from core.grub_config import GrubDefaultDocument
+from core.shell_eval import evaluate as evaluate_shell
+from core.stat_cache import StatCache
+from core.grub_cfg_parser import (MENU_INDEX_NAME, MENU_INDEX_VERSION, MenuEntry,
+                                  build_menu_index, is_hidden, menu_index_path,
+                                  parse_grub_cfg)
+from core.privileged_ops import filter_menu, load_menu_filter, unfiltered_grub_cfg
+from core.kernel_inventory import (Kernel, compare_entries, default_distributor,
+                                   merge_entries, predict_entries, scan_kernels)
+
+
+# "set name=value" lines of custom.cfg
+CUSTOM_SET_RE = re.compile(r'^\s*set\s+([A-Za-z_][A-Za-z0-9_]*)=(.*)$')
+
+# Receives one line of update-grub output and an estimated completion
+# fraction (0.0 - 1.0).
+ProgressCallback = Callable[[str, float], None]
 
 
 class GrubManager:
@@ -19,42 +49,93 @@ class GrubManager:
     """
     
     GRUB_DEFAULT_PATH = "/etc/default/grub"
+    GRUB_CFG_PATH = "/boot/grub/grub.cfg"
+    CUSTOM_CFG_PATH = "/boot/grub/custom.cfg"
+    THEMES_DIR = "/boot/grub/themes"
+    FONTS_DIR = "/boot/grub/fonts"
+    UPDATE_GRUB_PATHS = ['/usr/sbin/update-grub', '/sbin/update-grub', 'update-grub']
+    
+    # Re-run only the /etc/grub.d scripts affected by a change when possible
+    INCREMENTAL_UPDATES = True
+    
+    # Engine for full regenerations: 'update-grub' (sequential grub-mkconfig)
+    # or 'parallel' (independent /etc/grub.d scripts run concurrently).
+    # Can be overridden with SOPLOS_GRUB_ENGINE. While os-prober results
+    # are cached for the current disks, 'update-grub' runs the generator
+    # scripts sequentially itself, so probing can be skipped.
+    GENERATION_ENGINE = 'update-grub'
     
     def __init__(self):
         """Initialize the GRUB manager."""
         self.config_path = Path(self.GRUB_DEFAULT_PATH)
         self.config_data = {}
         
+        # Parsed /etc/default/grub shared by readers and writers, and the
+        # assignment (line, exported, exact) behind each value
+        self._document = None
+        self.config_provenance = {}
+        
+        # /etc/default/grub, custom.cfg and grub.cfg contents, kept until
+        # the files change on disk
+        self._stat_cache = StatCache()
+        
+        # Running update-grub process or generator, so it can be cancelled
+        # from another thread
+        self._update_process = None
+        self._active_generator = None
+        self._helper_update = False
+        self._update_lock = threading.Lock()
+        
+        # Fingerprint of grub-mkconfig inputs at the last generation
+        self.generation_state = GenerationState(self.GRUB_CFG_PATH)
+        
+        # 30_os-prober output, reused while the disks are unchanged
+        self.os_prober_cache = OsProberCache()
+        
     def read_config(self) -> Dict[str, str]:
         """
-        Read the current GRUB configuration.
+        Read the current GRUB configuration from disk, bypassing the cache.
+        Use the config property instead unless a re-read is required.
         
         Returns:
             Dictionary with configuration keys and values
         """
-        self.config_data = {}
-        
+        self._stat_cache.invalidate(str(self.config_path))
+        return self.config
+    
+    def _load_document(self) -> GrubDefaultDocument:
+        """Parse /etc/default/grub from disk."""
         if not self.config_path.exists():
             log_error(_("GRUB config not found at {}").format(self.config_path))
-            return {}
+            return GrubDefaultDocument()
             
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                        
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        # Remove quotes if present
-                        value = value.strip('"').strip("'")
-                        self.config_data[key.strip()] = value
-                        
-            return self.config_data
+                return GrubDefaultDocument(f.read())
         except Exception as e:
             log_error(_("Error reading GRUB config: {}").format(e))
-            return {}
+            return GrubDefaultDocument()
+    
+    def _set_document(self, document: GrubDefaultDocument):
+        """Make document the current /etc/default/grub and derive config_data."""
+        self._document = document
+        # Values as the shell sourcing the file in grub-mkconfig sees them
+        result = evaluate_shell(document.serialize())
+        self.config_data = dict(result.values)
+        self.config_provenance = result.provenance
+        if result.unsupported:
+            log_warning(_("Ignored shell commands in {path} (lines {lines})").format(
+                path=self.config_path, lines=', '.join(map(str, result.unsupported))))
+    
+    def _store_document(self, document: GrubDefaultDocument):
+        """Adopt document after it was written to /etc/default/grub."""
+        self._set_document(document)
+        self._stat_cache.put(str(self.config_path), document)
+    
+    def _edit_document(self) -> GrubDefaultDocument:
+        """Return a copy of the parsed /etc/default/grub to edit."""
+        self.config  # Make sure the document is current
+        return self._document.copy()
             
     def save_config(self, new_config: Dict[str, str]) -> bool:
         """
@@ -62,225 +143,101 @@ class GrubManager:
         Modifies existing keys in place. Deletes keys with empty values.
         Only adds new keys if they don't exist.
         """
-        import os
-        
         try:
-            # Read file
-            lines = []
-            if self.config_path.exists():
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-            
-            # Build result while tracking what we've processed
-            result_lines = []
-            processed_keys = set()
-            
-            for line in lines:
-                stripped = line.strip()
-                
-                # Skip lines that are our own "Modified by" comments
-                if '# Modified by Soplos GRUB Editor' in stripped:
-                    continue
-                # Skip commented-out lines we previously created
-                if '# Cleared by Soplos' in stripped or '# Removed by Soplos' in stripped:
-                    continue
-                
-                # Check if this is a commented key=value that we want to uncomment
-                if stripped.startswith('#') and '=' in stripped:
-                    # Extract key from commented line (e.g., "#GRUB_TIMEOUT_STYLE=hidden")
-                    uncommented = stripped.lstrip('#').strip()
-                    key = uncommented.split('=')[0].strip()
-                    
-                    if key in new_config and key not in processed_keys:
-                        value = new_config[key]
-                        processed_keys.add(key)
-                        
-                        # Empty value = keep it commented (or delete)
-                        if value == '':
-                            result_lines.append(line)  # Keep commented
-                        else:
-                            # Uncomment and set new value
-                            if ' ' in value:
-                                value = f'"{value}"'
-                            result_lines.append(f'{key}={value}\n')
-                        continue
-                    else:
-                        # Not a key we're modifying, keep original commented line
-                        result_lines.append(line)
-                        continue
-                
-                # Keep other comments and empty lines
-                if not stripped or stripped.startswith('#'):
-                    result_lines.append(line)
-                    continue
-                
-                # Parse uncommented key=value lines
-                if '=' in stripped:
-                    key = stripped.split('=')[0].strip()
-                    
-                    # Skip if we already processed this key (handle duplicates)
-                    if key in processed_keys:
-                        continue
-                    
-                    if key in new_config:
-                        value = new_config[key]
-                        processed_keys.add(key)
-                        
-                        # Empty value = delete the line (don't add it to result)
-                        if value == '':
-                            continue
-                        
-                        # Write the updated value
-                        if ' ' in value:
-                            value = f'"{value}"'
-                        result_lines.append(f'{key}={value}\n')
-                    else:
-                        # Key not in our config, keep original line
-                        result_lines.append(line)
-                else:
-                    result_lines.append(line)
-            
-            # Add only truly new keys (don't exist in file and have non-empty values)
-            new_keys = []
-            for key, value in new_config.items():
-                if key not in processed_keys and value != '':
-                    if ' ' in value:
-                        value = f'"{value}"'
-                    new_keys.append(f'{key}={value}\n')
-            
-            # Remove trailing empty lines
-            while result_lines and result_lines[-1].strip() == '':
-                result_lines.pop()
-            
-            if new_keys:
-                # Add a single blank line before our section if file doesn't end with one
-                if result_lines and result_lines[-1].strip() != '':
-                    result_lines.append('\n')
-                result_lines.append('# Modified by Soplos GRUB Editor\n')
-                result_lines.extend(new_keys)
-            
-            # Write file
-            is_root = os.geteuid() == 0
-            if is_root:
-                with open(self.config_path, 'w', encoding='utf-8') as f:
-                    f.writelines(result_lines)
-                self.read_config()  # Reload to keep state in sync
+            document = self._apply_to_document(new_config)
+            transaction = self.transaction()
+            transaction.write(self.config_path, document.serialize())
+            if transaction.commit():
+                self._store_document(document)  # Keep state in sync
                 log_info(_("Successfully saved config to {path}").format(path=self.config_path))
                 return True
             else:
-                import tempfile
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.grub') as tmp:
-                    tmp.writelines(result_lines)
-                    tmp_path = tmp.name
-                
-                result = subprocess.run(['pkexec', 'cp', tmp_path, str(self.config_path)], 
-                                        capture_output=True, text=True)
-                os.unlink(tmp_path)
-                
-                if result.returncode == 0:
-                    self.read_config()  # Reload to keep state in sync
-                    log_info(_("Successfully saved config using pkexec"))
-                    return True
-                else:
-                    log_error(_("Failed to save config: {err}").format(err=result.stderr))
-                    return False
+                log_error(_("Failed to save config to {path}").format(path=self.config_path))
+                return False
                     
         except Exception as e:
             log_error(_("Error saving GRUB config: {err}").format(err=e))
             return False
-
+    
+    def _apply_to_document(self, new_config: Dict[str, str]) -> GrubDefaultDocument:
+        """
+        Return an edited copy of /etc/default/grub with new_config applied
+        (see save_config()).
+        """
+        document = self._edit_document()
+        for key, value in new_config.items():
+            if value == '':
+                document.unset(key)
+            else:
+                document.set(key, value)
+        return document
 
     def remove_config_key(self, key: str) -> bool:
         """
         Remove a configuration key from /etc/default/grub.
-        The line is commented out rather than deleted to preserve structure.
+        Its assignments are deleted; every other line is left untouched.
         """
-        import os
-        
+        return self.remove_config_keys([key])
+
+    def remove_config_keys(self, keys: List[str]) -> bool:
+        """Remove several configuration keys from /etc/default/grub in one write."""
         try:
-            lines = []
-            if self.config_path.exists():
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-            
-            updated_lines = []
-            found = False
-            for line in lines:
-                line_stripped = line.strip()
-                if line_stripped and not line_stripped.startswith('#') and '=' in line_stripped:
-                    line_key = line_stripped.split('=')[0].strip()
-                    if line_key == key:
-                        # Delete the line by not adding it to result
-                        found = True
-                        continue
-                updated_lines.append(line)
+            document = self._edit_document()
+            removed = [key for key in keys if document.unset(key)]
+            if not removed:
+                return True  # Keys already don't exist
             
-            if not found:
-                return True  # Key already doesn't exist
-            
-            is_root = os.geteuid() == 0
-            if is_root:
-                with open(self.config_path, 'w', encoding='utf-8') as f:
-                    f.writelines(updated_lines)
-                log_info(_("Removed key {key} from config").format(key=key))
-                return True
-            else:
-                import tempfile
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.grub') as tmp:
-                    tmp.writelines(updated_lines)
-                    tmp_path = tmp.name
-                cmd = ['pkexec', 'cp', tmp_path, str(self.config_path)]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                os.unlink(tmp_path)
-                if result.returncode == 0:
+            transaction = self.transaction()
+            transaction.write(self.config_path, document.serialize())
+            if transaction.commit():
+                self._store_document(document)
+                for key in removed:
                     log_info(_("Removed key {key} from config").format(key=key))
-                    return True
-                return False
+                return True
+            return False
                 
         except Exception as e:
             log_error(_("Error removing config key: {err}").format(err=e))
             return False
 
-    def set_theme_scripts_active(self, active: bool) -> bool:
+    def set_theme_scripts_active(self, active: bool,
+                                 transaction: Optional[GrubTransaction] = None) -> bool:
         """
         Enable/Disable the GRUB theme scripts (05_debian_theme and 05_soplos_theme).
         This prevents conflicts with our custom settings and stops
         the scripts from injecting unwanted background images.
+        
+        Args:
+            active: Whether the scripts should be executable
+            transaction: Add the changes to this transaction instead of
+                applying them immediately
         """
         paths = [
             "/etc/grub.d/05_debian_theme",
             "/etc/grub.d/05_soplos_theme",
         ]
         
-        is_root = os.geteuid() == 0
-        mode = '+x' if active else '-x'
-        success = True
+        own_transaction = transaction is None
+        if own_transaction:
+            transaction = self.transaction()
         
         for path in paths:
-            if not os.path.exists(path):
-                continue
-            try:
-                if is_root:
-                    subprocess.run(['chmod', mode, path], check=True)
-                else:
-                    subprocess.run(['pkexec', 'chmod', mode, path], check=True)
-                log_info(_("Set {script} active={active}").format(script=os.path.basename(path), active=active))
-            except Exception as e:
-                log_error(_("Failed to change {script} permissions: {err}").format(script=os.path.basename(path), err=e))
-                success = False
+            transaction.set_executable(path, active)
         
         # When disabling, also clean up any cached background images
         if not active:
-            self._cleanup_background_cache()
+            self._cleanup_background_cache(transaction)
         
-        return success
+        if own_transaction:
+            return transaction.commit()
+        return True
 
     # Keep backward compatibility
     def set_debian_theme_active(self, active: bool) -> bool:
         """Backward compatibility wrapper."""
         return self.set_theme_scripts_active(active)
 
-    def _cleanup_background_cache(self):
+    def _cleanup_background_cache(self, transaction: GrubTransaction):
         """
         Remove .background_cache files from /boot/grub/.
         These are created by 05_debian_theme/05_soplos_theme and can cause
@@ -293,25 +250,28 @@ class GrubManager:
             "/boot/grub/.background_cache.jpg",
         ]
         
-        is_root = os.geteuid() == 0
-        
         for cache_file in cache_files:
-            if os.path.exists(cache_file):
-                try:
-                    if is_root:
-                        os.remove(cache_file)
-                    else:
-                        subprocess.run(['pkexec', 'rm', '-f', cache_file],
-                                      capture_output=True, text=True)
-                    log_info(_("Removed background cache: {path}").format(path=cache_file))
-                except Exception as e:
-                    log_warning(_("Failed to remove cache {path}: {err}").format(path=cache_file, err=e))
+            transaction.delete(cache_file)
+
+    def transaction(self) -> GrubTransaction:
+        """
+        Start collecting changes to apply all-or-nothing, e.g.
+        
+            transaction = grub_manager.transaction()
+            transaction.write('/boot/grub/custom.cfg', content)
+            transaction.set_executable('/etc/grub.d/05_debian_theme', False)
+            transaction.commit()
+        """
+        return GrubTransaction(self.run_privileged)
 
     def save_custom_ui_settings(self, bg_path: str, color_normal: str, color_highlight: str) -> bool:
         """
         Save custom appearance settings to /boot/grub/custom.cfg
         and clean up conflicting settings in /etc/default/grub.
+        All files are updated together or not at all.
         """
+        transaction = self.transaction()
+        
         # 1. Disable conflicting theme in /etc/default/grub
         # Fix: Save BACKGROUND here so 05_soplos_theme can see it.
         clean_config = {
@@ -320,8 +280,8 @@ class GrubManager:
             'GRUB_COLOR_NORMAL': '',      # Remove from here (managed in custom.cfg)
             'GRUB_COLOR_HIGHLIGHT': '',   # Remove from here (managed in custom.cfg)
         }
-        if not self.save_config(clean_config):
-            return False
+        document = self._apply_to_document(clean_config)
+        transaction.write(self.config_path, document.serialize())
             
         # 2. Write to custom.cfg
         # Fix: Only write colors here. Background is now in default/grub.
@@ -339,19 +299,24 @@ class GrubManager:
             
         content.append("")
         
-        if not self._write_custom_cfg("\n".join(content)):
-            return False
+        transaction.write(self.CUSTOM_CFG_PATH, "\n".join(content))
             
         # 3. Disable theme scripts to prevent override and clean cache
-        self.set_theme_scripts_active(False)
+        self.set_theme_scripts_active(False, transaction)
         
+        if not transaction.commit():
+            return False
+        self._store_document(document)
         return True
 
     def apply_theme_settings(self, theme_path: str) -> bool:
         """
         Apply a full GRUB theme.
         Sets variable in /etc/default/grub and clears custom.cfg.
+        All files are updated together or not at all.
         """
+        transaction = self.transaction()
+        
         # 1. Set theme in /etc/default/grub and clear standalone colors
         new_config = {
             'GRUB_THEME': theme_path,
@@ -360,217 +325,665 @@ class GrubManager:
             'GRUB_COLOR_HIGHLIGHT': '',
             'GRUB_FONT': '',
         }
-        if not self.save_config(new_config):
-            return False
+        document = self._apply_to_document(new_config)
+        transaction.write(self.config_path, document.serialize())
             
         # 2. Clear custom.cfg to prevent conflicts
-        if not self._write_custom_cfg("# Custom settings cleared by Soplos GRUB Editor\n"):
-            return False
+        transaction.write(self.CUSTOM_CFG_PATH, "# Custom settings cleared by Soplos GRUB Editor\n")
             
         # 3. Disable theme scripts to prevent conflicts
-        self.set_theme_scripts_active(False)
+        self.set_theme_scripts_active(False, transaction)
         
+        if not transaction.commit():
+            return False
+        self._store_document(document)
         return True
         
-    def _write_custom_cfg(self, content: str) -> bool:
-        """Write content to /boot/grub/custom.cfg"""
-        cfg_path = "/boot/grub/custom.cfg"
+    def install_font(self, font_path: str, size: int) -> Dict:
+        """
+        Convert a TTF/OTF font to GRUB's PF2 format with grub-mkfont and
+        install it in /boot/grub/fonts.
+        
+        Args:
+            font_path: Font file to convert
+            size: Font size in points
+        
+        Returns:
+            Dictionary with 'ok', 'error' and 'path' (the installed .pf2)
+        """
+        if not os.path.isfile(font_path):
+            return {'ok': False, 'error': _("Font file not found: {path}").format(path=font_path),
+                    'path': None}
+        font_name = os.path.splitext(os.path.basename(font_path))[0]
+        output_path = os.path.join(self.FONTS_DIR, f"{font_name}_{int(size)}.pf2")
+        result = self.run_privileged([{'op': 'mkfont', 'font': os.path.abspath(font_path),
+                                       'size': int(size), 'output': output_path}])
+        if result['ok']:
+            log_info(_("Font converted and installed: {}").format(output_path))
+        else:
+            log_error(_("Failed to convert font: {}").format(result['error']))
+        return {'ok': result['ok'], 'error': result['error'], 'path': output_path}
+
+    def get_installed_fonts(self) -> List[str]:
+        """Return the names of the .pf2 fonts in /boot/grub/fonts."""
         try:
-            is_root = os.geteuid() == 0
-            if is_root:
-                with open(cfg_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                return True
-            else:
-                import tempfile
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.cfg') as tmp:
-                    tmp.write(content)
-                    tmp_path = tmp.name
-                
-                # Use tee to write (handles permissions better than cp sometimes for existing root files)
-                # or just cp. custom.cfg might not exist.
-                # 'cp' is safer to ensure ownership/creation if missing.
-                result = subprocess.run(['pkexec', 'cp', tmp_path, cfg_path], 
-                                      capture_output=True, text=True)
-                os.unlink(tmp_path)
-                
-                if result.returncode == 0:
-                    return True
-                else:
-                    log_error(_("Failed to write custom.cfg: {err}").format(err=result.stderr))
-                    return False
-        except Exception as e:
-            log_error(_("Error writing custom.cfg: {err}").format(err=e))
-            return False
+            return sorted(f for f in os.listdir(self.FONTS_DIR) if f.endswith('.pf2'))
+        except OSError:
+            return []
 
-    def update_grub(self) -> bool:
+    def run_privileged(self, ops: List[Dict], on_line: Optional[Callable[[str], None]] = None) -> Dict:
+        """
+        Run a batch of privileged operations (write_file, chmod, unlink,
+        copy_tree, remove_tree, transaction, mkfont, update_grub) through
+        the helper, which needs a single authorization per session.
+        
+        Returns:
+            {'ok': bool, 'error': message or None, 'results': [...]}
+        """
+        return get_privileged_helper().run(ops, on_line=on_line)
+
+    def _find_update_grub(self) -> Optional[str]:
+        """Return the path of the update-grub executable, if any."""
+        for path in self.UPDATE_GRUB_PATHS:
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _estimate_update_steps(self) -> int:
+        """
+        Estimate how many lines grub-mkconfig will print.
+        Used to turn streamed output into a progress fraction.
+        """
+        # "Generating grub configuration file ..." and "done"
+        steps = 2
+        # One "Found linux image" / "Found initrd image" line per file
+        steps += len(glob.glob('/boot/vmlinuz-*'))
+        steps += len(glob.glob('/boot/initrd.img-*'))
+        # os-prober prints at least a notice, plus one line per detected OS
+        if self.config.get('GRUB_DISABLE_OS_PROBER', 'false').lower() != 'true':
+            steps += 2
+        return steps
+
+    def update_grub(self, progress: Optional[ProgressCallback] = None,
+                    cancellable: Optional[threading.Event] = None,
+                    rescan_os: bool = False) -> bool:
         """
         Run update-grub to apply changes.
         Uses full path and detects if running as root.
-        """
-        import os
         
+        Args:
+            progress: Optional callback receiving every output line and an
+                estimated completion fraction. Called from the running thread.
+            cancellable: Optional event; when set, the run is aborted
+                (see cancel_update()).
+            rescan_os: Discard cached os-prober results and probe all
+                partitions again
+        
+        Returns:
+            True if grub.cfg was regenerated successfully
+        """
         # Check if running as root
         is_root = os.geteuid() == 0
         
-        # Find update-grub path
-        update_grub_paths = ['/usr/sbin/update-grub', '/sbin/update-grub', 'update-grub']
-        update_grub_cmd = None
-        for path in update_grub_paths:
-            if os.path.exists(path):
-                update_grub_cmd = path
-                break
-        
+        update_grub_cmd = self._find_update_grub()
         if not update_grub_cmd:
             log_error(_("update-grub not found"))
             return False
         
+        if rescan_os:
+            self.os_prober_cache.invalidate()
+        
+        if is_root and self.INCREMENTAL_UPDATES:
+            result = self._update_incrementally(progress, cancellable, rescan_os)
+            if result is not None:
+                return result
+        
+        if is_root and self._use_builtin_engine():
+            result = self._update_with_engine(progress, cancellable)
+            if result is not None:
+                return result
+        
+        expected_steps = self._estimate_update_steps()
+        if not is_root:
+            return self._update_with_helper(progress, cancellable, expected_steps, rescan_os)
+        
+        cmd = [update_grub_cmd]
+        try:
+            # Own session so the whole process group (grub-mkconfig and the
+            # /etc/grub.d scripts it spawns) can be signalled on cancel.
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                       text=True, start_new_session=True)
+        except Exception as e:
+            log_error(_("Error running update-grub: {err}").format(err=e))
+            return False
+        
+        with self._update_lock:
+            self._update_process = process
+        if cancellable is not None and cancellable.is_set():
+            self.cancel_update()
+        
+        output = []
         try:
-            if is_root:
-                cmd = [update_grub_cmd]
-            else:
-                cmd = ['pkexec', update_grub_cmd]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                log_info(_("Successfully updated GRUB"))
-                return True
-            else:
-                log_error(_("Failed to update GRUB: {err}").format(err=result.stderr))
-                return False
+            for line in process.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                output.append(line)
+                if progress:
+                    progress(line, min(len(output) / expected_steps, 0.95))
+            returncode = process.wait()
         except Exception as e:
             log_error(_("Error running update-grub: {err}").format(err=e))
-            return False        
-    
-    @property
-    def config(self) -> Dict[str, str]:
-        """Return current config, loading if needed."""
-        if not self.config_data:
-            self.read_config()
-        return self.config_data
-    
-    def silent_update_grub(self) -> bool:
+            returncode = process.wait()
+        finally:
+            with self._update_lock:
+                self._update_process = None
+        
+        if returncode == 0:
+            self._on_grub_cfg_generated()
+            self._seed_os_prober_cache()
+            if progress:
+                progress(_("done"), 1.0)
+            log_info(_("Successfully updated GRUB"))
+            return True
+        
+        if cancellable is not None and cancellable.is_set():
+            self._discard_partial_grub_cfg()
+            log_warning(_("update-grub was cancelled"))
+            return False
+        
+        log_error(_("Failed to update GRUB: {err}").format(err="\n".join(output[-5:])))
+        return False
+
+    def _update_with_helper(self, progress: Optional[ProgressCallback],
+                            cancellable: Optional[threading.Event],
+                            expected_steps: int, rescan_os: bool = False) -> bool:
         """
-        Run update-grub silently.
-        Does not use pkexec if already root, otherwise attempts pkexec.
+        Regenerate grub.cfg through the privileged helper, streaming its
+        output. The helper runs update_grub() as root, so incremental
+        regeneration and the os-prober cache apply there too.
         """
-        import os
-        is_root = os.geteuid() == 0
+        lines = []
         
-        update_grub_paths = ['/usr/sbin/update-grub', '/sbin/update-grub', 'update-grub']
-        update_grub_cmd = None
-        for path in update_grub_paths:
-            if os.path.exists(path):
-                update_grub_cmd = path
-                break
+        def on_line(line):
+            line = line.strip()
+            lines.append(line)
+            if progress:
+                progress(line, min(len(lines) / expected_steps, 0.95))
         
-        if not update_grub_cmd:
-            return False
-            
+        with self._update_lock:
+            self._helper_update = True
         try:
-            cmd = [update_grub_cmd] if is_root else ['pkexec', update_grub_cmd]
-            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if cancellable is not None and cancellable.is_set():
+                return False
+            result = self.run_privileged([{'op': 'update_grub', 'rescan_os': rescan_os}],
+                                         on_line=on_line)
+        finally:
+            with self._update_lock:
+                self._helper_update = False
+        
+        if result['ok']:
+            self._on_grub_cfg_generated()
+            if progress:
+                progress(_("done"), 1.0)
+            log_info(_("Successfully updated GRUB"))
             return True
-        except Exception:
+        if cancellable is not None and cancellable.is_set():
+            log_warning(_("update-grub was cancelled"))
             return False
+        log_error(_("Failed to update GRUB: {err}").format(err=result['error']))
+        return False
 
-    def get_menu_entries(self) -> List[Dict]:
+    def _update_incrementally(self, progress: Optional[ProgressCallback],
+                              cancellable: Optional[threading.Event],
+                              rescan_os: bool = False) -> Optional[bool]:
         """
-        Parse grub.cfg to get menu entries, including submenus.
-        Returns a flat list of entries with hierarchical names (e.g. "Submenu > Entry")
+        Regenerate only the grub.cfg sections whose inputs changed since
+        the last generation, e.g. just 00_header after a timeout change.
         
         Returns:
-            List of dictionaries with entry information
+            The result, or None when equivalence with a full run cannot be
+            established (or nothing tracked changed) and a full
+            regeneration must run instead
         """
-        # Return cached entries if available
-        if hasattr(self, '_cached_entries') and self._cached_entries:
-            return self._cached_entries
-            
-        entries = []
-        grub_cfg = Path("/boot/grub/grub.cfg")
+        changes = self.generation_state.changed_inputs()
+        if changes is None:
+            return None
+        stamp, changed_paths = changes
+        scripts = list_generator_scripts()
+        plan = plan_incremental(changed_paths, stamp['config'], self.config, scripts)
+        if plan is None:
+            return None
+        prober = self._os_prober_script()
+        if rescan_os:
+            plan |= {prober} if prober else set()
+        elif prober in plan and stamp.get('os_prober') == self._os_prober_key():
+            # Disks and os-prober settings unchanged: keep the section
+            # of the last generation instead of probing again
+            plan.discard(prober)
+        
+        def regenerate(generator):
+            log_info(_("Regenerating grub.cfg sections: {scripts}").format(
+                scripts=', '.join(sorted(os.path.basename(p) for p in plan))))
+            generator.regenerate_sections(plan, progress)
+        
+        return self._run_generator(regenerate, progress, cancellable)
+
+    def _generation_engine(self) -> str:
+        """Return the configured engine for full regenerations."""
+        return os.environ.get('SOPLOS_GRUB_ENGINE', self.GENERATION_ENGINE).strip().lower()
+
+    def _use_builtin_engine(self) -> bool:
+        """
+        Whether full regenerations should use GrubGenerator instead of
+        update-grub: when the parallel engine is configured, or when
+        os-prober results are cached for the current disks (update-grub
+        would probe every partition again).
+        """
+        return self._generation_engine() == 'parallel' or self._os_prober_cached()
+
+    def _os_prober_script(self) -> Optional[str]:
+        """Return the 30_os-prober generator script, if installed."""
+        for script in list_generator_scripts():
+            if os.path.basename(script) == OS_PROBER_SCRIPT:
+                return script
+        return None
+
+    def _os_prober_key(self) -> Optional[str]:
+        """Return the os-prober cache key of the current disks and settings."""
+        script = self._os_prober_script()
+        return cache_key(self.config, script) if script else None
+
+    def _os_prober_cached(self) -> bool:
+        """Whether 30_os-prober would probe and its output is cached."""
+        disabled = self.config.get('GRUB_DISABLE_OS_PROBER',
+                                   OS_PROBER_SETTINGS['GRUB_DISABLE_OS_PROBER'])
+        if disabled.lower() == 'true':
+            return False
+        key = self._os_prober_key()
+        return key is not None and self.os_prober_cache.lookup(key) is not None
+
+    def _update_with_engine(self, progress: Optional[ProgressCallback],
+                            cancellable: Optional[threading.Event]) -> Optional[bool]:
+        """
+        Regenerate the whole grub.cfg with GrubGenerator.
         
-        content = ""
-        # Try reading directly first
+        Returns:
+            The result, or None if update-grub must run instead
+        """
+        parallel = self._generation_engine() == 'parallel'
+        log_info(_("Regenerating grub.cfg with the built-in engine (parallel={parallel})").format(
+            parallel=parallel))
+        return self._run_generator(lambda generator: generator.generate(progress, parallel=parallel),
+                                   progress, cancellable)
+
+    def _run_generator(self, work: Callable[[GrubGenerator], None],
+                       progress: Optional[ProgressCallback],
+                       cancellable: Optional[threading.Event]) -> Optional[bool]:
+        """
+        Run work(generator) as the active, cancellable update.
+        
+        Returns:
+            True on success, False if cancelled, None if the generator
+            failed and update-grub should run instead
+        """
+        generator = GrubGenerator(self.GRUB_CFG_PATH, os_prober_cache=self.os_prober_cache,
+                                  source=unfiltered_grub_cfg(self.GRUB_CFG_PATH))
+        with self._update_lock:
+            self._active_generator = generator
+        if cancellable is not None and cancellable.is_set():
+            generator.cancel()
         try:
-            with open(grub_cfg, 'r', encoding='utf-8', errors='ignore') as f:
+            work(generator)
+        except GenerationError as e:
+            if cancellable is not None and cancellable.is_set():
+                log_warning(_("update-grub was cancelled"))
+                return False
+            log_warning(_("Generation engine failed, running update-grub: {err}").format(err=e))
+            return None
+        finally:
+            with self._update_lock:
+                self._active_generator = None
+        
+        self._on_grub_cfg_generated()
+        if progress:
+            progress(_("done"), 1.0)
+        log_info(_("Successfully updated GRUB"))
+        return True
+
+    def _seed_os_prober_cache(self):
+        """Remember the os-prober section of a grub.cfg written by update-grub."""
+        script = self._os_prober_script()
+        if not script:
+            return
+        try:
+            with open(unfiltered_grub_cfg(self.GRUB_CFG_PATH), 'r', encoding='utf-8',
+                      errors='surrogateescape') as f:
                 content = f.read()
+        except OSError:
+            return
+        self.os_prober_cache.seed(content, self.config, script)
+
+    def _on_grub_cfg_generated(self):
+        """Bookkeeping after grub.cfg has been regenerated successfully."""
+        self._stat_cache.invalidate(self.GRUB_CFG_PATH)
+        if os.geteuid() == 0:
+            # Last stage of the pipeline (the helper runs it itself after
+            # update_grub): remove hidden entries, write the menu index
+            try:
+                filter_menu(regenerated=True, grub_cfg=self.GRUB_CFG_PATH)
+            except OSError as e:
+                log_warning(_("Failed to filter hidden menu entries: {}").format(e))
+        self.generation_state.record(config=dict(self.config), os_prober=self._os_prober_key())
+
+    def is_grub_cfg_stale(self) -> bool:
+        """
+        Check whether grub.cfg is out of date with /etc/default/grub,
+        /etc/grub.d, custom.cfg and the installed kernels.
+        """
+        try:
+            return self.generation_state.is_stale()
+        except Exception as e:
+            log_warning(_("Could not check whether grub.cfg is up to date: {err}").format(err=e))
+            return True
+
+    def cancel_update(self) -> bool:
+        """
+        Abort a running update_grub().
+        grub-mkconfig writes to grub.cfg.new and only renames it over
+        grub.cfg once every script succeeded, so killing the run leaves
+        the previous grub.cfg in place.
+        
+        Returns:
+            True if a running update was signalled
+        """
+        with self._update_lock:
+            process = self._update_process
+            generator = self._active_generator
+            helper_update = self._helper_update
+        if helper_update:
+            log_info(_("Cancelling update-grub..."))
+            return get_privileged_helper().cancel()
+        if generator is not None:
+            generator.cancel()
+            log_info(_("Cancelling update-grub..."))
+            return True
+        if process is None or process.poll() is not None:
+            return False
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            log_info(_("Cancelling update-grub..."))
+            return True
+        except ProcessLookupError:
+            return False
         except PermissionError:
+            log_warning(_("Cannot cancel update-grub running with elevated privileges"))
+            return False
+
+    def _discard_partial_grub_cfg(self):
+        """Remove the temporary file left behind by an interrupted grub-mkconfig."""
+        partial = self.GRUB_CFG_PATH + '.new'
+        if os.geteuid() == 0 and os.path.exists(partial):
             try:
-                result = subprocess.run(['pkexec', 'cat', str(grub_cfg)], 
-                                        capture_output=True, text=True)
-                if result.returncode == 0:
-                    content = result.stdout
-            except Exception:
-                pass
-        except FileNotFoundError:
-            return entries
-            
-        if not content:
-            return entries
-            
+                os.remove(partial)
+            except OSError as e:
+                log_warning(_("Failed to remove {path}: {err}").format(path=partial, err=e))
+    
+    @property
+    def config(self) -> Dict[str, str]:
+        """
+        Return the current config, re-read only when /etc/default/grub
+        changed on disk.
+        """
+        document = self._stat_cache.get(str(self.config_path), self._load_document)
+        if document is not self._document:
+            self._set_document(document)
+        return self.config_data
+    
+    @property
+    def custom_settings(self) -> Dict[str, str]:
+        """
+        Return the variables set in /boot/grub/custom.cfg
+        (e.g. color_normal), re-read only when the file changed.
+        """
+        return self._stat_cache.get(self.CUSTOM_CFG_PATH, self._load_custom_settings)
+    
+    def _load_custom_settings(self) -> Dict[str, str]:
+        """Parse the 'set name=value' lines of custom.cfg."""
+        settings = {}
         try:
-            import re
-            lines = content.splitlines()
-            entries = []
-            stack = []
-            brace_depth = 0
-            
-            for line in lines:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                
-                # Check for submenu
-                m_sub = re.search(r"submenu\s+['\"]([^'\"]+)['\"]", line)
-                if m_sub and '{' in line:
-                    stack.append(m_sub.group(1))
-                    brace_depth += 1
-                    continue
-                
-                # Check for menuentry
-                m_ent = re.search(r"menuentry\s+['\"]([^'\"]+)['\"]", line)
-                if m_ent and '{' in line:
-                    entry_title = m_ent.group(1)
-                    # Hierarchical name for GRUB_DEFAULT
-                    full_name = ">".join(stack + [entry_title])
-                    
-                    entry_type = _('system')
-                    if 'recovery' in entry_title.lower():
-                        entry_type = _('recovery')
-                    elif 'memtest' in entry_title.lower():
-                        entry_type = _('memtest')
-                    elif 'uefi' in entry_title.lower() or 'firmware' in entry_title.lower():
-                        entry_type = _('firmware')
-                        
-                    entries.append({
-                        'name': full_name,
-                        'display_name': entry_title,
-                        'type': entry_type,
-                        'enabled': True
-                    })
-                    brace_depth += 1
-                    continue
-                
-                # Tracking braces to maintain stack
-                if '{' in line:
-                    brace_depth += line.count('{')
-                
-                if '}' in line:
-                    closed_count = line.count('}')
-                    for i_b in range(closed_count):
-                        # If a submenu level is being closed
-                        if len(stack) > 0 and brace_depth == len(stack):
-                            stack.pop()
-                        if brace_depth > 0:
-                            brace_depth -= 1
+            with open(self.CUSTOM_CFG_PATH, 'r', encoding='utf-8', errors='ignore') as f:
+                for line in f:
+                    match = CUSTOM_SET_RE.match(line)
+                    if match:
+                        settings[match.group(1)] = match.group(2).strip().strip('"').strip("'")
+        except OSError:
+            pass
+        return settings
+    
+    def silent_update_grub(self) -> bool:
+        """
+        Regenerate grub.cfg without reporting progress.
+        Runs it directly if already root, otherwise through the privileged helper.
+        """
+        return self.update_grub()
 
-        except Exception as e:
+    def get_menu_entries(self) -> List[MenuEntry]:
+        """
+        Parse grub.cfg to get menu entries, including submenus.
+        Returns a flat list of entries with hierarchical names (e.g. "Submenu>Entry")
+        
+        Returns:
+            List of MenuEntry records
+        """
+        return self._stat_cache.get(self.GRUB_CFG_PATH, self._parse_menu_entries)
+    
+    def _parse_menu_entries(self) -> List[MenuEntry]:
+        """
+        Parse the menu entries of grub.cfg (see get_menu_entries()).
+        
+        The saved index is reused without reading grub.cfg while its size
+        and mtime match, and without parsing it while its content hash
+        matches (e.g. update-grub rewrote identical content). Entries
+        hidden from grub.cfg are read from the unfiltered copy and marked
+        disabled.
+        """
+        try:
+            st = os.stat(self.GRUB_CFG_PATH)
+        except FileNotFoundError:
+            return []
+        except OSError as e:
             log_error(_("Error parsing grub.cfg: {}").format(e))
-            
-        # Cache the results
-        self._cached_entries = entries
+            return []
+        
+        signature = [st.st_size, st.st_mtime_ns]
+        index = self._load_menu_index(signature)
+        if index is not None and index['grub_cfg'][:2] == signature:
+            return self._mark_hidden(index['entries'])
+        
+        try:
+            source = unfiltered_grub_cfg(self.GRUB_CFG_PATH)
+            with open(source, 'rb') as f:
+                data = f.read()
+        except PermissionError:
+            # Running unprivileged: never ask for elevation just to read the
+            # menu, use the public index written at generation time (or
+            # the one saved by this user's last read) instead.
+            index = self._load_menu_index(signature, public=True)
+            if index is None:
+                log_warning(_("grub.cfg is not readable and no menu index is available"))
+                return []
+            if index['grub_cfg'][:2] != signature:
+                log_warning(_("Menu index may be out of date with {path}").format(path=self.GRUB_CFG_PATH))
+            return index['entries']
+        except OSError as e:
+            log_error(_("Error parsing grub.cfg: {}").format(e))
+            return []
+        
+        digest = hashlib.sha256(data).hexdigest()
+        if index is not None and index['grub_cfg'][2] == digest:
+            entries = index['entries']
+        else:
+            entries = parse_grub_cfg(self.GRUB_CFG_PATH, data.decode('utf-8', errors='replace'))
+        self._mark_hidden(entries)
+        self._save_menu_index([st.st_size, st.st_mtime_ns, digest], entries)
+        return entries
+
+    def _mark_hidden(self, entries: List[MenuEntry]) -> List[MenuEntry]:
+        """Set the enabled flag of entries read from grub.cfg or its unfiltered copy."""
+        if not os.access(self.GRUB_CFG_PATH, os.R_OK):
+            # Keep the flags of the index written with privileges
+            return entries
+        hidden = set(load_menu_filter()['hidden'])
+        filtered = unfiltered_grub_cfg(self.GRUB_CFG_PATH) != self.GRUB_CFG_PATH
+        for entry in entries:
+            # Hidden entries still in grub.cfg (regenerated by another tool)
+            # are shown until the filter runs again
+            entry.enabled = not (filtered and is_hidden(entry, hidden))
         return entries
+
+    def set_entry_enabled(self, entry: MenuEntry, enabled: bool) -> bool:
+        """
+        Show or hide a menu entry. The existing grub.cfg is filtered right
+        away; regenerations keep hiding the entry.
+        
+        Args:
+            entry: Entry from get_menu_entries()
+            enabled: False to hide it from the boot menu
+        
+        Returns:
+            True if grub.cfg was updated
+        """
+        hidden = set(load_menu_filter()['hidden'])
+        hidden.discard(entry.name)
+        if entry.id:
+            hidden.discard(entry.id)
+        if not enabled:
+            # Ids survive title changes (e.g. a translated menu)
+            hidden.add(entry.id or entry.name)
+        previous = output_signature(self.GRUB_CFG_PATH)
+        result = self.run_privileged([{'op': 'filter_menu', 'hidden': sorted(hidden)}])
+        self._stat_cache.invalidate(self.GRUB_CFG_PATH)
+        if not result['ok']:
+            log_error(_("Error updating hidden entries: {}").format(result['error']))
+            return False
+        # Still the generated grub.cfg, minus hidden entries: later
+        # updates can remain incremental
+        self.generation_state.refresh_output(previous)
+        log_info(_("Entry '{name}' {state}").format(
+            name=entry.name, state=_("enabled") if enabled else _("disabled")))
+        return True
+
+    def predict_kernel_entries(self, kernels: Optional[List[Kernel]] = None) -> List[MenuEntry]:
+        """
+        Predict the 10_linux menu entries for the installed kernels,
+        without running grub-mkconfig.
+        
+        Args:
+            kernels: Installed kernels, scanned if not given
+        """
+        config = self.config
+        distributor = config.get('GRUB_DISTRIBUTOR', '')
+        assignment = self.config_provenance.get('GRUB_DISTRIBUTOR')
+        if assignment is not None and not assignment.exact:
+            # Usually a command substitution reading /etc/os-release
+            distributor = default_distributor()
+        if kernels is None:
+            kernels = scan_kernels()
+        return predict_entries(kernels, config, distributor, self.get_menu_entries())
+
+    def get_predicted_menu_entries(self) -> List[MenuEntry]:
+        """
+        Menu entries of grub.cfg with the installed kernels' entries taken
+        from the prediction, i.e. the menu the next regeneration produces.
+        """
+        predicted = self.predict_kernel_entries()
+        # The regeneration removes hidden entries again
+        hidden = set(load_menu_filter()['hidden'])
+        for entry in predicted:
+            entry.enabled = not is_hidden(entry, hidden)
+        return merge_entries(self.get_menu_entries(), predicted)
+
+    def get_menu_drift(self) -> Dict[str, List[str]]:
+        """
+        Compare grub.cfg with the installed kernels.
+        
+        Returns:
+            Dictionary with 'missing' (kernel entries grub.cfg lacks),
+            'stale' (grub.cfg entries for removed kernels) and 'incomplete'
+            (kernel versions without an initrd or /lib/modules tree)
+        """
+        kernels = scan_kernels()
+        drift = compare_entries(self.predict_kernel_entries(kernels), self.get_menu_entries())
+        drift['incomplete'] = [kernel.version for kernel in kernels
+                               if not kernel.initrd or not kernel.modules]
+        if drift['missing'] or drift['stale']:
+            log_warning(_("grub.cfg does not match the installed kernels ({missing} missing, {stale} stale)")
+                        .format(missing=len(drift['missing']), stale=len(drift['stale'])))
+        for version in drift['incomplete']:
+            log_warning(_("Kernel {version} has no initrd or modules").format(version=version))
+        return drift
+
+    def _menu_index_paths(self, public: bool = False) -> List[Path]:
+        """
+        Locations of the saved menu index, most specific first.
+        
+        The index saved by _save_menu_index() holds complete entries
+        (kernel paths and arguments) and is private to the user that
+        saved it: an unprivileged process never reads root's copy.
+        
+        Args:
+            public: Include the index written next to grub.cfg at
+                generation time, which has no kernel paths or arguments
+        """
+        paths = [get_cache_dir() / MENU_INDEX_NAME]
+        if public:
+            paths.append(Path(menu_index_path(self.GRUB_CFG_PATH)))
+        return paths
+
+    def _save_menu_index(self, grub_cfg: list, entries: List[MenuEntry]):
+        """
+        Save parsed menu entries for the next start. Readable only by the
+        current user: entries include kernel command lines.
+        
+        Args:
+            grub_cfg: [size, mtime_ns, sha256] of the parsed grub.cfg
+            entries: Its menu entries
+        """
+        save_json(self._menu_index_paths()[0], build_menu_index(grub_cfg, entries), 0o600)
+
+    def _load_menu_index(self, signature: Optional[list] = None,
+                         public: bool = False) -> Optional[Dict]:
+        """
+        Load a saved menu index, preferring one matching signature.
+        
+        Args:
+            signature: [size, mtime_ns] of the current grub.cfg
+            public: Also consider the generation-time index
+        
+        Returns:
+            Dictionary with 'grub_cfg' ([size, mtime_ns, sha256]) and
+            'entries' (MenuEntry list), or None
+        """
+        found = None
+        for path in self._menu_index_paths(public):
+            index = load_json(path)
+            if (not isinstance(index, dict) or index.get('version') != MENU_INDEX_VERSION
+                    or not isinstance(index.get('grub_cfg'), list) or len(index['grub_cfg']) != 3
+                    or not isinstance(index.get('entries'), list)):
+                continue
+            if found is None or index['grub_cfg'][:2] == signature:
+                found = index
+            if index['grub_cfg'][:2] == signature:
+                break
+        if found is None:
+            return None
+        return {
+            'grub_cfg': found['grub_cfg'],
+            'entries': [MenuEntry.from_dict(entry) for entry in found['entries']
+                        if isinstance(entry, dict)],
+        }
     
     def get_available_themes(self) -> List[str]:
         """
@@ -580,7 +993,7 @@ class GrubManager:
             List of theme names
         """
         themes = []
-        themes_dir = Path("/boot/grub/themes")
+        themes_dir = Path(self.THEMES_DIR)
         
         if themes_dir.exists():
             for item in themes_dir.iterdir():
@@ -1,6 +1,10 @@
 """
 Internationalization (i18n) manager for Soplos Repo Selector.
 Handles GNU Gettext translation loading, language detection, and string management.
+
+Catalogs are loaded on demand (the active language and the English
+fallback at most) and read through mmap by MoCatalog, and resolved strings
+are memoized per language.
 """
 
 import os
@@ -9,6 +13,8 @@ import gettext
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
+from core.mo_catalog import MoCatalog
+
 
 class I18nManager:
     """
@@ -42,38 +48,36 @@ class I18nManager:
         self.locale_dir = Path(locale_dir)
         self.domain = domain
         self.current_language = None
-        self.translations = {}
-        self.fallback_translation = None
-        
-        # Ensure locale directory exists
-        self.locale_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Initialize translations
-        self._load_translations()
+        # Loaded catalogs: language code -> translation, None if missing
+        self.translations: Dict[str, Optional[gettext.NullTranslations]] = {}
+        # Resolved strings of the current language: message -> translation
+        self._memo: Dict[str, str] = {}
         
         # Detect and set system language
         detected_lang = self.detect_system_language()
         self.set_language(detected_lang)
     
-    def _load_translations(self):
-        """Load all available translations."""
-        for lang_code in self.SUPPORTED_LANGUAGES.keys():
-            mo_file = self.locale_dir / lang_code / 'LC_MESSAGES' / f'{self.domain}.mo'
-            
-            if mo_file.exists():
-                try:
-                    with open(mo_file, 'rb') as f:
-                        translation = gettext.GNUTranslations(f)
-                        self.translations[lang_code] = translation
-                except Exception as e:
-                    print(f"Error loading translation for {lang_code}: {e}")
-        
-        # Set fallback translation (English)
-        if 'en' in self.translations:
-            self.fallback_translation = self.translations['en']
-        else:
-            # Create a null translation if English is not available
-            self.fallback_translation = gettext.NullTranslations()
+    def _catalog_path(self, lang_code: str) -> Path:
+        return self.locale_dir / lang_code / 'LC_MESSAGES' / f'{self.domain}.mo'
+    
+    def _get_catalog(self, lang_code: str) -> Optional[gettext.NullTranslations]:
+        """Return the catalog of a language, loading it on first use."""
+        if lang_code in self.translations:
+            return self.translations[lang_code]
+        translation = None
+        try:
+            translation = MoCatalog(str(self._catalog_path(lang_code)))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading translation for {lang_code}: {e}")
+        self.translations[lang_code] = translation
+        return translation
+    
+    @property
+    def fallback_translation(self) -> gettext.NullTranslations:
+        """English catalog, or a null translation if it is not available."""
+        return self._get_catalog('en') or gettext.NullTranslations()
     
     def detect_system_language(self) -> str:
         """
@@ -120,40 +124,42 @@ class I18nManager:
             print(f"Unsupported language: {language_code}")
             return False
         
-        if language_code in self.translations:
-            self.current_language = language_code
-            self.translations[language_code].install()
-            print(f"Language set to: {language_code}")
-            return True
-        else:
-            # Try fallback languages
-            for fallback_lang in self.FALLBACK_CHAIN:
-                if fallback_lang in self.translations:
-                    self.current_language = fallback_lang
-                    self.translations[fallback_lang].install()
-                    return True
-            
-            # Use null translation as last resort
-            self.current_language = 'en'
-            self.fallback_translation.install()
-            return False
+        self._memo = {}
+        for lang_code in [language_code] + self.FALLBACK_CHAIN:
+            translation = self._get_catalog(lang_code)
+            if translation is not None:
+                self.current_language = lang_code
+                translation.install()
+                return True
+        
+        # Use null translation as last resort
+        self.current_language = 'en'
+        gettext.NullTranslations().install()
+        return False
     
-    def get_translation(self, message: str, **kwargs) -> str:
-        """Get translated message with optional formatting."""
-        if self.current_language and self.current_language in self.translations:
+    def _resolve(self, message: str) -> str:
+        """Translate message with the current catalog, then the English one."""
+        translated = message
+        current = self.translations.get(self.current_language)
+        if current is not None:
             try:
-                translated = self.translations[self.current_language].gettext(message)
+                translated = current.gettext(message)
             except Exception:
                 translated = message
-        else:
-            translated = message
         
         # If translation failed, try fallback
-        if translated == message and self.fallback_translation:
+        if translated == message and self.current_language != 'en':
             try:
                 translated = self.fallback_translation.gettext(message)
             except Exception:
                 pass
+        return translated
+    
+    def get_translation(self, message: str, **kwargs) -> str:
+        """Get translated message with optional formatting."""
+        translated = self._memo.get(message)
+        if translated is None:
+            translated = self._memo[message] = self._resolve(message)
         
         # Apply formatting if provided
         if kwargs:
@@ -166,16 +172,17 @@ class I18nManager:
     
     def get_plural_translation(self, singular: str, plural: str, count: int, **kwargs) -> str:
         """Get translated message with plural support."""
-        if self.current_language and self.current_language in self.translations:
+        current = self.translations.get(self.current_language)
+        if current is not None:
             try:
-                translated = self.translations[self.current_language].ngettext(singular, plural, count)
+                translated = current.ngettext(singular, plural, count)
             except Exception:
                 translated = singular if count == 1 else plural
         else:
             translated = singular if count == 1 else plural
         
         # If translation failed, try fallback
-        if translated in (singular, plural) and self.fallback_translation:
+        if translated in (singular, plural) and self.current_language != 'en':
             try:
                 translated = self.fallback_translation.ngettext(singular, plural, count)
             except Exception:
@@ -195,7 +202,7 @@ class I18nManager:
         """Get available languages with translations."""
         available = {}
         for lang_code, lang_name in self.SUPPORTED_LANGUAGES.items():
-            if lang_code in self.translations:
+            if self._catalog_path(lang_code).exists():
                 available[lang_code] = lang_name
         return available
     
@@ -229,7 +236,7 @@ def get_i18n_manager(locale_dir: str = None, domain: str = 'soplos-grub-editor')
 
 def _(message: str, **kwargs) -> str:
     """Convenience function for translation."""
-    manager = get_i18n_manager()
+    manager = _i18n_manager or get_i18n_manager()
     return manager.get_translation(message, **kwargs)
 
 def ngettext(singular: str, plural: str, count: int, **kwargs) -> str:
@@ -0,0 +1,243 @@
+"""
+Kernel inventory for Soplos Grub Editor.
+Predicts the menu entries 10_linux generates from the installed kernels
+(/boot/vmlinuz-*, their initrds and /lib/modules), so new kernels can be
+offered before grub.cfg is regenerated and a grub.cfg that no longer
+matches the installed kernels is noticed.
+"""
+
+import os
+import re
+import glob
+from typing import Dict, Iterable, List, Optional
+
+from core.grub_cfg_parser import MenuEntry
+
+# Kernel images 10_linux picks up, relative to /boot
+KERNEL_PATTERNS = ['vmlinuz-*', 'vmlinux-*', 'kernel-*']
+
+# Package manager leftovers skipped by grub_file_is_not_garbage
+GARBAGE_SUFFIXES = ('.dpkg-old', '.dpkg-new', '.dpkg-tmp', '.dpkg-dist', '.dpkg-bak',
+                    '.rpmsave', '.rpmnew', '.sig', '~')
+
+# Initrd names tried by 10_linux, first match wins
+INITRD_NAMES = ['initrd.img-{v}', 'initrd-{v}.img', 'initrd-{v}.gz', 'initrd-{v}',
+                'initramfs-{v}.img', 'initramfs-genkernel-{v}']
+
+# Early microcode images loaded before the initrd
+MICROCODE_NAMES = ['intel-uc.img', 'intel-ucode.img', 'amd-uc.img', 'amd-ucode.img',
+                   'early_ucode.cpio', 'microcode.cpio']
+
+# Entry ids written by 10_linux: gnulinux-simple-<device> and
+# gnulinux-<version>-advanced|recovery-<device>
+SIMPLE_ID_RE = re.compile(r'^gnulinux-simple-(.*)$')
+KERNEL_ID_RE = re.compile(r'^gnulinux-(.+?)-(advanced|recovery)-(.*)$')
+
+# Distributors 10_linux does not suffix with "GNU/Linux"
+PLAIN_DISTRIBUTORS = ('Ubuntu', 'Kubuntu')
+
+
+class Kernel:
+    """An installed kernel image."""
+
+    __slots__ = ('version', 'image', 'initrd', 'modules')
+
+    def __init__(self, version: str, image: str, initrd: List[str], modules: bool):
+        self.version = version
+        self.image = image
+        # Microcode images first, then the initrd proper
+        self.initrd = initrd
+        # Whether /lib/modules/<version> exists
+        self.modules = modules
+
+    def __repr__(self):
+        return f'Kernel({self.version!r})'
+
+
+def version_key(version: str) -> list:
+    """Sort key comparing versions like 'sort -V' (6.1.0-13 after 6.1.0-9)."""
+    return [(0, int(part)) if part.isdigit() else (1, part)
+            for part in re.findall(r'\d+|\D+', version)]
+
+
+def scan_kernels(boot_dir: str = '/boot', modules_dir: str = '/lib/modules') -> List[Kernel]:
+    """
+    List the installed kernels, newest first as 10_linux orders them.
+
+    Args:
+        boot_dir: Directory holding the kernel images and initrds
+        modules_dir: Directory holding one module tree per kernel version
+    """
+    microcode = [os.path.join(boot_dir, name) for name in MICROCODE_NAMES
+                 if os.path.isfile(os.path.join(boot_dir, name))]
+    kernels = {}
+    for pattern in KERNEL_PATTERNS:
+        for image in glob.glob(os.path.join(boot_dir, pattern)):
+            if image.endswith(GARBAGE_SUFFIXES) or not os.path.isfile(image):
+                continue
+            version = os.path.basename(image).split('-', 1)[1]
+            if version in kernels:
+                continue
+            initrd = []
+            for name in INITRD_NAMES:
+                path = os.path.join(boot_dir, name.format(v=version))
+                if os.path.isfile(path):
+                    initrd = microcode + [path]
+                    break
+            kernels[version] = Kernel(version, image, initrd,
+                                      os.path.isdir(os.path.join(modules_dir, version)))
+    return sorted(kernels.values(), key=lambda k: version_key(k.version), reverse=True)
+
+
+def default_distributor(os_release: str = '/etc/os-release') -> str:
+    """
+    GRUB_DISTRIBUTOR as Debian's default (a command substitution) would
+    compute it: the first word of the os-release NAME.
+    """
+    try:
+        with open(os_release, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('NAME='):
+                    name = line[5:].strip().strip('"\'')
+                    if name:
+                        return name.split()[0]
+    except OSError:
+        pass
+    return 'Debian'
+
+
+def linux_entry_key(entry) -> Optional[tuple]:
+    """
+    Return ('simple', None) or (kind, version) for an entry 10_linux
+    generated, recognized by its id, or None for any other entry.
+    """
+    entry_id = entry.get('id') or ''
+    if SIMPLE_ID_RE.match(entry_id):
+        return ('simple', None)
+    match = KERNEL_ID_RE.match(entry_id)
+    if match:
+        return (match.group(2), match.group(1))
+    return None
+
+
+def _naming(distributor: str, current: Iterable) -> Dict:
+    """
+    Title, submenu title and device id for predicted entries.
+
+    Names already present in grub.cfg win over the computed ones, so that
+    titles translated by grub-mkconfig and the boot device id are kept.
+    """
+    if not distributor:
+        os_name = 'GNU/Linux'
+    elif distributor in PLAIN_DISTRIBUTORS:
+        os_name = distributor
+    else:
+        os_name = f'{distributor} GNU/Linux'
+    naming = {
+        'os': os_name,
+        'submenu': f'Advanced options for {os_name}',
+        'device': '',
+        'names': {},
+    }
+    for entry in current:
+        key = linux_entry_key(entry)
+        if key is None:
+            continue
+        naming['names'][key] = entry.get('name')
+        match = SIMPLE_ID_RE.match(entry.get('id')) or KERNEL_ID_RE.match(entry.get('id'))
+        naming['device'] = match.groups()[-1]
+        if key[0] == 'simple':
+            naming['os'] = entry.get('title')
+        elif '>' in entry.get('name', ''):
+            naming['submenu'] = entry.get('name').rsplit('>', 1)[0]
+    return naming
+
+
+def predict_entries(kernels: List[Kernel], config: Dict[str, str], distributor: str,
+                    current: Iterable = ()) -> List[MenuEntry]:
+    """
+    Predict the menu entries 10_linux generates for kernels.
+
+    Args:
+        kernels: Installed kernels, newest first (see scan_kernels())
+        config: /etc/default/grub values
+        distributor: Evaluated GRUB_DISTRIBUTOR
+        current: Entries of the current grub.cfg, to reuse their names
+
+    Returns:
+        MenuEntry records in grub.cfg order (without kernel arguments)
+    """
+    current = list(current)
+    naming = _naming(distributor, current)
+    submenu = config.get('GRUB_DISABLE_SUBMENU', '') not in ('y', 'true')
+    recovery = config.get('GRUB_DISABLE_RECOVERY', '') != 'true'
+
+    classes = ['gnu-linux', 'gnu', 'os']
+    if distributor:
+        classes.insert(0, re.sub(r'[^A-Za-z0-9_]', '_', distributor.lower().split()[0]))
+
+    def make(key, title, entry_id, kernel):
+        nested = submenu and key[0] != 'simple'
+        name = naming['names'].get(key)
+        if name is None or ('>' in name) != nested:
+            name = f"{naming['submenu']}>{title}" if nested else title
+        result = MenuEntry(name.rsplit('>', 1)[-1], name, entry_id, list(classes))
+        result.linux = kernel.image
+        result.initrd = list(kernel.initrd)
+        result.type = key[0] if key[0] == 'recovery' else 'system'
+        return result
+
+    device = naming['device']
+    entries = []
+    for i, kernel in enumerate(kernels):
+        if i == 0 and submenu:
+            entries.append(make(('simple', None), naming['os'], f'gnulinux-simple-{device}', kernel))
+        version = kernel.version
+        entries.append(make(('advanced', version), f"{naming['os']}, with Linux {version}",
+                             f'gnulinux-{version}-advanced-{device}', kernel))
+        if recovery:
+            entries.append(make(('recovery', version),
+                                 f"{naming['os']}, with Linux {version} (recovery mode)",
+                                 f'gnulinux-{version}-recovery-{device}', kernel))
+    return entries
+
+
+def merge_entries(current: List, predicted: List[MenuEntry]) -> List:
+    """
+    Replace the 10_linux entries of current by predicted, keeping every
+    other entry (other systems, firmware, custom entries) in place.
+    """
+    if not predicted:
+        return list(current)
+    merged = []
+    inserted = False
+    for entry in current:
+        if linux_entry_key(entry) is None:
+            merged.append(entry)
+        elif not inserted:
+            merged.extend(predicted)
+            inserted = True
+    if not inserted:
+        merged[0:0] = predicted
+    return merged
+
+
+def compare_entries(predicted: List[MenuEntry], current: Iterable) -> Dict[str, List[str]]:
+    """
+    Compare the predicted 10_linux entries with those of grub.cfg.
+
+    Returns:
+        Dictionary with 'missing' (predicted names absent from grub.cfg)
+        and 'stale' (grub.cfg names for kernels no longer installed);
+        both empty when grub.cfg matches the installed kernels
+    """
+    current_keys = {}
+    for entry in current:
+        key = linux_entry_key(entry)
+        if key is not None:
+            current_keys[key] = entry.get('name')
+    predicted_keys = {linux_entry_key(entry): entry.name for entry in predicted}
+    return {
+        'missing': [name for key, name in predicted_keys.items() if key not in current_keys],
+        'stale': [name for key, name in current_keys.items() if key not in predicted_keys],
+    }
@@ -0,0 +1,210 @@
+"""
+Memory-mapped .mo catalog reader for Soplos Grub Editor.
+Looks messages up directly in the compiled catalog through its hash table
+(or, for catalogs without one, a binary search over the sorted original
+strings) instead of decoding every message into a dictionary like
+gettext.GNUTranslations does. Only the strings actually shown are decoded.
+"""
+
+import mmap
+import struct
+import gettext
+from typing import Optional
+
+# Magic number of a .mo file, as read in each byte order
+LE_MAGIC = 0x950412de
+BE_MAGIC = 0xde120495
+
+HEADER_SIZE = 28
+
+
+def hashpjw(data: bytes) -> int:
+    """
+    Hash of a string as GNU msgfmt computes it for the .mo hash table
+    (hash_string() in gettext's hash-string.c, 32-bit words). The string
+    ends at its first NUL, so a plural entry hashes as its singular.
+    """
+    hval = 0
+    for c in data:
+        if c == 0:
+            break
+        hval = ((hval << 4) + c) & 0xffffffff
+        g = hval & 0xf0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
+
+
+class MoCatalog(gettext.NullTranslations):
+    """
+    A .mo catalog read through mmap.
+
+    Drop-in for gettext.GNUTranslations where I18nManager uses it:
+    gettext(), ngettext(), pgettext(), npgettext(), install() and
+    fallbacks behave the same.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a catalog.
+
+        Raises:
+            OSError: The file cannot be read or is not a .mo catalog
+        """
+        super().__init__()
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file
+                raise OSError(0, 'Bad magic number', path)
+        self._read_header()
+        self._charset = 'utf-8'
+        self.plural = lambda n: int(n != 1)
+        self._parse_metadata()
+
+    def _read_header(self):
+        data = self._data
+        if len(data) < HEADER_SIZE:
+            raise OSError(0, 'Bad magic number', self.path)
+        magic = struct.unpack('<I', data[:4])[0]
+        if magic == LE_MAGIC:
+            self._order = '<'
+        elif magic == BE_MAGIC:
+            self._order = '>'
+        else:
+            raise OSError(0, 'Bad magic number', self.path)
+        (revision, self._count, self._originals, self._translations,
+         self._hash_size, self._hash_offset) = struct.unpack(self._order + '6I', data[4:HEADER_SIZE])
+        if revision >> 16 not in (0, 1):
+            raise OSError(0, 'Bad version number ' + str(revision >> 16), self.path)
+        end = len(data)
+        if (self._originals + 8 * self._count > end
+                or self._translations + 8 * self._count > end
+                or self._hash_offset + 4 * self._hash_size > end):
+            raise OSError(0, 'File is corrupt', self.path)
+        self._pair = struct.Struct(self._order + '2I')
+        self._word = struct.Struct(self._order + 'I')
+        # msgfmt writes a hash table of at least 3 slots, or none
+        if self._hash_size <= 2:
+            self._hash_size = 0
+
+    def _string(self, table: int, index: int) -> bytes:
+        length, offset = self._pair.unpack_from(self._data, table + 8 * index)
+        if offset + length > len(self._data):
+            raise OSError(0, 'File is corrupt', self.path)
+        return self._data[offset:offset + length]
+
+    def _parse_metadata(self):
+        """Read the charset and the plural rule from the header entry ('')."""
+        index = self._find(b'', plural=False)
+        if index is None:
+            return
+        header = self._string(self._translations, index).decode('ascii', 'replace')
+        for line in header.split('\n'):
+            key, sep, value = line.partition(':')
+            if not sep:
+                continue
+            key = key.strip().lower()
+            value = value.strip()
+            self._info[key] = value
+            if key == 'content-type' and 'charset=' in value:
+                self._charset = value.split('charset=', 1)[1].strip() or 'utf-8'
+            elif key == 'plural-forms':
+                # nplurals=N; plural=EXPRESSION;
+                parts = value.split(';')
+                if len(parts) > 1 and 'plural=' in parts[1]:
+                    self.plural = gettext.c2py(parts[1].split('plural=', 1)[1])
+
+    def _matches(self, index: int, key: bytes, plural: bool) -> bool:
+        original = self._string(self._originals, index)
+        if plural:
+            return original.startswith(key + b'\0')
+        return original == key
+
+    def _find(self, key: bytes, plural: bool) -> Optional[int]:
+        """Index of the entry whose original string is key, or None.
+
+        Plural entries ('singular\\0plural') match only when plural is true,
+        keyed by their singular, as in GNUTranslations.
+        """
+        if self._hash_size:
+            size = self._hash_size
+            h = hashpjw(key)
+            idx = h % size
+            incr = 1 + h % (size - 2)
+            for _ in range(size):
+                nstr = self._word.unpack_from(self._data, self._hash_offset + 4 * idx)[0]
+                if nstr == 0:
+                    return None
+                if nstr <= self._count and self._matches(nstr - 1, key, plural):
+                    return nstr - 1
+                idx = idx + incr - size if idx >= size - incr else idx + incr
+            return None
+
+        # Originals are sorted by their singular, as strcmp() orders them
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            singular = self._string(self._originals, mid).split(b'\0', 1)[0]
+            if singular < key:
+                lo = mid + 1
+            elif singular > key:
+                hi = mid
+            else:
+                # A plain and a plural entry may share their singular
+                for index in (mid, mid - 1, mid + 1):
+                    if 0 <= index < self._count and self._matches(index, key, plural):
+                        return index
+                return None
+        return None
+
+    def _lookup(self, message: str, plural: bool) -> Optional[str]:
+        index = self._find(message.encode(self._charset), plural)
+        if index is None:
+            return None
+        return self._string(self._translations, index).decode(self._charset)
+
+    def gettext(self, message: str) -> str:
+        translated = self._lookup(message, plural=False)
+        if translated is not None:
+            return translated
+        if self._fallback:
+            return self._fallback.gettext(message)
+        return message
+
+    def ngettext(self, msgid1: str, msgid2: str, n: int) -> str:
+        translated = self._lookup(msgid1, plural=True)
+        if translated is not None:
+            forms = translated.split('\0')
+            index = self.plural(n)
+            if index < len(forms):
+                return forms[index]
+        if self._fallback:
+            return self._fallback.ngettext(msgid1, msgid2, n)
+        return msgid1 if n == 1 else msgid2
+
+    def pgettext(self, context: str, message: str) -> str:
+        translated = self._lookup(f'{context}\x04{message}', plural=False)
+        if translated is not None:
+            return translated
+        if self._fallback:
+            return self._fallback.pgettext(context, message)
+        return message
+
+    def npgettext(self, context: str, msgid1: str, msgid2: str, n: int) -> str:
+        translated = self._lookup(f'{context}\x04{msgid1}', plural=True)
+        if translated is not None:
+            forms = translated.split('\0')
+            index = self.plural(n)
+            if index < len(forms):
+                return forms[index]
+        if self._fallback:
+            return self._fallback.npgettext(context, msgid1, msgid2, n)
+        return msgid1 if n == 1 else msgid2
+
+    def close(self):
+        """Unmap the catalog."""
+        self._data.close()
@@ -0,0 +1,163 @@
+"""
+os-prober result cache for Soplos Grub Editor.
+30_os-prober mounts and probes every partition, which dominates grub.cfg
+generation time on multi-boot machines. Its output only changes when the
+disks, the os-prober related settings or the script itself change, so it is
+cached under a key derived from that state.
+"""
+
+import os
+import glob
+import hashlib
+import shutil
+from typing import Callable, Dict, Optional
+
+from utils.logger import log_info, log_warning
+from core.i18n_manager import _
+from core.state import get_cache_dir, load_json, save_json
+
+OS_PROBER_SCRIPT = '30_os-prober'
+CACHE_NAME = 'os-prober.json'
+
+# Settings that change what 30_os-prober emits, with grub-mkconfig's defaults
+OS_PROBER_SETTINGS = {
+    'GRUB_DISABLE_OS_PROBER': 'true',
+    'GRUB_OS_PROBER_SKIP_LIST': '',
+    'GRUB_DISABLE_SUBMENU': '',
+}
+
+# Virtual block devices that come and go (snaps, swap in RAM) without
+# os-prober ever finding a system on them
+IGNORED_DEVICES = ('loop', 'zram', 'ram')
+
+
+def _stat_key(path: str) -> Optional[list]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _read_attribute(device: str, name: str) -> Optional[str]:
+    try:
+        with open(os.path.join(device, name), 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def block_device_state(sys_block: str = '/sys/class/block',
+                       dev_disk: str = '/dev/disk') -> Dict[str, list]:
+    """
+    Describe the block devices os-prober would look at: the partition
+    table layout (every device's size and partitions' start sector) and
+    the filesystem/partition UUIDs mapped to them. Loop, zram and RAM
+    disks are left out. Device nodes are not looked at: devtmpfs creates
+    them anew on every boot.
+    """
+    state = {}
+    for device in sorted(glob.glob(os.path.join(sys_block, '*'))):
+        name = os.path.basename(device)
+        if name.startswith(IGNORED_DEVICES):
+            continue
+        size = _read_attribute(device, 'size')
+        if size is None:
+            continue
+        # 'start' only exists for partitions
+        state[name] = [size, _read_attribute(device, 'start')]
+    for kind in ('by-uuid', 'by-partuuid'):
+        for link in sorted(glob.glob(os.path.join(dev_disk, kind, '*'))):
+            try:
+                target = os.path.basename(os.readlink(link))
+            except OSError:
+                continue
+            if target.startswith(IGNORED_DEVICES):
+                continue
+            state[f'{kind}/{os.path.basename(link)}'] = [target]
+    return state
+
+
+def cache_key(settings: Dict[str, str], script: str) -> str:
+    """
+    Build the cache key for the current block device state.
+
+    Args:
+        settings: GRUB_* values (environment or /etc/default/grub)
+        script: Path of the 30_os-prober script
+    """
+    digest = hashlib.sha256()
+    for key, default in sorted(OS_PROBER_SETTINGS.items()):
+        digest.update(f'{key}={settings.get(key, default)}\0'.encode('utf-8'))
+    for path in (script, shutil.which('os-prober') or '/usr/bin/os-prober'):
+        digest.update(f'{path}={_stat_key(path)}\0'.encode('utf-8'))
+    for name, value in sorted(block_device_state().items()):
+        digest.update(f'{name}={value}\0'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class OsProberCache:
+    """
+    Persistent cache of the 30_os-prober section of grub.cfg.
+    """
+
+    def __init__(self):
+        """Initialize the cache."""
+        self.path = get_cache_dir() / CACHE_NAME
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the cached output for key, if any."""
+        data = load_json(self.path)
+        if isinstance(data, dict) and data.get('key') == key:
+            return data.get('output')
+        return None
+
+    def store(self, key: str, output: str) -> bool:
+        """Remember the output produced for key."""
+        return save_json(self.path, {'key': key, 'output': output}, mode=0o600)
+
+    def invalidate(self):
+        """Forget the cached result so the next generation re-probes."""
+        try:
+            os.remove(self.path)
+            log_info(_("os-prober cache cleared"))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log_warning(_("Failed to clear os-prober cache: {err}").format(err=e))
+
+    def seed(self, grub_cfg_content: str, settings: Dict[str, str], script: str) -> bool:
+        """
+        Cache the 30_os-prober section of a grub.cfg generated by update-grub,
+        so later generations can skip probing.
+        """
+        from core.grub_generator import split_sections
+        parsed = split_sections(grub_cfg_content)
+        if parsed is None:
+            return False
+        for section_script, output in parsed[1]:
+            if section_script == script:
+                return self.store(cache_key(settings, script), output)
+        return False
+
+    def run(self, script: str, env: Dict[str, str], probe: Callable[[], str],
+            on_line: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Return the 30_os-prober output, probing only when nothing is cached
+        for the current state.
+
+        Args:
+            script: Path of the 30_os-prober script
+            env: Environment the script runs with
+            probe: Runs the script and returns its output
+            on_line: Progress callback
+        """
+        key = cache_key(env, script)
+        cached = self.lookup(key)
+        if cached is not None:
+            if on_line:
+                on_line(_("Using cached os-prober results (disks unchanged)"))
+            return cached
+        output = probe()
+        self.store(key, output)
+        return output
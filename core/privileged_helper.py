@@ -0,0 +1,173 @@
+"""
+Privileged helper client for Soplos Grub Editor.
+Starts core/privileged_ops.py through pkexec once per session and sends it
+batches of operations, so a sequence of writes costs a single process
+spawn and a single authorization. When already running as root the
+operations are executed in-process.
+"""
+
+import os
+import sys
+import json
+import atexit
+import threading
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from utils.logger import log_info, log_error, log_warning
+from core.i18n_manager import _
+from core import privileged_ops
+from core.state import ROOT_PYCACHE_PREFIX
+
+HELPER_SCRIPT = Path(__file__).with_name('privileged_ops.py')
+
+
+class PrivilegedHelper:
+    """
+    Long-lived connection to the privileged operations helper.
+
+    pkexec closes every inherited file descriptor except stdio, so the
+    helper is driven over its stdin/stdout pipes with JSON lines.
+    """
+
+    def __init__(self):
+        """Initialize the client; the helper is started on first use."""
+        self._process = None
+        self._next_id = 1
+        self._batch_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._local_runner = None
+        atexit.register(self.close)
+
+    @property
+    def running(self) -> bool:
+        """Whether the helper process is alive."""
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self) -> bool:
+        """Spawn the helper and wait for it to be authorized."""
+        cmd = ['pkexec', sys.executable, '-I', str(HELPER_SCRIPT)]
+        if HELPER_SCRIPT.parent.parent.stat().st_uid != 0:
+            # Development checkout: keep root-owned bytecode out of it
+            cmd[2:2] = ['-X', f'pycache_prefix={ROOT_PYCACHE_PREFIX}']
+        try:
+            self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             text=True, bufsize=1)
+        except OSError as e:
+            log_error(_("Failed to start privileged helper: {err}").format(err=e))
+            self._process = None
+            return False
+        handshake = self._read_message()
+        if not handshake or not handshake.get('ready'):
+            log_error(_("Privileged helper authorization failed"))
+            self.close()
+            return False
+        if handshake.get('version') != privileged_ops.PROTOCOL_VERSION:
+            log_error(_("Privileged helper protocol mismatch"))
+            self.close()
+            return False
+        log_info(_("Privileged helper started"))
+        return True
+
+    def _read_message(self) -> Optional[Dict]:
+        line = self._process.stdout.readline()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def _send(self, message: Dict):
+        with self._write_lock:
+            self._process.stdin.write(json.dumps(message) + '\n')
+            self._process.stdin.flush()
+
+    def run(self, ops: List[Dict], on_line: Optional[Callable[[str], None]] = None) -> Dict:
+        """
+        Execute a batch of operations with root privileges, in order,
+        stopping at the first failure.
+
+        Args:
+            ops: Operations, e.g. {'op': 'write_file', 'path': ..., 'content': ...}
+            on_line: Called with each output line of running commands
+
+        Returns:
+            {'ok': bool, 'error': message or None, 'results': [...]}
+        """
+        if not ops:
+            return {'ok': True, 'error': None, 'results': []}
+
+        if os.geteuid() == 0:
+            with self._batch_lock:
+                self._local_runner = privileged_ops.CommandRunner()
+                try:
+                    return privileged_ops.execute_batch(ops, self._local_runner, on_line)
+                finally:
+                    self._local_runner = None
+
+        with self._batch_lock:
+            if not self.running and not self._start():
+                return {'ok': False, 'error': _("Authorization failed"), 'results': []}
+            request_id = self._next_id
+            self._next_id += 1
+            try:
+                self._send({'id': request_id, 'ops': ops})
+                while True:
+                    message = self._read_message()
+                    if message is None:
+                        raise BrokenPipeError(_("Privileged helper exited"))
+                    if message.get('id') != request_id:
+                        continue
+                    if 'line' in message:
+                        if on_line:
+                            on_line(message['line'])
+                        continue
+                    return message
+            except OSError as e:
+                log_warning(_("Privileged helper failed: {err}").format(err=e))
+                self.close()
+                return {'ok': False, 'error': str(e), 'results': []}
+
+    def cancel(self) -> bool:
+        """
+        Abort the command running in the current batch.
+
+        Returns:
+            True if a running helper was signalled
+        """
+        runner = self._local_runner
+        if runner is not None:
+            runner.cancel()
+            return True
+        if not self.running:
+            return False
+        try:
+            self._send({'cancel': True})
+            return True
+        except OSError:
+            return False
+
+    def close(self):
+        """Stop the helper; the next batch starts (and authorizes) a new one."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+
+# Global instance
+_privileged_helper = None
+
+
+def get_privileged_helper() -> PrivilegedHelper:
+    """Get the global privileged helper instance."""
+    global _privileged_helper
+    if _privileged_helper is None:
+        _privileged_helper = PrivilegedHelper()
+    return _privileged_helper
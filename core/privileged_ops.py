@@ -0,0 +1,685 @@
+"""
+Privileged operations for Soplos Grub Editor.
+Executes batches of typed file and command operations as root. Run as a
+script (through pkexec) it serves batches read as JSON lines from stdin,
+so an unprivileged session authenticates once instead of once per write.
+
+This module only uses the standard library and the (stdlib-only) grub.cfg
+parser: pkexec runs it with a clean environment and without the project
+directory on sys.path. The update_grub operation imports the editor's
+regeneration pipeline (core.grub_manager) when it runs.
+"""
+
+import io
+import os
+import pwd
+import sys
+import json
+import logging
+import shutil
+import hashlib
+import signal
+import tarfile
+import tempfile
+import threading
+import subprocess
+from typing import Callable, Dict, List, Optional, Tuple
+
+if not __package__:
+    # Run as a script: make the sibling core package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.grub_cfg_parser import (PUBLIC_FIELDS, build_menu_index, filter_grub_cfg,
+                                  is_hidden, menu_index_path, parse_grub_cfg)
+
+PROTOCOL_VERSION = 1
+
+# System-wide editor state (see core.state.SYSTEM_STATE_DIR)
+STATE_DIR = '/var/lib/soplos-grub-editor'
+
+# Locations the helper may modify
+WRITABLE_PATHS = [
+    '/etc/default/grub',
+    '/etc/default/grub.d',
+    '/etc/grub.d',
+    '/boot/grub',
+    STATE_DIR,
+]
+
+GRUB_CFG_PATH = '/boot/grub/grub.cfg'
+
+# Hidden menu entries and the grub.cfg generated before removing them
+MENU_FILTER_PATH = os.path.join(STATE_DIR, 'hidden-entries.json')
+UNFILTERED_GRUB_CFG_PATH = os.path.join(STATE_DIR, 'grub.cfg.unfiltered')
+GRUB_MKFONT_PATHS = ['/usr/bin/grub-mkfont', '/usr/sbin/grub-mkfont']
+
+# Logger of the editor modules (see utils.logger)
+LOGGER_NAME = 'soplos-grub-editor'
+
+# Set when serving an unprivileged session through pkexec: sources are
+# then read with the calling user's permissions (see _read_source()).
+# An editor running as root executes operations with its own rights.
+READ_AS_CALLER = False
+
+
+class OperationError(Exception):
+    """Raised when an operation is rejected or fails."""
+
+
+def _check_writable(path: str) -> str:
+    """Return the resolved path, or raise if it is outside WRITABLE_PATHS."""
+    if not isinstance(path, str) or not os.path.isabs(path):
+        raise OperationError(f"not an absolute path: {path!r}")
+    # Resolve the parent only, so the target itself may be a symlink to
+    # be replaced or removed, but not a way out of the allowed tree.
+    resolved = os.path.join(os.path.realpath(os.path.dirname(path)), os.path.basename(path))
+    for allowed in WRITABLE_PATHS:
+        if resolved == allowed or resolved.startswith(allowed + '/'):
+            return resolved
+    raise OperationError(f"path not allowed: {path}")
+
+
+def _caller() -> Optional[pwd.struct_passwd]:
+    """
+    Return the account of the user the helper acts for (the one pkexec
+    authorized), or None when operations run with root's own rights.
+    """
+    value = os.environ.get('PKEXEC_UID', '')
+    if not READ_AS_CALLER or not value.isdigit() or int(value) == 0:
+        return None
+    try:
+        return pwd.getpwuid(int(value))
+    except KeyError:
+        raise OperationError(f"unknown calling user: {value}")
+
+
+def _export_source(path: str, out):
+    """
+    Write path to out: b'f' and the content of a file, or b'd' and an
+    uncompressed tar archive of a directory (symlinks followed).
+    """
+    if os.path.isdir(path):
+        out.write(b'd')
+        with tarfile.open(fileobj=out, mode='w|', dereference=True) as archive:
+            archive.add(path, arcname='.')
+    else:
+        with open(path, 'rb') as f:
+            out.write(b'f')
+            shutil.copyfileobj(f, out)
+
+
+def _read_source(path: str) -> Tuple[bool, bytes]:
+    """
+    Read a file or directory tree with the permissions of the calling
+    user, so that operations cannot copy files only root may read. A
+    child process running as that user exports it (see _export_source()).
+
+    Returns:
+        (whether path is a directory, file content or tar archive)
+    """
+    if not isinstance(path, str) or not os.path.isabs(path):
+        raise OperationError(f"not an absolute path: {path!r}")
+    user = _caller()
+    if user is None:
+        out = io.BytesIO()
+        _export_source(path, out)
+        data = out.getvalue()
+    else:
+        result = subprocess.run([sys.executable, '-I', os.path.abspath(__file__), '--export', path],
+                                user=user.pw_uid, group=user.pw_gid,
+                                extra_groups=os.getgrouplist(user.pw_name, user.pw_gid),
+                                stdin=subprocess.DEVNULL, capture_output=True, cwd='/')
+        if result.returncode != 0:
+            error = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise OperationError(f"cannot read {path}: "
+                                 f"{error[-1] if error else f'exit status {result.returncode}'}")
+        data = result.stdout
+    return data[:1] == b'd', data[1:]
+
+
+def _find_executable(candidates: List[str]) -> str:
+    for path in candidates:
+        if os.access(path, os.X_OK):
+            return path
+    raise OperationError(f"{os.path.basename(candidates[0])} not found")
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _stage_file(path: str, content: str, mode: Optional[int]) -> str:
+    """Write content to a synced temporary file next to path and return its name."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        st = None
+    if mode is None:
+        mode = (st.st_mode & 0o7777) if st else 0o644
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f'.{os.path.basename(path)}.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        if st is not None:
+            os.chown(tmp_path, st.st_uid, st.st_gid)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def _backup(path: str, backup: str):
+    """
+    Keep the current path as backup: a hard link, or a copy on filesystems
+    without hard links (vfat /boot or EFI system partition).
+    """
+    try:
+        os.link(path, backup, follow_symlinks=False)
+    except OSError:
+        shutil.copy2(path, backup, follow_symlinks=False)
+
+
+def write_file(path: str, content: str, mode: Optional[int] = None) -> Dict:
+    """
+    Atomically replace path with content, keeping the mode and owner of an
+    existing file (0644 root:root for new files unless mode is given).
+    """
+    path = _check_writable(path)
+    tmp_path = _stage_file(path, content, mode)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return {}
+
+
+def chmod(path: str, mode: int) -> Dict:
+    """Set the permission bits of path."""
+    os.chmod(_check_writable(path), mode)
+    return {}
+
+
+def unlink(path: str, missing_ok: bool = True) -> Dict:
+    """Remove a file."""
+    try:
+        os.unlink(_check_writable(path))
+    except FileNotFoundError:
+        if not missing_ok:
+            raise
+    return {}
+
+
+def copy_tree(src: str, dest: str) -> Dict:
+    """
+    Copy a file or directory tree to dest, replacing an existing dest.
+    src is read with the calling user's permissions; the copies are
+    owned by root, mode 0644 (0755 for directories).
+    """
+    dest = _check_writable(dest)
+    is_dir, data = _read_source(src)
+    if not is_dir:
+        with open(dest, 'wb') as f:
+            f.write(data)
+        os.chmod(dest, 0o644)
+        return {}
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        members = archive.getmembers()
+        for member in members:
+            if (not (member.isfile() or member.isdir()) or os.path.isabs(member.name)
+                    or '..' in member.name.split('/')):
+                raise OperationError(f"cannot copy {member.name}: not a file or directory")
+        for member in members:
+            target = os.path.normpath(os.path.join(dest, member.name))
+            if member.isdir():
+                os.makedirs(target, exist_ok=True)
+                os.chmod(target, 0o755)
+                continue
+            with archive.extractfile(member) as source, open(target, 'wb') as f:
+                shutil.copyfileobj(source, f)
+            os.chmod(target, 0o644)
+    return {}
+
+
+def mkfont(font: str, size: int, output: str, runner: 'CommandRunner',
+           on_line: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Convert font to GRUB's PF2 format with grub-mkfont. font is read with
+    the calling user's permissions.
+    """
+    output = _check_writable(output)
+    is_dir, content = _read_source(font)
+    if is_dir:
+        raise OperationError(f"not a font file: {font}")
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(font)[1]) as f:
+        f.write(content)
+        f.flush()
+        return runner.run([_find_executable(GRUB_MKFONT_PATHS), '-s', str(int(size)),
+                           '-o', output, f.name], on_line)
+
+
+def remove_tree(path: str) -> Dict:
+    """Remove a directory tree (or file)."""
+    path = _check_writable(path)
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.unlink(path)
+    return {}
+
+
+def write_menu_index(grub_cfg: str = GRUB_CFG_PATH, source: Optional[str] = None,
+                     hidden=()) -> Dict:
+    """
+    Write the world-readable menu index next to grub_cfg, so unprivileged
+    readers need not open grub.cfg (often mode 0600). Only titles,
+    hierarchy, ids, classes, kinds and enabled states are exported.
+
+    Args:
+        grub_cfg: The grub.cfg the index describes
+        source: File holding every entry, hidden ones included (grub_cfg
+            if not given)
+        hidden: Ids or names of the hidden entries
+    """
+    content = None
+    if source and source != grub_cfg:
+        # Parsed as grub_cfg, so that 'source' lines resolve next to it
+        with open(source, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read()
+    entries = parse_grub_cfg(grub_cfg, content)
+    for entry in entries:
+        entry.enabled = not is_hidden(entry, hidden)
+    st = os.stat(grub_cfg)
+    index = build_menu_index([st.st_size, st.st_mtime_ns, None], entries, PUBLIC_FIELDS)
+    return write_file(menu_index_path(grub_cfg), json.dumps(index, separators=(',', ':')), 0o644)
+
+
+def _sha256_file(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def load_menu_filter() -> Dict:
+    """
+    Return the persisted menu filter: 'hidden' (entry ids or names) and
+    'grub_cfg' (SHA-256 of the filtered grub.cfg written from the
+    unfiltered copy, None when grub.cfg is not filtered).
+    """
+    try:
+        with open(MENU_FILTER_PATH, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = None
+    if not isinstance(state, dict):
+        state = {}
+    hidden = state.get('hidden')
+    return {
+        'hidden': [h for h in hidden if isinstance(h, str)] if isinstance(hidden, list) else [],
+        'grub_cfg': state.get('grub_cfg') if isinstance(state.get('grub_cfg'), str) else None,
+    }
+
+
+def unfiltered_grub_cfg(grub_cfg: str = GRUB_CFG_PATH) -> str:
+    """
+    Return the file holding every generated entry: the unfiltered copy
+    while grub_cfg is still the filtered file written from it, grub_cfg
+    itself otherwise (nothing hidden, or regenerated by another tool).
+    """
+    state = load_menu_filter()
+    if (state['grub_cfg'] is not None and os.path.exists(UNFILTERED_GRUB_CFG_PATH)
+            and _sha256_file(grub_cfg) == state['grub_cfg']):
+        return UNFILTERED_GRUB_CFG_PATH
+    return grub_cfg
+
+
+def filter_menu(hidden: Optional[List[str]] = None, regenerated: bool = False,
+                grub_cfg: str = GRUB_CFG_PATH) -> Dict:
+    """
+    Remove the hidden menu entries from grub_cfg, keeping an unfiltered
+    copy so they can be shown again without regenerating. This is the
+    last stage of every regeneration and applies hidden set changes to
+    the existing grub.cfg directly.
+
+    Args:
+        hidden: New ids or names to hide, or None for the persisted ones
+        regenerated: grub_cfg was just generated and holds every entry
+        grub_cfg: Location of grub.cfg
+    """
+    state = load_menu_filter()
+    hidden = sorted(set(state['hidden'] if hidden is None else hidden))
+    source = grub_cfg if regenerated else unfiltered_grub_cfg(grub_cfg)
+    with open(source, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        content = f.read()
+    filtered = ''.join(filter_grub_cfg(content.splitlines(keepends=True), set(hidden)))
+
+    mode = os.stat(grub_cfg).st_mode & 0o7777
+    changes = []
+    digest = None
+    if filtered != content:
+        digest = hashlib.sha256(filtered.encode('utf-8', 'surrogateescape')).hexdigest()
+        changes.append({'op': 'write_file', 'path': UNFILTERED_GRUB_CFG_PATH,
+                        'content': content, 'mode': mode})
+    if filtered != content or source != grub_cfg:
+        changes.append({'op': 'write_file', 'path': grub_cfg, 'content': filtered})
+    if digest is None:
+        changes.append({'op': 'unlink', 'path': UNFILTERED_GRUB_CFG_PATH})
+    changes.append({'op': 'write_file', 'path': MENU_FILTER_PATH, 'mode': 0o644,
+                    'content': json.dumps({'hidden': hidden, 'grub_cfg': digest})})
+    os.makedirs(STATE_DIR, mode=0o755, exist_ok=True)
+    apply_transaction(changes)
+
+    write_menu_index(grub_cfg, UNFILTERED_GRUB_CFG_PATH if digest else grub_cfg, hidden)
+    return {'hidden': hidden}
+
+
+def apply_transaction(changes: List[Dict]) -> Dict:
+    """
+    Apply write_file, chmod and unlink changes all-or-nothing.
+
+    New contents are staged in synced temporary files first. Each replaced
+    or removed file is kept as a hard link (or a copy, see _backup()) until
+    every change succeeded, so a failure restores the previous state of all
+    files.
+    """
+    for change in changes:
+        if change.get('op') not in ('write_file', 'chmod', 'unlink'):
+            raise OperationError(f"not a transactional operation: {change.get('op')!r}")
+        change['path'] = _check_writable(change['path'])
+
+    staged = {}
+    try:
+        for index, change in enumerate(changes):
+            if change['op'] == 'write_file':
+                staged[index] = _stage_file(change['path'], change['content'], change.get('mode'))
+    except BaseException:
+        for tmp_path in staged.values():
+            os.unlink(tmp_path)
+        raise
+
+    undo = []
+    backups = []
+    try:
+        for index, change in enumerate(changes):
+            path = change['path']
+            if change['op'] == 'chmod':
+                old_mode = os.stat(path).st_mode & 0o7777
+                os.chmod(path, int(change['mode']))
+                undo.append(lambda path=path, mode=old_mode: os.chmod(path, mode))
+                continue
+            if not os.path.lexists(path):
+                if change['op'] == 'write_file':
+                    os.replace(staged.pop(index), path)
+                    undo.append(lambda path=path: os.unlink(path))
+                continue
+            backup = os.path.join(os.path.dirname(path),
+                                  f'.{os.path.basename(path)}.bak.{os.getpid()}.{index}')
+            if os.path.lexists(backup):
+                os.unlink(backup)
+            backups.append(backup)
+            _backup(path, backup)
+            if change['op'] == 'write_file':
+                os.replace(staged.pop(index), path)
+            else:
+                os.unlink(path)
+            undo.append(lambda path=path, backup=backup: os.replace(backup, path))
+    except BaseException:
+        for action in reversed(undo):
+            try:
+                action()
+            except OSError:
+                pass
+        for path in list(staged.values()) + backups:
+            if os.path.lexists(path):
+                os.unlink(path)
+        raise
+
+    for backup in backups:
+        os.unlink(backup)
+    for directory in sorted({os.path.dirname(change['path']) for change in changes}):
+        _fsync_dir(directory)
+    return {}
+
+
+class CommandRunner:
+    """Runs the commands of a batch, so they can be cancelled."""
+
+    def __init__(self):
+        self.process = None
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        # Called on cancel while an operation runs its commands itself
+        self.on_cancel = None
+
+    def cancel(self):
+        self.cancelled.set()
+        on_cancel = self.on_cancel
+        if on_cancel is not None:
+            on_cancel()
+        with self.lock:
+            process = self.process
+        if process is not None and process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self, cmd: List[str], on_line: Optional[Callable[[str], None]]) -> Dict:
+        if self.cancelled.is_set():
+            raise OperationError("cancelled")
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.DEVNULL, text=True,
+                                   start_new_session=True)
+        with self.lock:
+            self.process = process
+        output = []
+        try:
+            for line in process.stdout:
+                line = line.rstrip('\n')
+                output.append(line)
+                if on_line and line.strip():
+                    on_line(line)
+            returncode = process.wait()
+        finally:
+            with self.lock:
+                self.process = None
+        if returncode != 0:
+            if self.cancelled.is_set():
+                raise OperationError("cancelled")
+            raise OperationError("\n".join(output[-5:]) or f"exit status {returncode}")
+        return {'output': "\n".join(output)}
+
+
+class _ErrorRecorder(logging.Handler):
+    """Keeps the messages of the errors logged while an operation runs."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def update_grub(runner: CommandRunner, on_line: Optional[Callable[[str], None]] = None,
+                rescan_os: bool = False) -> Dict:
+    """
+    Regenerate grub.cfg the way the editor does when it runs as root:
+    only the sections whose inputs changed when possible, cached
+    os-prober results while the disks are unchanged, then the menu filter.
+
+    Args:
+        runner: Runner of the batch; cancelling it aborts the regeneration
+        on_line: Called with each output line
+        rescan_os: Discard cached os-prober results first
+    """
+    from core.grub_manager import GrubManager
+
+    def progress(line, _fraction):
+        if on_line:
+            on_line(line)
+
+    manager = GrubManager()
+    recorder = _ErrorRecorder()
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.addHandler(recorder)
+    runner.on_cancel = manager.cancel_update
+    try:
+        succeeded = manager.update_grub(progress, runner.cancelled, rescan_os)
+    finally:
+        runner.on_cancel = None
+        logger.removeHandler(recorder)
+    if not succeeded:
+        if runner.cancelled.is_set():
+            raise OperationError("cancelled")
+        raise OperationError(recorder.messages[-1] if recorder.messages else "update-grub failed")
+    return {}
+
+
+def execute(op: Dict, runner: CommandRunner, on_line: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Execute a single operation.
+
+    Raises:
+        OperationError, OSError
+    """
+    kind = op.get('op')
+    if kind == 'write_file':
+        return write_file(op['path'], op['content'], op.get('mode'))
+    if kind == 'chmod':
+        return chmod(op['path'], int(op['mode']))
+    if kind == 'unlink':
+        return unlink(op['path'], op.get('missing_ok', True))
+    if kind == 'copy_tree':
+        return copy_tree(op['src'], op['dest'])
+    if kind == 'remove_tree':
+        return remove_tree(op['path'])
+    if kind == 'transaction':
+        return apply_transaction(op['changes'])
+    if kind == 'mkfont':
+        return mkfont(op['font'], op['size'], op['output'], runner, on_line)
+    if kind == 'update_grub':
+        return update_grub(runner, on_line, bool(op.get('rescan_os')))
+    if kind == 'filter_menu':
+        from core.generation_state import GenerationState, output_signature
+        previous = output_signature(GRUB_CFG_PATH)
+        result = filter_menu(op.get('hidden'))
+        # Keep the system-wide generation stamp (see update_grub) valid
+        GenerationState(GRUB_CFG_PATH).refresh_output(previous)
+        return result
+    raise OperationError(f"unknown operation: {kind!r}")
+
+
+def execute_batch(ops: List[Dict], runner: Optional[CommandRunner] = None,
+                  on_line: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Execute operations in order, stopping at the first failure.
+
+    Returns:
+        {'ok': bool, 'error': message or None, 'results': [...]}, with one
+        result per executed operation
+    """
+    runner = runner or CommandRunner()
+    results = []
+    for op in ops:
+        try:
+            result = execute(op, runner, on_line)
+        except (OperationError, OSError, KeyError, TypeError, ValueError) as e:
+            error = str(e) if not isinstance(e, KeyError) else f"missing argument {e}"
+            results.append({'ok': False, 'error': error})
+            return {'ok': False, 'error': error, 'results': results}
+        result['ok'] = True
+        results.append(result)
+    return {'ok': True, 'error': None, 'results': results}
+
+
+def serve(stdin=None, stdout=None) -> int:
+    """
+    Serve batches until stdin is closed.
+
+    Requests are JSON lines {"id": n, "ops": [...]}; {"cancel": true}
+    aborts the running command. Each output line of a running command is
+    sent as {"id": n, "line": "..."} before the final response
+    {"id": n, "ok": ..., "error": ..., "results": [...]}.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    write_lock = threading.Lock()
+    pending = []
+    available = threading.Condition()
+    closed = threading.Event()
+    current = {'runner': None}
+
+    def send(message):
+        with write_lock:
+            stdout.write(json.dumps(message) + '\n')
+            stdout.flush()
+
+    def read_requests():
+        for line in stdin:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                continue
+            if request.get('cancel'):
+                runner = current['runner']
+                if runner is not None:
+                    runner.cancel()
+                continue
+            with available:
+                pending.append(request)
+                available.notify()
+        closed.set()
+        runner = current['runner']
+        if runner is not None:
+            runner.cancel()
+        with available:
+            available.notify()
+
+    threading.Thread(target=read_requests, daemon=True).start()
+    send({'ready': True, 'version': PROTOCOL_VERSION})
+
+    while True:
+        with available:
+            while not pending and not closed.is_set():
+                available.wait()
+            if not pending:
+                return 0
+            request = pending.pop(0)
+        request_id = request.get('id')
+        runner = current['runner'] = CommandRunner()
+        response = execute_batch(request.get('ops') or [], runner,
+                                 lambda line: send({'id': request_id, 'line': line}))
+        current['runner'] = None
+        response['id'] = request_id
+        send(response)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--export']:
+        # Run by _read_source() with the calling user's identity
+        _export_source(sys.argv[2], sys.stdout.buffer)
+        sys.exit(0)
+    if os.geteuid() != 0:
+        sys.stderr.write("soplos-grub-editor helper must run as root\n")
+        sys.exit(1)
+    os.umask(0o022)
+    READ_AS_CALLER = True
+    # stdout carries the protocol: the editor modules update_grub loads
+    # must log to stderr (utils.logger keeps an existing configuration)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='[%(asctime)s] [%(levelname)s] %(message)s', datefmt='%H:%M:%S')
+    sys.exit(serve())
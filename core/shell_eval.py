@@ -0,0 +1,380 @@
+"""
+Shell evaluator for /etc/default/grub.
+grub-mkconfig sources /etc/default/grub, so its values follow shell rules.
+This module evaluates the subset of POSIX shell found in these files
+(quoting, $VAR/${VAR} expansion, export, line continuations, comments)
+in pure Python, without spawning a shell.
+"""
+
+import re
+import bisect
+from typing import Callable, Dict, List, Optional, Tuple
+
+NAME_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+ASSIGNMENT_WORD_RE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*)=')
+
+# Characters that never need quoting in a value
+SAFE_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_@%+=:,./-')
+
+# Characters ending an unquoted word
+WORD_BREAKS = frozenset(' \t\n;&|<>()')
+
+# Reserved words and commands the evaluator does not interpret
+COMPOUND_WORDS = frozenset(['if', 'then', 'else', 'elif', 'fi', 'case', 'esac', 'for',
+                            'while', 'until', 'do', 'done', '{', '}', '!'])
+
+
+def quote(value: str) -> str:
+    """Quote value so that the shell reads it back unchanged."""
+    if value and all(c in SAFE_CHARS for c in value):
+        return value
+    escaped = re.sub(r'([\\"$`])', r'\\\1', value)
+    return f'"{escaped}"'
+
+
+class Assignment:
+    """Where and how a variable got its value."""
+
+    __slots__ = ('name', 'value', 'line', 'source', 'exported', 'exact')
+
+    def __init__(self, name: str, value: str, line: int, source: str,
+                 exported: bool = False, exact: bool = True):
+        self.name = name
+        self.value = value
+        # 1-based line of the assignment
+        self.line = line
+        # The assignment word as written, e.g. 'GRUB_TIMEOUT="5"'
+        self.source = source
+        self.exported = exported
+        # False when the value depends on something that was not evaluated
+        # (command substitution, positional parameters)
+        self.exact = exact
+
+    def __repr__(self):
+        return f'Assignment({self.name}={self.value!r}, line={self.line})'
+
+
+class ShellResult:
+    """Variables defined by a script, with the assignment that set each one."""
+
+    def __init__(self):
+        self.values: Dict[str, str] = {}
+        self.provenance: Dict[str, Assignment] = {}
+        # 1-based lines holding commands that were skipped
+        self.unsupported: List[int] = []
+
+    @property
+    def complete(self) -> bool:
+        """Whether every statement was evaluated exactly."""
+        return not self.unsupported and all(a.exact for a in self.provenance.values())
+
+
+def _skip_balanced(text: str, i: int, open_char: str, close_char: str) -> int:
+    """Return the index after the close_char matching text[i] == open_char."""
+    depth = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == "'" and open_char == '(':
+            end = text.find("'", i + 1)
+            i = n if end < 0 else end + 1
+            continue
+        if c == open_char:
+            depth += 1
+        elif c == close_char:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def _scan_word(text: str, i: int) -> int:
+    """Return the index where the word starting at i ends."""
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in WORD_BREAKS:
+            return i
+        if c == '\\':
+            i += 2
+        elif c == "'":
+            end = text.find("'", i + 1)
+            i = n if end < 0 else end + 1
+        elif c == '"':
+            i += 1
+            while i < n and text[i] != '"':
+                if text[i] == '\\':
+                    i += 1
+                elif text.startswith('$(', i) or text.startswith('${', i):
+                    i = _skip_balanced(text, i + 1, text[i + 1], ')' if text[i + 1] == '(' else '}') - 1
+                i += 1
+            i += 1
+        elif c == '$' and i + 1 < n and text[i + 1] in '({':
+            i = _skip_balanced(text, i + 1, text[i + 1], ')' if text[i + 1] == '(' else '}')
+        elif c == '`':
+            end = text.find('`', i + 1)
+            i = n if end < 0 else end + 1
+        else:
+            i += 1
+    return n
+
+
+def logical_lines(text: str) -> List[str]:
+    """
+    Split a script into logical lines: physical lines are joined while a
+    quote, a $(...) or ${...} or a backslash-newline continuation is open,
+    so that each statement is kept whole.
+    """
+    lines = []
+    start = 0
+    quote = None
+    depth = 0
+    word_start = True
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if quote == "'":
+            if c == "'":
+                quote = None
+        elif c == '\\':
+            # Escaped character, including the newline of a continuation
+            i += 2
+            word_start = False
+            continue
+        elif c == '$' and text[i + 1:i + 2] in ('(', '{'):
+            depth += 1
+            i += 2
+            word_start = False
+            continue
+        elif c in ')}' and depth:
+            depth -= 1
+        elif quote == '"':
+            if c == '"':
+                quote = None
+        elif c in '\'"':
+            quote = c
+        elif c == '#' and word_start and not depth:
+            end = text.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        elif c == '\n' and not depth:
+            lines.append(text[start:i + 1])
+            start = i + 1
+        word_start = quote is None and c in ' \t\n;&|()'
+        i += 1
+    if start < n:
+        lines.append(text[start:])
+    return lines
+
+
+def assignment_span(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Return (start, end) of the first assignment word of a statement,
+    after an optional 'export', or None if it does not start with one.
+    """
+    match = re.match(r'[ \t]*(?:export[ \t]+)?', text)
+    start = match.end()
+    if not ASSIGNMENT_WORD_RE.match(text, start):
+        return None
+    return start, _scan_word(text, start)
+
+
+class _Expander:
+    """Expands a single word (quote removal and parameter expansion)."""
+
+    def __init__(self, lookup: Callable[[str], Optional[str]]):
+        self.lookup = lookup
+        self.exact = True
+
+    def expand(self, word: str) -> str:
+        out = []
+        i = 0
+        n = len(word)
+        while i < n:
+            c = word[i]
+            if c == "'":
+                end = word.find("'", i + 1)
+                end = n if end < 0 else end
+                out.append(word[i + 1:end])
+                i = end + 1
+            elif c == '"':
+                i = self._double_quoted(word, i + 1, out)
+            elif c == '\\':
+                if i + 1 < n and word[i + 1] != '\n':
+                    out.append(word[i + 1])
+                i += 2
+            elif c == '$':
+                i = self._dollar(word, i, out)
+            elif c == '`':
+                end = word.find('`', i + 1)
+                i = n if end < 0 else end + 1
+                self.exact = False
+            else:
+                out.append(c)
+                i += 1
+        return ''.join(out)
+
+    def _double_quoted(self, word: str, i: int, out: List[str]) -> int:
+        n = len(word)
+        while i < n:
+            c = word[i]
+            if c == '"':
+                return i + 1
+            if c == '\\' and i + 1 < n and word[i + 1] in '$`"\\\n':
+                if word[i + 1] != '\n':
+                    out.append(word[i + 1])
+                i += 2
+            elif c == '$':
+                i = self._dollar(word, i, out)
+            elif c == '`':
+                end = word.find('`', i + 1)
+                i = n if end < 0 else end + 1
+                self.exact = False
+            else:
+                out.append(c)
+                i += 1
+        return n
+
+    def _dollar(self, word: str, i: int, out: List[str]) -> int:
+        n = len(word)
+        if i + 1 >= n:
+            out.append('$')
+            return n
+        nxt = word[i + 1]
+        if nxt == '{':
+            end = _skip_balanced(word, i + 1, '{', '}')
+            out.append(self._braced(word[i + 2:end - 1]))
+            return end
+        if nxt == '(':
+            # Command (or arithmetic) substitution is not evaluated
+            self.exact = False
+            return _skip_balanced(word, i + 1, '(', ')')
+        match = NAME_RE.match(word, i + 1)
+        if match:
+            out.append(self.lookup(match.group(0)) or '')
+            return match.end()
+        if nxt.isdigit() or nxt in '@*#?$!-':
+            # Positional and special parameters
+            self.exact = False
+            return i + 2
+        out.append('$')
+        return i + 1
+
+    def _braced(self, expression: str) -> str:
+        if expression.startswith('#') and NAME_RE.fullmatch(expression[1:]):
+            return str(len(self.lookup(expression[1:]) or ''))
+        match = NAME_RE.match(expression)
+        if not match:
+            self.exact = False
+            return ''
+        name = match.group(0)
+        value = self.lookup(name)
+        rest = expression[match.end():]
+        if not rest:
+            return value or ''
+        colon = rest.startswith(':')
+        operator = rest[1 if colon else 0:2 if colon else 1]
+        argument = rest[2 if colon else 1:]
+        unset = value is None or (colon and value == '')
+        if operator in ('-', '='):
+            return self.expand(argument) if unset else value
+        if operator == '+':
+            return '' if unset else self.expand(argument)
+        if operator == '?':
+            return value or ''
+        # Pattern removal and other operators are not evaluated
+        self.exact = False
+        return value or ''
+
+
+def evaluate(text: str, environ: Optional[Dict[str, str]] = None) -> ShellResult:
+    """
+    Evaluate a shell script made of variable assignments.
+
+    Args:
+        text: Script content
+        environ: Variables defined before the script runs
+
+    Returns:
+        ShellResult with the value and provenance of every variable the
+        script assigns or exports
+    """
+    result = ShellResult()
+    environ = environ or {}
+    line_starts = [0] + [m.end() for m in re.finditer('\n', text)]
+
+    def line_of(index: int) -> int:
+        return bisect.bisect_right(line_starts, index)
+
+    def lookup(name: str) -> Optional[str]:
+        if name in result.values:
+            return result.values[name]
+        return environ.get(name)
+
+    def run(words: List[Tuple[str, int]]):
+        if not words:
+            return
+        exported = words[0][0] == 'export'
+        if exported:
+            words = words[1:]
+        for word, start in words:
+            if not ASSIGNMENT_WORD_RE.match(word) and not (exported and NAME_RE.fullmatch(word)):
+                # A command: assignments before it only apply to that command
+                result.unsupported.append(line_of(start))
+                return
+        for word, start in words:
+            match = ASSIGNMENT_WORD_RE.match(word)
+            if not match:
+                if word in result.provenance:
+                    result.provenance[word].exported = True
+                continue
+            expander = _Expander(lookup)
+            value = expander.expand(word[match.end():])
+            name = match.group(1)
+            previous = result.provenance.get(name)
+            result.values[name] = value
+            result.provenance[name] = Assignment(
+                name, value, line_of(start), word,
+                exported or (previous is not None and previous.exported),
+                expander.exact)
+
+    words = []
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in ' \t':
+            i += 1
+        elif c == '\\' and text.startswith('\\\n', i):
+            i += 2
+        elif c == '#':
+            end = text.find('\n', i)
+            i = n if end < 0 else end
+        elif c in '\n;':
+            run(words)
+            words = []
+            i += 1
+        elif c in '&|<>()':
+            # Pipelines, redirections and subshells are not evaluated
+            result.unsupported.append(line_of(i))
+            end = text.find('\n', i)
+            i = n if end < 0 else end
+            words = []
+        else:
+            end = _scan_word(text, i)
+            word = text[i:end]
+            if not words and word in COMPOUND_WORDS:
+                result.unsupported.append(line_of(i))
+                end = text.find('\n', i)
+                end = n if end < 0 else end
+                words = []
+            else:
+                words.append((word, i))
+            i = end
+    run(words)
+    return result
@@ -0,0 +1,64 @@
+"""
+Stat-validated cache for Soplos Grub Editor.
+Keeps values derived from files (parsed /etc/default/grub, custom.cfg,
+grub.cfg menu entries) until the file's inode, modification time or size
+changes.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+StatKey = Optional[Tuple[int, int, int]]
+
+
+def stat_key(path: str) -> StatKey:
+    """Return (st_ino, st_mtime_ns, st_size) of path, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class StatCache:
+    """
+    Values loaded from files, reloaded when the file changes on disk.
+
+    The file is stat()ed before loading, so a change made while loading
+    is seen by the next lookup.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._entries: Dict[str, Tuple[StatKey, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, load: Callable[[], Any]) -> Any:
+        """
+        Return the value cached for path, calling load() if the file
+        changed (or was never loaded).
+        """
+        key = stat_key(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        value = load()
+        with self._lock:
+            self._entries[path] = (key, value)
+        return value
+
+    def put(self, path: str, value: Any):
+        """Cache value for the current state of path, e.g. after writing it."""
+        key = stat_key(path)
+        with self._lock:
+            self._entries[path] = (key, value)
+
+    def invalidate(self, path: Optional[str] = None):
+        """Forget the value for path, or every value."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
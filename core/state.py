@@ -0,0 +1,83 @@
+"""
+Persistent state storage for Soplos Grub Editor.
+Provides the state/cache directories and small atomic JSON helpers.
+"""
+
+import os
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+from utils.logger import log_warning
+from core.i18n_manager import _
+
+APP_DIR_NAME = 'soplos-grub-editor'
+
+# System-wide locations, used when running as root
+SYSTEM_STATE_DIR = Path('/var/lib') / APP_DIR_NAME
+SYSTEM_CACHE_DIR = Path('/var/cache') / APP_DIR_NAME
+
+# Bytecode written by root for a checkout it does not own (main.py and
+# core.privileged_helper set it as pycache_prefix)
+ROOT_PYCACHE_PREFIX = SYSTEM_CACHE_DIR / 'pycache'
+
+
+def _user_dir(xdg_var: str, fallback: str) -> Path:
+    base = os.environ.get(xdg_var)
+    if not base:
+        base = str(Path.home() / fallback)
+    return Path(base) / APP_DIR_NAME
+
+
+def get_state_dir() -> Path:
+    """Return the directory holding persistent state (not created)."""
+    if os.geteuid() == 0:
+        return SYSTEM_STATE_DIR
+    return _user_dir('XDG_STATE_HOME', '.local/state')
+
+
+def get_cache_dir() -> Path:
+    """Return the directory holding disposable caches (not created)."""
+    if os.geteuid() == 0:
+        return SYSTEM_CACHE_DIR
+    return _user_dir('XDG_CACHE_HOME', '.cache')
+
+
+def load_json(path: Path) -> Optional[Any]:
+    """Load a JSON file, returning None if it is missing or invalid."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log_warning(_("Ignoring unreadable state file {path}: {err}").format(path=path, err=e))
+        return None
+
+
+def save_json(path: Path, data: Any, mode: int = 0o644) -> bool:
+    """
+    Atomically write data as JSON to path, creating parent directories.
+
+    Returns:
+        True if the file was written
+    """
+    path = Path(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f'.{path.name}.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return True
+    except OSError as e:
+        log_warning(_("Failed to write state file {path}: {err}").format(path=path, err=e))
+        return False
@@ -5,14 +5,11 @@ APPROACH (like Sys Cleaner):
 - dark.css / light.css contain only @define-color variable definitions
 - Both files are concatenated into a single CSS provider
 - Respects SOPLOS_THEME_TYPE when running as root via pkexec
+- GTK is imported when the CSS provider is created, not with this module
 """
 
 import os
 from pathlib import Path
-import gi
-
-gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk
 
 from typing import Optional
 from .environment import get_environment_detector
@@ -23,13 +20,17 @@ class ThemeManager:
     def __init__(self, assets_path: str):
         self.assets_path = Path(assets_path)
         self.themes_path = self.assets_path / 'themes'
-        self.css_provider: Optional[Gtk.CssProvider] = None
+        self.css_provider: Optional['Gtk.CssProvider'] = None
         self.current_theme: Optional[str] = None
         self.env = get_environment_detector()
         self._init_css_provider()
 
     def _init_css_provider(self):
         """Initialize single CSS provider (like Repo Selector)."""
+        import gi
+        gi.require_version('Gtk', '3.0')
+        from gi.repository import Gtk, Gdk
+
         self.css_provider = Gtk.CssProvider()
         screen = Gdk.Screen.get_default()
         
@@ -117,6 +118,7 @@ class ThemeManager:
 
         # Set GTK dark theme preference if needed
         try:
+            from gi.repository import Gtk
             settings = Gtk.Settings.get_default()
             if settings is not None:
                 # Check if this is a dark theme
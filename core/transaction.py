@@ -0,0 +1,102 @@
+"""
+Multi-file transactions for Soplos Grub Editor.
+Collects the file writes, permission changes and deletions of one user
+action and applies them all-or-nothing in a single privileged step.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from utils.logger import log_info, log_error
+from core.i18n_manager import _
+
+
+class GrubTransaction:
+    """
+    Pending changes to GRUB files.
+
+    Changes that would leave a file as it already is (same content, same
+    mode, already absent) are dropped when they are added, so committing a
+    transaction with no effective change does not require privileges.
+    """
+
+    def __init__(self, run_privileged):
+        """
+        Initialize the transaction.
+
+        Args:
+            run_privileged: Callable executing a batch of privileged
+                operations (GrubManager.run_privileged)
+        """
+        self._run_privileged = run_privileged
+        self._changes: Dict[str, Dict] = {}
+        self._modes: List[Dict] = []
+
+    @property
+    def changes(self) -> List[Dict]:
+        """Effective changes, in the order they will be applied."""
+        return list(self._changes.values()) + self._modes
+
+    def write(self, path, content: str, mode: Optional[int] = None):
+        """Replace path with content (keeping its mode unless mode is given)."""
+        path = str(path)
+        self._changes.pop(path, None)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                unchanged = f.read() == content
+            if unchanged and mode is not None:
+                unchanged = os.stat(path).st_mode & 0o7777 == mode
+        except (OSError, UnicodeDecodeError):
+            unchanged = False
+        if unchanged:
+            return
+        change = {'op': 'write_file', 'path': path, 'content': content}
+        if mode is not None:
+            change['mode'] = mode
+        self._changes[path] = change
+
+    def delete(self, path):
+        """Remove path if it exists."""
+        path = str(path)
+        self._changes.pop(path, None)
+        if os.path.lexists(path):
+            self._changes[path] = {'op': 'unlink', 'path': path}
+
+    def chmod(self, path, mode: int):
+        """Set the permission bits of path, if it exists and differs."""
+        path = str(path)
+        try:
+            current = os.stat(path).st_mode & 0o7777
+        except OSError:
+            return
+        self._modes = [change for change in self._modes if change['path'] != path]
+        if current != mode:
+            self._modes.append({'op': 'chmod', 'path': path, 'mode': mode})
+
+    def set_executable(self, path, executable: bool):
+        """Add or remove the execute bits of path."""
+        try:
+            mode = os.stat(str(path)).st_mode & 0o7777
+        except OSError:
+            return
+        self.chmod(path, mode | 0o111 if executable else mode & ~0o111)
+
+    def commit(self) -> bool:
+        """
+        Apply every change, or none of them.
+
+        Returns:
+            True if the changes were applied (or there was nothing to do)
+        """
+        changes = self.changes
+        if not changes:
+            return True
+        result = self._run_privileged([{'op': 'transaction', 'changes': changes}])
+        if not result['ok']:
+            log_error(_("Failed to apply changes, nothing was modified: {err}").format(err=result['error']))
+            return False
+        for change in changes:
+            log_info(_("Applied {op} to {path}").format(op=change['op'], path=change['path']))
+        self._changes = {}
+        self._modes = []
+        return True
@@ -0,0 +1,94 @@
+"""
+Background update-grub runner for Soplos Grub Editor.
+Runs GrubManager.update_grub() on a worker thread so the UI stays
+responsive while grub-mkconfig works, and allows cancelling the run.
+"""
+
+import threading
+from typing import Callable, Optional
+
+from utils.logger import log_error
+from core.i18n_manager import _
+
+
+class UpdateGrubTask:
+    """
+    Runs update-grub on a worker thread, streaming its progress.
+
+    Callbacks are passed through ``dispatch`` before being invoked, so GUI
+    callers can marshal them onto their main loop (e.g. with GLib.idle_add).
+    Without a dispatcher they are called directly from the worker thread.
+    """
+
+    def __init__(self, grub_manager,
+                 on_progress: Optional[Callable[[str, float], None]] = None,
+                 on_finished: Optional[Callable[[bool, bool], None]] = None,
+                 dispatch: Optional[Callable] = None,
+                 rescan_os: bool = False):
+        """
+        Initialize the task.
+
+        Args:
+            grub_manager: GrubManager used to run update-grub
+            on_progress: Called with (line, fraction) for every output line
+            on_finished: Called with (success, cancelled) once the run ends
+            dispatch: Called as dispatch(callback, *args) to deliver callbacks
+            rescan_os: Ignore cached os-prober results
+        """
+        self.grub_manager = grub_manager
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.dispatch = dispatch
+        self.rescan_os = rescan_os
+        self._cancel_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker thread is still running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() was requested."""
+        return self._cancel_event.is_set()
+
+    def start(self):
+        """Start update-grub on a worker thread."""
+        if self.running:
+            return
+        self._cancel_event.clear()
+        self._thread = threading.Thread(target=self._run, name='update-grub', daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> bool:
+        """
+        Request cancellation of the running update.
+
+        Returns:
+            True if the running process was signalled
+        """
+        self._cancel_event.set()
+        return self.grub_manager.cancel_update()
+
+    def _run(self):
+        """Worker thread body."""
+        success = False
+        try:
+            success = self.grub_manager.update_grub(progress=self._emit_progress,
+                                                    cancellable=self._cancel_event,
+                                                    rescan_os=self.rescan_os)
+        except Exception as e:
+            log_error(_("Error running update-grub: {err}").format(err=e))
+        self._emit(self.on_finished, success, self.cancelled and not success)
+
+    def _emit_progress(self, line: str, fraction: float):
+        self._emit(self.on_progress, line, fraction)
+
+    def _emit(self, callback, *args):
+        if callback is None:
+            return
+        if self.dispatch is not None:
+            self.dispatch(callback, *args)
+        else:
+            callback(*args)
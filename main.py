@@ -12,11 +12,42 @@ from pathlib import Path
 # Add the project root to PYTHONPATH
 PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT))
+
+# Running a development checkout as root would leave root-owned
+# __pycache__ directories in it: keep root's bytecode under /var/cache.
+# Installed packages are precompiled.
+if os.geteuid() == 0 and sys.pycache_prefix is None and PROJECT_ROOT.stat().st_uid != 0:
+    # The modules needed to learn the location must not be cached either
+    write_bytecode, sys.dont_write_bytecode = not sys.dont_write_bytecode, True
+    from core.state import ROOT_PYCACHE_PREFIX
+    sys.dont_write_bytecode = not write_bytecode
+    sys.pycache_prefix = str(ROOT_PYCACHE_PREFIX)
+
 from core.i18n_manager import _
 
+LAZY_ELEVATION_FLAG = '--lazy-elevation'
+
+
+def lazy_elevation_requested(argv) -> bool:
+    """Whether the UI should start unprivileged and elevate only to write."""
+    if LAZY_ELEVATION_FLAG in argv:
+        return True
+    return os.environ.get('SOPLOS_LAZY_ELEVATION', '').lower() in ('1', 'true', 'yes')
+
+
 # Minimal main: elevate if needed, seed session info, then run application
 def main():
-    if os.geteuid() != 0:
+    from core.cli import COMMANDS
+    if any(arg in COMMANDS for arg in sys.argv[1:]):
+        # Command-line interface (options may come first, e.g. "--json get"):
+        # runs as the calling user and never loads GTK
+        from core.cli import run_cli
+        return run_cli(sys.argv[1:])
+
+    lazy = lazy_elevation_requested(sys.argv[1:])
+    argv = [arg for arg in sys.argv if arg != LAZY_ELEVATION_FLAG]
+
+    if os.geteuid() != 0 and not lazy:
         import subprocess
         import pwd
         import json
@@ -39,69 +70,40 @@ def main():
         real_user = pwd.getpwuid(os.getuid()).pw_name
         env_vars.append(f"SUDO_USER={real_user}")   
 
-        # Initialize variables to avoid UnboundLocalError
-        user_desktop = ''
-        session_type = ''
-        theme_type = ''
-        gtk_theme = ''
-
-        # Pre-elevation detection: Determine environment to pass to root
+        # Pre-elevation detection: environment variables and settings files
+        # only (no GTK, no subprocess), handed over complete so the elevated
+        # process does not detect again
         try:
-            # Add current directory to path to allow imports
-            sys.path.insert(0, str(Path(__file__).parent))
             from core.environment import EnvironmentDetector
-            
+
             detector = EnvironmentDetector()
-            detector.detect_all()
-            
-            if detector.desktop_environment:
-                user_desktop = detector.desktop_environment.value
-                env_vars.append(f"SOPLOS_DESKTOP={user_desktop}")
-            if detector.display_protocol:
-                session_type = detector.display_protocol.value
-                env_vars.append(f"SOPLOS_SESSION_TYPE={session_type}")
-            if detector.theme_type:
-                theme_type = detector.theme_type.value
-                env_vars.append(f"SOPLOS_THEME_TYPE={theme_type}")
-            if detector.gtk_theme_name:
-                gtk_theme = detector.gtk_theme_name
-                env_vars.append(f"GTK_THEME={gtk_theme}")
-                
+            detector.detect_launcher()
+            handoff = detector.handoff_environment()
         except Exception as e:
             print(_("Warning: Pre-elevation detection failed: {}").format(e))
-            # Fallback to existing env vars if detection fails
-            user_desktop = os.environ.get('XDG_CURRENT_DESKTOP', '')
-            session_type = os.environ.get('XDG_SESSION_TYPE', '')
-            theme_type = os.environ.get('SOPLOS_THEME_TYPE', '')
-            gtk_theme = os.environ.get('GTK_THEME', '')
-            
-            if user_desktop:
-                env_vars.append(f"SOPLOS_DESKTOP={user_desktop}")
-            if session_type:
-                env_vars.append(f"SOPLOS_SESSION_TYPE={session_type}")
-            if theme_type:
-                env_vars.append(f"SOPLOS_THEME_TYPE={theme_type}")
-            if gtk_theme:
-                env_vars.append(f"GTK_THEME={gtk_theme}")
+            # Fallback to existing env vars; the elevated process detects again
+            handoff = {
+                'SOPLOS_DESKTOP': os.environ.get('XDG_CURRENT_DESKTOP', ''),
+                'SOPLOS_SESSION_TYPE': os.environ.get('XDG_SESSION_TYPE', ''),
+                'SOPLOS_THEME_TYPE': os.environ.get('SOPLOS_THEME_TYPE', ''),
+                'GTK_THEME': os.environ.get('GTK_THEME', ''),
+            }
+        for name, value in handoff.items():
+            if value:
+                env_vars.append(f"{name}={value}")
 
         # Write session JSON for elevated process to consume (secondary mechanism)
         env_file_path = None
         run_user_dir = f"/run/user/{os.getuid()}"
-        data = {
-            'SOPLOS_DESKTOP': user_desktop,
-            'SOPLOS_SESSION_TYPE': session_type,
-            'SOPLOS_THEME_TYPE': theme_type or '',
-            'GTK_THEME': gtk_theme or '',
-        }
         try:
             if os.path.isdir(run_user_dir):
                 env_file_path = os.path.join(run_user_dir, f'soplos_env_{real_user}.json')
                 with open(env_file_path, 'w', encoding='utf-8') as ef:
-                    json.dump(data, ef)
+                    json.dump(handoff, ef)
             else:
                 with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as ef:
                     env_file_path = ef.name
-                    json.dump(data, ef)
+                    json.dump(handoff, ef)
         except Exception:
             env_file_path = None
 
@@ -123,17 +125,18 @@ def main():
 
         script_path = str(Path(__file__).resolve())
         pkexec_path = shutil.which('pkexec') or 'pkexec'
-        cmd = [pkexec_path, 'env'] + env_vars + [sys.executable, script_path]
+        cmd = [pkexec_path, 'env'] + env_vars + [sys.executable, script_path] + argv[1:]
         try:
             return subprocess.run(cmd).returncode
         except Exception as e:
             print(_("Failed to elevate privileges: {}").format(e))
             return 1
 
-    # Run application as normal user/root
+    # Run application as normal user/root. When started unprivileged
+    # (lazy elevation), GrubManager asks pkexec for each write instead.
     try:
         from core.application import run_application
-        return run_application()
+        return run_application(argv)
     except ImportError as e:
         print(_("Import error: {}").format(e))
         print(_("Ensure dependencies are installed: sudo apt install python3-gi python3-gi-cairo gir1.2-gtk-3.0"))
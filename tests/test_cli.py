@@ -0,0 +1,91 @@
+"""Tests for the command-line interface (argument handling only)."""
+
+import argparse
+
+import pytest
+
+from core import cli
+
+
+class FakeManager:
+    def __init__(self, config=None):
+        self.config = dict(config or {})
+        self.custom_settings = {'color_normal': 'white/black'}
+        self.saved = []
+
+    def save_config(self, values):
+        self.saved.append(values)
+        return True
+
+    def save_custom_ui_settings(self, background, normal, highlight):
+        self.saved.append((background, normal, highlight))
+        return True
+
+
+def parse(*argv):
+    return cli.build_parser().parse_args(list(argv))
+
+
+@pytest.mark.parametrize('argv', [('--json', 'get'), ('get', '--json'), ('--json', 'get', '-q')])
+def test_output_options_before_or_after_command(argv):
+    args = parse(*argv)
+    assert args.json is True
+    assert args.quiet == ('-q' in argv)
+
+
+def test_output_options_default_off():
+    args = parse('update')
+    assert args.json is False and args.quiet is False
+
+
+def test_commands_match_parser():
+    parser = cli.build_parser()
+    subparsers = next(action for action in parser._actions
+                      if isinstance(action, argparse._SubParsersAction))
+    assert set(subparsers.choices) == cli.COMMANDS
+
+
+def test_set_rejects_empty_value():
+    manager = FakeManager()
+    with pytest.raises(cli.CommandError) as error:
+        cli.cmd_set(manager, parse('set', 'GRUB_TIMEOUT=5', 'GRUB_THEME='))
+    assert error.value.code == cli.EXIT_USAGE
+    assert manager.saved == []
+
+
+def test_set_keeps_value_with_equals_sign():
+    manager = FakeManager()
+    cli.cmd_set(manager, parse('set', 'GRUB_CMDLINE_LINUX=root=/dev/sda1'))
+    assert manager.saved == [{'GRUB_CMDLINE_LINUX': 'root=/dev/sda1'}]
+
+
+def test_set_background_without_image_keeps_background():
+    manager = FakeManager({'GRUB_BACKGROUND': '/boot/grub/bg.png'})
+    result = cli.cmd_set_background(manager, parse('set-background', '--highlight', 'black/white'))
+    assert manager.saved == [('/boot/grub/bg.png', 'white/black', 'black/white')]
+    assert result['background'] == '/boot/grub/bg.png'
+
+
+def test_set_background_clear():
+    manager = FakeManager({'GRUB_BACKGROUND': '/boot/grub/bg.png'})
+    cli.cmd_set_background(manager, parse('set-background', '--clear'))
+    assert manager.saved == [('', 'white/black', '')]
+
+
+def test_set_background_image_and_clear_conflict(tmp_path):
+    image = tmp_path / 'bg.png'
+    image.write_bytes(b'')
+    with pytest.raises(cli.CommandError) as error:
+        cli.cmd_set_background(FakeManager(), parse('set-background', str(image), '--clear'))
+    assert error.value.code == cli.EXIT_USAGE
+
+
+def test_set_background_missing_image(tmp_path):
+    with pytest.raises(cli.CommandError) as error:
+        cli.cmd_set_background(FakeManager(), parse('set-background', str(tmp_path / 'none.png')))
+    assert error.value.code == cli.EXIT_NOT_FOUND
+
+
+def test_usage_errors_exit_2(capsys):
+    assert cli.run_cli(['set']) == cli.EXIT_USAGE
+    assert cli.run_cli([]) == cli.EXIT_USAGE
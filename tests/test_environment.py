@@ -0,0 +1,141 @@
+"""Tests for session detection from /proc and /run, on fixture trees."""
+
+import os
+import pwd
+
+import pytest
+
+from core import environment
+from core.environment import (DesktopEnvironment, DisplayProtocol, EnvironmentDetector,
+                              read_sessions, running_processes)
+
+DETECTION_VARIABLES = (
+    'SOPLOS_DESKTOP', 'SOPLOS_SESSION_TYPE', 'SOPLOS_ENVIRONMENT', 'SOPLOS_ENV_FILE',
+    'XDG_CURRENT_DESKTOP', 'XDG_SESSION_DESKTOP', 'DESKTOP_SESSION', 'XDG_SESSION_TYPE',
+    'WAYLAND_DISPLAY', 'DISPLAY', 'SUDO_USER', 'GTK_THEME',
+)
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    for name in DETECTION_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+    # Keep theme detection away from GTK and the user's settings files
+    monkeypatch.setenv('SOPLOS_THEME_TYPE', 'light')
+
+
+def make_proc(root, processes):
+    proc = root / 'proc'
+    proc.mkdir()
+    (proc / 'self').mkdir()
+    (proc / 'cpuinfo').write_text('')
+    for pid, comm in processes.items():
+        (proc / str(pid)).mkdir()
+        (proc / str(pid) / 'comm').write_text(comm + '\n')
+    return str(proc)
+
+
+def make_sessions(root, records):
+    sessions = root / 'sessions'
+    sessions.mkdir()
+    for session_id, fields in records.items():
+        lines = ['# This is private data. Do not parse.']
+        lines += [f'{key}={value}' for key, value in fields.items()]
+        (sessions / session_id).write_text('\n'.join(lines) + '\n')
+    (sessions / '2.ref').write_text('')
+    return str(sessions)
+
+
+def test_running_processes(tmp_path):
+    proc = make_proc(tmp_path, {1: 'systemd', 812: 'plasmashell', 990: 'bash'})
+    assert running_processes(['plasmashell', 'gnome-shell'], proc) == {'plasmashell'}
+
+
+def test_running_processes_matches_truncated_comm(tmp_path):
+    proc = make_proc(tmp_path, {42: 'xfce4-power-man'})
+    assert running_processes(['xfce4-power-manager'], proc) == {'xfce4-power-manager'}
+
+
+def test_running_processes_without_proc(tmp_path):
+    assert running_processes(['gnome-shell'], str(tmp_path / 'none')) == set()
+
+
+def test_read_sessions(tmp_path):
+    sessions = make_sessions(tmp_path, {
+        '2': {'USER': 'ana', 'STATE': 'active', 'TYPE': 'wayland'},
+        '5': {'USER': 'root', 'STATE': 'online', 'TYPE': 'tty'},
+    })
+    records = read_sessions(sessions_dir=sessions)
+    assert [record['ID'] for record in records] == ['2', '5']
+    assert read_sessions('ana', sessions) == [
+        {'ID': '2', 'USER': 'ana', 'STATE': 'active', 'TYPE': 'wayland'}]
+
+
+def test_desktop_from_processes(tmp_path, clean_env):
+    detector = EnvironmentDetector(proc_dir=make_proc(tmp_path, {700: 'gnome-shell'}))
+    assert detector.detect_all()['desktop_environment'] == 'gnome'
+
+
+def test_desktop_variable_wins_over_processes(tmp_path, clean_env, monkeypatch):
+    monkeypatch.setenv('XDG_CURRENT_DESKTOP', 'KDE')
+    detector = EnvironmentDetector(proc_dir=make_proc(tmp_path, {700: 'gnome-shell'}))
+    assert detector.desktop_environment is DesktopEnvironment.KDE
+
+
+def test_launcher_detection_reads_no_processes(tmp_path, clean_env):
+    detector = EnvironmentDetector(proc_dir=make_proc(tmp_path, {700: 'gnome-shell'}))
+    assert detector.detect_launcher()['desktop_environment'] == 'unknown'
+
+
+@pytest.fixture
+def elevated(clean_env, monkeypatch):
+    """Pretend to run as root for the calling user; returns that user."""
+    user = pwd.getpwuid(os.getuid())
+    monkeypatch.setattr(environment.os, 'geteuid', lambda: 0)
+    monkeypatch.setenv('SUDO_USER', user.pw_name)
+    return user
+
+
+def test_display_from_active_session(tmp_path, elevated):
+    sessions = make_sessions(tmp_path, {
+        '3': {'USER': elevated.pw_name, 'STATE': 'closing', 'TYPE': 'x11'},
+        '4': {'USER': elevated.pw_name, 'STATE': 'active', 'TYPE': 'wayland'},
+    })
+    detector = EnvironmentDetector(sessions_dir=sessions, run_user_dir=str(tmp_path / 'run'))
+    assert detector.display_protocol is DisplayProtocol.WAYLAND
+
+
+def test_display_from_wayland_socket(tmp_path, elevated):
+    runtime = tmp_path / 'run' / str(elevated.pw_uid)
+    runtime.mkdir(parents=True)
+    (runtime / 'wayland-0').write_text('')
+    detector = EnvironmentDetector(sessions_dir=str(tmp_path / 'none'),
+                                   run_user_dir=str(tmp_path / 'run'))
+    assert detector.display_protocol is DisplayProtocol.WAYLAND
+
+
+def test_display_unknown_without_records(tmp_path, elevated):
+    detector = EnvironmentDetector(sessions_dir=str(tmp_path / 'none'),
+                                   run_user_dir=str(tmp_path / 'run'))
+    assert detector.display_protocol is DisplayProtocol.UNKNOWN
+
+
+def test_handoff_round_trip(tmp_path, clean_env, monkeypatch):
+    monkeypatch.setenv('XDG_CURRENT_DESKTOP', 'XFCE')
+    monkeypatch.setenv('XDG_SESSION_TYPE', 'x11')
+    launcher = EnvironmentDetector(proc_dir=make_proc(tmp_path, {}))
+    launcher.detect_launcher()
+    handoff = launcher.handoff_environment()
+
+    for name in DETECTION_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('SOPLOS_ENVIRONMENT', handoff['SOPLOS_ENVIRONMENT'])
+    elevated = EnvironmentDetector(proc_dir=str(tmp_path / 'none'))
+    assert dict(elevated.detect_all()) == dict(launcher.detect_all())
+    assert elevated.detect_all()['display_protocol'] == 'x11'
+
+
+def test_invalid_handoff_is_ignored():
+    detector = EnvironmentDetector()
+    assert not detector.load_json('{"desktop_environment": "beos"}')
+    assert not detector.load_json('not json')
@@ -0,0 +1,44 @@
+"""Tests for the grub.cfg generation stamp."""
+
+import os
+
+import pytest
+
+from core import generation_state
+from core.generation_state import GenerationState, output_signature
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.setattr(generation_state, 'get_state_dir', lambda: tmp_path / 'state')
+    grub_cfg = tmp_path / 'grub.cfg'
+    grub_cfg.write_text('menuentry "Debian" {}\nmenuentry "Windows" {}\n')
+    return GenerationState(str(grub_cfg))
+
+
+def rewrite(path, content):
+    stat = os.stat(path)
+    with open(path, 'w') as f:
+        f.write(content)
+    # Distinct mtime even on filesystems with coarse timestamps
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_filtered_grub_cfg_keeps_updates_incremental(state):
+    state.record(config={'GRUB_TIMEOUT': '5'})
+    previous = output_signature(state.grub_cfg)
+    rewrite(state.grub_cfg, 'menuentry "Debian" {}\n')
+    assert state.changed_inputs() is None
+
+    assert state.refresh_output(previous)
+    stamp, _changed = state.changed_inputs()
+    assert stamp['config'] == {'GRUB_TIMEOUT': '5'}
+
+
+def test_refresh_ignores_grub_cfg_the_stamp_does_not_describe(state):
+    state.record(config={})
+    rewrite(state.grub_cfg, 'menuentry "Other tool" {}\n')
+    previous = output_signature(state.grub_cfg)
+    rewrite(state.grub_cfg, '')
+    assert not state.refresh_output(previous)
+    assert state.changed_inputs() is None
@@ -0,0 +1,122 @@
+"""Tests for the grub.cfg parser and the entry filter."""
+
+from core.grub_cfg_parser import (PUBLIC_FIELDS, MenuEntry, build_menu_index, filter_grub_cfg,
+                                  parse_grub_cfg)
+
+GRUB_CFG = """\
+### BEGIN /etc/grub.d/00_header ###
+set default="0"
+if [ "${next_entry}" ] ; then
+   set default="${next_entry}"
+fi
+function load_video {
+  insmod all_video
+}
+### END /etc/grub.d/00_header ###
+
+### BEGIN /etc/grub.d/10_linux ###
+menuentry 'Debian GNU/Linux' --class debian --class gnu-linux --class os $menuentry_id_option 'gnulinux-simple-1234' {
+	load_video
+	linux	/boot/vmlinuz-6.1.0-13-amd64 root=UUID=1234 ro  quiet
+	initrd	/boot/initrd.img-6.1.0-13-amd64
+}
+submenu 'Advanced options for Debian GNU/Linux' $menuentry_id_option 'gnulinux-advanced-1234' {
+	menuentry 'Debian GNU/Linux, with Linux 6.1.0-13-amd64' --class debian $menuentry_id_option 'gnulinux-6.1.0-13-amd64-advanced-1234' {
+		linux	/boot/vmlinuz-6.1.0-13-amd64 root=UUID=1234 ro  quiet
+		initrd	/boot/intel-ucode.img /boot/initrd.img-6.1.0-13-amd64
+	}
+	menuentry 'Debian GNU/Linux, with Linux 6.1.0-13-amd64 (recovery mode)' --class debian $menuentry_id_option 'gnulinux-6.1.0-13-amd64-recovery-1234' {
+		linux	/boot/vmlinuz-6.1.0-13-amd64 root=UUID=1234 ro single
+	}
+}
+### END /etc/grub.d/10_linux ###
+
+### BEGIN /etc/grub.d/30_uefi-firmware ###
+menuentry "UEFI Firmware Settings" --id 'uefi-firmware' {
+	fwsetup
+}
+### END /etc/grub.d/30_uefi-firmware ###
+"""
+
+NAMES = [
+    'Debian GNU/Linux',
+    'Advanced options for Debian GNU/Linux>Debian GNU/Linux, with Linux 6.1.0-13-amd64',
+    'Advanced options for Debian GNU/Linux>Debian GNU/Linux, with Linux 6.1.0-13-amd64 (recovery mode)',
+    'UEFI Firmware Settings',
+]
+
+
+def parse(content):
+    return parse_grub_cfg('/boot/grub/grub.cfg', content)
+
+
+def test_parse_entries():
+    entries = parse(GRUB_CFG)
+    assert [entry.name for entry in entries] == NAMES
+    first = entries[0]
+    assert first.title == 'Debian GNU/Linux'
+    assert first.id == 'gnulinux-simple-1234'
+    assert first.classes == ['debian', 'gnu-linux', 'os']
+    assert first.linux == '/boot/vmlinuz-6.1.0-13-amd64'
+    assert first.args == 'root=UUID=1234 ro quiet'
+    assert first.initrd == ['/boot/initrd.img-6.1.0-13-amd64']
+    assert entries[1].initrd == ['/boot/intel-ucode.img', '/boot/initrd.img-6.1.0-13-amd64']
+    assert [entry.type for entry in entries] == ['system', 'system', 'recovery', 'firmware']
+    assert entries[3].id == 'uefi-firmware'
+
+
+def test_parse_quoting_and_braces():
+    content = ("menuentry \"Say \\\"hi\\\"\" --id=quoted { linux /vmlinuz a='b c' ; }\n"
+               "menuentry 'Two\nlines' {\n}\n"
+               "menuentry 'a{b}' { true; }\n")
+    entries = parse(content)
+    assert [entry.title for entry in entries] == ['Say "hi"', 'Two\nlines', 'a{b}']
+    assert entries[0].id == 'quoted'
+    assert entries[0].args == 'a=b c'
+
+
+def test_parse_follows_source(tmp_path):
+    (tmp_path / 'custom.cfg').write_text("menuentry 'Custom' {\n}\n")
+    (tmp_path / 'grub.cfg').write_text("menuentry 'Main' {\n}\n"
+                                       "source ${config_directory}/custom.cfg\n"
+                                       "source ${config_directory}/grub.cfg\n"
+                                       "source ${config_directory}/missing.cfg\n")
+    entries = parse_grub_cfg(str(tmp_path / 'grub.cfg'))
+    assert [entry.title for entry in entries] == ['Main', 'Custom']
+
+
+def filtered(hidden):
+    return ''.join(filter_grub_cfg(GRUB_CFG.splitlines(keepends=True), set(hidden)))
+
+
+def test_filter_nothing_hidden():
+    assert filtered([]) == GRUB_CFG
+
+
+def test_filter_by_id_and_name():
+    content = filtered(['gnulinux-6.1.0-13-amd64-recovery-1234', 'UEFI Firmware Settings'])
+    assert [entry.name for entry in parse(content)] == NAMES[:2]
+    assert 'fwsetup' not in content and 'single' not in content
+    # Everything else is kept byte for byte
+    assert '### END /etc/grub.d/30_uefi-firmware ###\n' in content
+    assert 'function load_video {\n  insmod all_video\n}\n' in content
+
+
+def test_filter_keeps_submenu_structure():
+    content = filtered(['gnulinux-6.1.0-13-amd64-advanced-1234'])
+    assert [entry.name for entry in parse(content)] == [NAMES[0], NAMES[2], NAMES[3]]
+    assert content.count('{') == content.count('}')
+
+
+def test_filter_multiline_title():
+    content = "menuentry 'Two\nlines' --id two {\n\tlinux /vmlinuz\n}\nmenuentry 'Kept' {\n}\n"
+    assert ''.join(filter_grub_cfg(content.splitlines(keepends=True), {'two'})) == \
+        "menuentry 'Kept' {\n}\n"
+
+
+def test_public_menu_index_has_no_kernel_arguments():
+    index = build_menu_index([1, 2, None], parse(GRUB_CFG), PUBLIC_FIELDS)
+    assert all(set(entry) == set(PUBLIC_FIELDS) for entry in index['entries'])
+    restored = [MenuEntry.from_dict(entry) for entry in index['entries']]
+    assert [entry.name for entry in restored] == NAMES
+    assert restored[0].args == ''
@@ -0,0 +1,116 @@
+"""Round-trip tests for the /etc/default/grub document model."""
+
+from core import grub_config
+from core.grub_config import EDITOR_MARKER, GrubDefaultDocument
+from core.shell_eval import evaluate
+
+
+def values(document):
+    result = evaluate(document.serialize())
+    assert result.complete
+    return result.values
+
+
+def test_untouched_file_round_trips():
+    text = ('# GRUB settings\n'
+            'GRUB_DEFAULT=0\n'
+            '#GRUB_TERMINAL=console\n'
+            '\n'
+            'export GRUB_CMDLINE_LINUX_DEFAULT="quiet \\\n  splash"  # boot\n'
+            "GRUB_DISTRIBUTOR='Soplos\n"
+            "Linux'\n"
+            'GRUB_TIMEOUT=5')
+    assert GrubDefaultDocument(text).serialize() == text
+
+
+def test_set_replaces_backslash_continuation():
+    document = GrubDefaultDocument('GRUB_CMDLINE_LINUX_DEFAULT="quiet \\\nsplash"\n'
+                                   'GRUB_TIMEOUT=5\n')
+    document.set('GRUB_CMDLINE_LINUX_DEFAULT', 'quiet')
+    assert document.serialize() == 'GRUB_CMDLINE_LINUX_DEFAULT=quiet\nGRUB_TIMEOUT=5\n'
+    assert values(document) == {'GRUB_CMDLINE_LINUX_DEFAULT': 'quiet', 'GRUB_TIMEOUT': '5'}
+
+
+def test_set_replaces_quoted_newline():
+    document = GrubDefaultDocument('GRUB_CMDLINE_LINUX="a\nb"\nGRUB_TIMEOUT=5\n')
+    document.set('GRUB_CMDLINE_LINUX', 'c d')
+    assert document.serialize() == 'GRUB_CMDLINE_LINUX="c d"\nGRUB_TIMEOUT=5\n'
+
+
+def test_unset_removes_whole_span():
+    document = GrubDefaultDocument("GRUB_BACKGROUND='/a\n/b'\nGRUB_TIMEOUT=5\n")
+    assert document.unset('GRUB_BACKGROUND')
+    assert document.serialize() == 'GRUB_TIMEOUT=5\n'
+
+
+def test_comment_multiline_assignment():
+    document = GrubDefaultDocument('GRUB_CMDLINE_LINUX="a\nb"\nGRUB_TIMEOUT=5\n')
+    assert document.comment('GRUB_CMDLINE_LINUX')
+    assert values(document) == {'GRUB_TIMEOUT': '5'}
+    document.set('GRUB_CMDLINE_LINUX', 'quiet')
+    assert values(document)['GRUB_CMDLINE_LINUX'] == 'quiet'
+
+
+def test_set_keeps_export_indentation_and_comment():
+    document = GrubDefaultDocument('  export GRUB_TIMEOUT=5 # seconds\n')
+    document.set('GRUB_TIMEOUT', '10')
+    assert document.serialize() == '  export GRUB_TIMEOUT=10 # seconds\n'
+    assert evaluate(document.serialize()).provenance['GRUB_TIMEOUT'].exported
+
+
+def test_set_quotes_values():
+    document = GrubDefaultDocument('GRUB_CMDLINE_LINUX_DEFAULT=quiet\n')
+    document.set('GRUB_CMDLINE_LINUX_DEFAULT', 'quiet splash $x "y"')
+    assert values(document)['GRUB_CMDLINE_LINUX_DEFAULT'] == 'quiet splash $x "y"'
+
+
+def test_set_is_noop_on_effective_value_with_duplicates():
+    text = 'GRUB_TIMEOUT=3\nGRUB_TIMEOUT="5"\n'
+    document = GrubDefaultDocument(text)
+    document.set('GRUB_TIMEOUT', '5')
+    assert document.serialize() == text
+
+
+def test_set_collapses_duplicates():
+    document = GrubDefaultDocument('GRUB_TIMEOUT=3\n# keep\nGRUB_TIMEOUT="5"\n')
+    document.set('GRUB_TIMEOUT', '7')
+    assert document.serialize() == 'GRUB_TIMEOUT=7\n# keep\n'
+
+
+def test_set_uncomments_commented_assignment():
+    document = GrubDefaultDocument('#GRUB_GFXMODE=640x480\n')
+    document.set('GRUB_GFXMODE', '1024x768')
+    assert document.serialize() == 'GRUB_GFXMODE=1024x768\n'
+
+
+def test_set_appends_after_marker():
+    document = GrubDefaultDocument('GRUB_DEFAULT=0')
+    document.set('GRUB_TIMEOUT', '5')
+    document.set('GRUB_FONT', '/boot/grub/fonts/a b.pf2')
+    assert document.serialize() == ('GRUB_DEFAULT=0\n\n' + EDITOR_MARKER + '\n'
+                                    'GRUB_TIMEOUT=5\n'
+                                    'GRUB_FONT="/boot/grub/fonts/a b.pf2"\n')
+    assert values(GrubDefaultDocument(document.serialize()))['GRUB_FONT'] == \
+        '/boot/grub/fonts/a b.pf2'
+
+
+def test_set_is_noop_on_value_built_from_other_variables():
+    text = 'BASE="quiet"\nGRUB_CMDLINE_LINUX_DEFAULT="$BASE splash"\n'
+    document = GrubDefaultDocument(text)
+    document.set('GRUB_CMDLINE_LINUX_DEFAULT', 'quiet splash')
+    assert document.serialize() == text
+
+    document.set('BASE', 'nomodeset')
+    document.set('GRUB_CMDLINE_LINUX_DEFAULT', 'quiet splash')
+    assert values(document)['GRUB_CMDLINE_LINUX_DEFAULT'] == 'quiet splash'
+
+
+def test_set_literal_value_does_not_evaluate_the_document(monkeypatch):
+    document = GrubDefaultDocument(''.join(f'GRUB_KEY_{i}={i}\n' for i in range(500)))
+    evaluated = []
+    real_evaluate = grub_config.evaluate
+    monkeypatch.setattr(grub_config, 'evaluate',
+                        lambda text: evaluated.append(text) or real_evaluate(text))
+    for i in range(500):
+        document.set(f'GRUB_KEY_{i}', str(i))
+    assert all(text.count('\n') == 1 for text in evaluated)
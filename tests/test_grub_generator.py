@@ -0,0 +1,71 @@
+"""Tests for the incremental regeneration planner and grub.cfg sections."""
+
+from core.grub_generator import (GRUB_CFG_PREAMBLE, plan_incremental, render_sections,
+                                 split_sections)
+
+D = '/etc/grub.d/'
+SCRIPTS = [D + name for name in ('00_header', '05_debian_theme', '10_linux', '20_linux_xen',
+                                 '30_os-prober', '30_uefi-firmware', '40_custom', '41_custom')]
+UNTRACKED = {D + '30_os-prober', D + '30_uefi-firmware'}
+
+
+def plan(changed, old=None, new=None):
+    return plan_incremental(changed, old or {}, new or {}, SCRIPTS)
+
+
+def test_header_key_reruns_header_and_untracked_generators():
+    assert plan(['/etc/default/grub'], {'GRUB_TIMEOUT': '5'}, {'GRUB_TIMEOUT': '10'}) == \
+        {D + '00_header'} | UNTRACKED
+
+
+def test_theme_key_reruns_theme_scripts():
+    result = plan(['/etc/default/grub'], {}, {'GRUB_THEME': '/boot/grub/themes/x/theme.txt'})
+    assert {D + '00_header', D + '05_debian_theme'} <= result
+
+
+def test_cmdline_reruns_linux_generators():
+    result = plan(['/etc/default/grub'], {'GRUB_CMDLINE_LINUX': ''},
+                  {'GRUB_CMDLINE_LINUX': 'quiet'})
+    assert result == {D + '10_linux', D + '20_linux_xen'} | UNTRACKED
+
+
+def test_new_kernel_reruns_linux_generators():
+    assert D + '10_linux' in plan(['/boot/vmlinuz-6.1.0-13-amd64'])
+
+
+def test_savedefault_forces_full_regeneration():
+    # save_default_entry runs inside every script writing menu entries
+    assert plan(['/etc/default/grub'], {}, {'GRUB_SAVEDEFAULT': 'true'}) is None
+
+
+def test_unknown_key_forces_full_regeneration():
+    assert plan(['/etc/default/grub'], {}, {'GRUB_ENABLE_CRYPTODISK': 'y'}) is None
+
+
+def test_nothing_changed_forces_full_regeneration():
+    assert plan([]) is None
+    assert plan(['/etc/default/grub'], {'GRUB_TIMEOUT': '5'}, {'GRUB_TIMEOUT': '5'}) is None
+    # custom.cfg is read at boot time: nothing to re-run, so a full run
+    assert plan(['/boot/grub/custom.cfg']) is None
+
+
+def test_changed_script_layout_forces_full_regeneration():
+    assert plan([D + '15_new']) is None
+    assert plan([D + '40_custom']) == {D + '40_custom'} | UNTRACKED
+
+
+def test_unknown_path_forces_full_regeneration():
+    assert plan(['/etc/os-release']) is None
+
+
+def test_sections_round_trip():
+    sections = [(D + '00_header', 'set timeout=5\n'), (D + '10_linux', 'menuentry "A" {\n}\n'),
+                (D + '40_custom', '')]
+    content = render_sections(GRUB_CFG_PREAMBLE, sections)
+    assert split_sections(content) == (GRUB_CFG_PREAMBLE, sections)
+
+
+def test_split_sections_rejects_other_layouts():
+    content = render_sections(GRUB_CFG_PREAMBLE, [(D + '00_header', 'x\n')])
+    assert split_sections(content + 'trailing\n') is None
+    assert split_sections('menuentry "A" {\n}\n') is None
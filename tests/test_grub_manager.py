@@ -0,0 +1,116 @@
+"""Tests for GrubManager helpers that need no GRUB installation."""
+
+import os
+import stat
+
+import pytest
+
+from core import grub_manager
+from core.grub_cfg_parser import MenuEntry
+from core.grub_manager import GrubManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(grub_manager, 'get_cache_dir', lambda: tmp_path / 'cache')
+    monkeypatch.setattr(GrubManager, 'GRUB_CFG_PATH', str(tmp_path / 'boot' / 'grub.cfg'))
+    # Only the menu index helpers are exercised: skip reading the system
+    return GrubManager.__new__(GrubManager)
+
+
+def test_private_menu_index_is_owner_only(manager, tmp_path):
+    entry = MenuEntry('Debian', 'Debian', 'gnulinux-simple')
+    entry.args = 'root=UUID=1234 ro cryptdevice=/dev/sda2:root'
+    manager._save_menu_index([10, 20, 'digest'], [entry])
+
+    path = tmp_path / 'cache' / 'menu-index.json'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    loaded = manager._load_menu_index([10, 20])
+    assert loaded['entries'][0].args == entry.args
+
+
+def test_menu_index_paths_skip_other_users_cache(manager, tmp_path):
+    assert manager._menu_index_paths() == [tmp_path / 'cache' / 'menu-index.json']
+    assert manager._menu_index_paths(public=True) == [
+        tmp_path / 'cache' / 'menu-index.json',
+        tmp_path / 'boot' / 'menu-index.json',
+    ]
+
+
+D = '/etc/grub.d/'
+SCRIPTS = [D + name for name in ('00_header', '10_linux', '30_os-prober', '30_uefi-firmware')]
+CONFIG = {'GRUB_TIMEOUT': '10', 'GRUB_DISABLE_OS_PROBER': 'false'}
+
+
+class FakeState:
+    def __init__(self, stamp):
+        self.stamp = stamp
+
+    def changed_inputs(self):
+        return self.stamp, ['/etc/default/grub']
+
+
+class FakeGenerator:
+    def __init__(self):
+        self.scripts = set()
+
+    def regenerate_sections(self, scripts, progress):
+        self.scripts |= scripts
+
+
+class FakeCache:
+    def __init__(self, outputs):
+        self.lookup = outputs.get
+
+
+@pytest.fixture
+def pipeline(manager, monkeypatch):
+    monkeypatch.setattr(grub_manager, 'list_generator_scripts', lambda: SCRIPTS)
+    monkeypatch.setattr(grub_manager, 'cache_key', lambda settings, script: 'disks-a')
+    monkeypatch.setattr(GrubManager, 'config', property(lambda self: dict(CONFIG)))
+    monkeypatch.delenv('SOPLOS_GRUB_ENGINE', raising=False)
+    return manager
+
+
+def regenerated(manager, os_prober_key, rescan_os=False):
+    manager.generation_state = FakeState({'config': dict(CONFIG, GRUB_TIMEOUT='5'),
+                                          'os_prober': os_prober_key})
+    generator = FakeGenerator()
+    manager._run_generator = lambda work, progress, cancellable: work(generator) or True
+    assert manager._update_incrementally(None, None, rescan_os)
+    return generator.scripts
+
+
+def test_incremental_update_keeps_os_prober_section_for_unchanged_disks(pipeline):
+    assert regenerated(pipeline, 'disks-a') == {D + '00_header', D + '30_uefi-firmware'}
+
+
+def test_incremental_update_probes_changed_disks(pipeline):
+    assert D + '30_os-prober' in regenerated(pipeline, 'disks-b')
+    assert D + '30_os-prober' in regenerated(pipeline, 'disks-a', rescan_os=True)
+
+
+def test_full_regeneration_uses_cached_os_prober_output(pipeline):
+    pipeline.os_prober_cache = FakeCache({'disks-a': 'menuentry "Windows" {}\n'})
+    assert pipeline._use_builtin_engine()
+    pipeline.os_prober_cache = FakeCache({'disks-b': 'menuentry "Windows" {}\n'})
+    assert not pipeline._use_builtin_engine()
+
+
+def test_predicted_menu_keeps_hidden_kernels_hidden(manager, monkeypatch):
+    old = MenuEntry('Debian GNU/Linux', 'Debian GNU/Linux', 'gnulinux-simple-1234')
+    old.linux = '/boot/vmlinuz-6.1.0-13-amd64'
+    windows = MenuEntry('Windows', 'Windows', 'osprober-chain-ABCD')
+    windows.enabled = False
+    recovery = MenuEntry('Debian GNU/Linux (recovery mode)',
+                         'Advanced options for Debian GNU/Linux>Debian GNU/Linux (recovery mode)',
+                         'gnulinux-6.1.0-18-amd64-recovery-1234')
+    recovery.linux = '/boot/vmlinuz-6.1.0-18-amd64'
+    monkeypatch.setattr(GrubManager, 'get_menu_entries', lambda self: [old, windows])
+    monkeypatch.setattr(GrubManager, 'predict_kernel_entries', lambda self: [recovery])
+    monkeypatch.setattr(grub_manager, 'load_menu_filter',
+                        lambda: {'hidden': ['gnulinux-6.1.0-18-amd64-recovery-1234',
+                                            'osprober-chain-ABCD'], 'grub_cfg': None})
+
+    entries = manager.get_predicted_menu_entries()
+    assert [entry.enabled for entry in entries] == [False, False]
@@ -0,0 +1,13 @@
+"""Runs the import-time budget check of the GTK-free modules."""
+
+import os
+import sys
+import subprocess
+
+CHECK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                     'tools', 'check_import_time.py')
+
+
+def test_core_imports_within_budget():
+    result = subprocess.run([sys.executable, CHECK], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,18 @@
+"""Tests for the entry point's argument handling."""
+
+import pytest
+
+import main
+
+
+def test_lazy_elevation_flag(monkeypatch):
+    monkeypatch.delenv('SOPLOS_LAZY_ELEVATION', raising=False)
+    assert main.lazy_elevation_requested(['--lazy-elevation'])
+    assert not main.lazy_elevation_requested([])
+
+
+@pytest.mark.parametrize('value,expected', [('1', True), ('yes', True), ('TRUE', True),
+                                            ('0', False), ('', False)])
+def test_lazy_elevation_environment(monkeypatch, value, expected):
+    monkeypatch.setenv('SOPLOS_LAZY_ELEVATION', value)
+    assert main.lazy_elevation_requested([]) is expected
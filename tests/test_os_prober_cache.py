@@ -0,0 +1,46 @@
+"""Tests for the os-prober cache key."""
+
+import os
+
+from core.os_prober_cache import block_device_state
+
+
+def make_device(sys_block, name, size):
+    device = sys_block / name
+    device.mkdir(parents=True)
+    (device / 'size').write_text(f'{size}\n')
+
+
+def test_block_device_state_ignores_virtual_devices(tmp_path):
+    sys_block = tmp_path / 'sys'
+    dev_disk = tmp_path / 'disk'
+    for name, size in (('sda', 1000), ('sda1', 900), ('loop0', 10), ('zram0', 20), ('ram0', 30)):
+        make_device(sys_block, name, size)
+    (dev_disk / 'by-uuid').mkdir(parents=True)
+    os.symlink('../../sda1', dev_disk / 'by-uuid' / 'aaaa')
+    os.symlink('../../loop0', dev_disk / 'by-uuid' / 'bbbb')
+
+    state = block_device_state(str(sys_block), str(dev_disk))
+    assert sorted(state) == ['by-uuid/aaaa', 'sda', 'sda1']
+    assert state['sda1'][0] == '900'
+
+
+def test_block_device_state_unchanged_by_new_loop_device(tmp_path):
+    sys_block = tmp_path / 'sys'
+    make_device(sys_block, 'nvme0n1p1', 500)
+    before = block_device_state(str(sys_block), str(tmp_path / 'disk'))
+    make_device(sys_block, 'loop7', 64)
+    assert block_device_state(str(sys_block), str(tmp_path / 'disk')) == before
+
+
+def test_block_device_state_tracks_partition_layout(tmp_path):
+    sys_block = tmp_path / 'sys'
+    make_device(sys_block, 'sda', 1000)
+    make_device(sys_block, 'sda1', 400)
+    (sys_block / 'sda1' / 'start').write_text('2048\n')
+    before = block_device_state(str(sys_block), str(tmp_path / 'disk'))
+    assert before['sda'] == ['1000', None]
+    assert before['sda1'] == ['400', '2048']
+
+    (sys_block / 'sda1' / 'start').write_text('4096\n')
+    assert block_device_state(str(sys_block), str(tmp_path / 'disk')) != before
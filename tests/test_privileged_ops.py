@@ -0,0 +1,129 @@
+"""Tests for privileged helper operations: the editor pipeline, copying sources."""
+
+import os
+import pwd
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from core import grub_manager, privileged_ops
+from utils.logger import log_error
+
+
+class FakeManager:
+    """Stands in for GrubManager inside the helper's update_grub operation."""
+
+    instances = []
+    succeed = True
+
+    def __init__(self):
+        self.cancelled = False
+        self.rescan_os = None
+        FakeManager.instances.append(self)
+
+    def update_grub(self, progress, cancellable, rescan_os):
+        self.rescan_os = rescan_os
+        progress("Found linux image: /boot/vmlinuz-6.1.0", 0.5)
+        if cancellable.is_set():
+            return False
+        if not self.succeed:
+            log_error("Failed to update GRUB: 10_linux exited with status 1")
+        return self.succeed
+
+    def cancel_update(self):
+        self.cancelled = True
+        return True
+
+
+@pytest.fixture
+def fake_manager(monkeypatch):
+    FakeManager.instances = []
+    monkeypatch.setattr(FakeManager, 'succeed', True)
+    monkeypatch.setattr(grub_manager, 'GrubManager', FakeManager)
+    return FakeManager
+
+
+def test_update_grub_runs_the_editor_pipeline(fake_manager):
+    lines = []
+    result = privileged_ops.execute_batch([{'op': 'update_grub', 'rescan_os': True}],
+                                          on_line=lines.append)
+    assert result['ok']
+    assert lines == ["Found linux image: /boot/vmlinuz-6.1.0"]
+    assert fake_manager.instances[0].rescan_os is True
+
+
+def test_update_grub_reports_the_logged_error(fake_manager):
+    fake_manager.succeed = False
+    result = privileged_ops.execute_batch([{'op': 'update_grub'}])
+    assert not result['ok']
+    assert result['error'] == "Failed to update GRUB: 10_linux exited with status 1"
+
+
+def test_cancelling_the_batch_cancels_the_regeneration(fake_manager):
+    runner = privileged_ops.CommandRunner()
+    result = privileged_ops.execute_batch([{'op': 'update_grub'}], runner,
+                                          on_line=lambda line: runner.cancel())
+    assert result['error'] == 'cancelled'
+    assert fake_manager.instances[0].cancelled
+    assert runner.on_cancel is None
+
+
+@pytest.fixture
+def boot(tmp_path, monkeypatch):
+    monkeypatch.setattr(privileged_ops, 'WRITABLE_PATHS', [os.path.realpath(tmp_path / 'boot')])
+    (tmp_path / 'boot').mkdir()
+    return tmp_path / 'boot'
+
+
+def make_theme(directory):
+    (directory / 'icons').mkdir(parents=True)
+    (directory / 'theme.txt').write_text('title-text: ""\n')
+    (directory / 'icons' / 'debian.png').write_bytes(b'\x89PNG')
+    os.chmod(directory / 'theme.txt', 0o600)
+
+
+@pytest.mark.parametrize('as_child', [False, True])
+def test_copy_tree_copies_a_theme(tmp_path, boot, monkeypatch, as_child):
+    if as_child:
+        # Exercise the export through a child process, as for pkexec callers
+        monkeypatch.setattr(privileged_ops, '_caller', lambda: pwd.getpwuid(os.getuid()))
+    make_theme(tmp_path / 'src')
+    assert privileged_ops.execute_batch([{'op': 'copy_tree', 'src': str(tmp_path / 'src'),
+                                          'dest': str(boot / 'themes' / 'x')}])['ok']
+    assert (boot / 'themes' / 'x' / 'icons' / 'debian.png').read_bytes() == b'\x89PNG'
+    assert stat.S_IMODE(os.stat(boot / 'themes' / 'x' / 'theme.txt').st_mode) == 0o644
+
+    result = privileged_ops.execute_batch([{'op': 'copy_tree', 'src': str(tmp_path / 'missing'),
+                                            'dest': str(boot / 'background.png')}])
+    assert not result['ok'] and 'missing' in result['error']
+
+
+def test_copy_tree_reads_source_as_the_calling_user(boot, monkeypatch):
+    nobody = pwd.getpwnam('nobody')
+    try:
+        probe = subprocess.run([sys.executable, '-I', privileged_ops.__file__, '--export', '/'],
+                               user=nobody.pw_uid, group=nobody.pw_gid, extra_groups=[],
+                               capture_output=True)
+    except OSError:
+        probe = None
+    if probe is None or probe.returncode != 0:
+        pytest.skip("needs root and a Python installation other users can run")
+    source = tempfile.mkdtemp()
+    try:
+        os.chmod(source, 0o755)
+        secret = os.path.join(source, 'secret')
+        with open(secret, 'w') as f:
+            f.write('root only\n')
+        os.chmod(secret, 0o600)
+        monkeypatch.setenv('PKEXEC_UID', str(nobody.pw_uid))
+        monkeypatch.setattr(privileged_ops, 'READ_AS_CALLER', True)
+        result = privileged_ops.execute_batch([{'op': 'copy_tree', 'src': secret,
+                                                'dest': str(boot / 'leak')}])
+        assert not result['ok'] and 'Permission denied' in result['error']
+        assert not (boot / 'leak').exists()
+    finally:
+        shutil.rmtree(source)
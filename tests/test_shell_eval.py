@@ -0,0 +1,107 @@
+"""Tests for the /etc/default/grub shell evaluator and tokenizer."""
+
+import shutil
+import subprocess
+
+import pytest
+
+from core.shell_eval import assignment_span, evaluate, logical_lines, quote
+
+# Scripts and the values bash gives them
+CASES = [
+    ('GRUB_TIMEOUT=5\n', {'GRUB_TIMEOUT': '5'}),
+    ('A="quiet splash"\nB=\'$A\'\n', {'A': 'quiet splash', 'B': '$A'}),
+    ('A=quiet\nB="$A splash"\nC=${A}x\n', {'A': 'quiet', 'B': 'quiet splash', 'C': 'quietx'}),
+    ('A="a \\"b\\" \\$c"\n', {'A': 'a "b" $c'}),
+    ('A=one\\ two\n', {'A': 'one two'}),
+    ('A="first\nsecond"\n', {'A': 'first\nsecond'}),
+    ('A="x \\\ny"\n', {'A': 'x y'}),
+    ('A=x\\\ny\n', {'A': 'xy'}),
+    ('A=1; B=2 # comment\n#C=3\n', {'A': '1', 'B': '2'}),
+    ('A=a#b\n', {'A': 'a#b'}),
+    ('export A=1\nB=2\nexport B\n', {'A': '1', 'B': '2'}),
+    ('A=${UNSET:-fallback}\nB=${A:+set}\nC=${#A}\n', {'A': 'fallback', 'B': 'set', 'C': '8'}),
+    ('A=\nB=${A:-empty}\nC=${A-unset}\n', {'A': '', 'B': 'empty', 'C': ''}),
+    ('A=1\nA="$A 2"\n', {'A': '1 2'}),
+    ('A=\'it\'"\'"\'s\'\n', {'A': "it's"}),
+]
+
+
+@pytest.mark.parametrize('script,expected', CASES)
+def test_evaluate(script, expected):
+    result = evaluate(script)
+    assert result.values == expected
+    assert result.complete
+
+
+@pytest.mark.skipif(shutil.which('bash') is None, reason='bash not available')
+@pytest.mark.parametrize('script,expected', CASES)
+def test_evaluate_matches_bash(script, expected):
+    dump = ''.join(f'printf "%s\\0" "${{{name}}}"\n' for name in expected)
+    output = subprocess.run(['bash', '-c', script + dump], capture_output=True, check=True).stdout
+    assert dict(zip(expected, output.decode().split('\0'))) == expected
+
+
+def test_environment_before_script():
+    assert evaluate('B="$HOME/x"\n', {'HOME': '/root'}).values == {'B': '/root/x'}
+
+
+def test_inexact_values():
+    result = evaluate('A=$(lsb_release -i)\nB=`uname -r`\nC="$1"\nD=ok\n')
+    assert not result.complete
+    assert [name for name, a in result.provenance.items() if not a.exact] == ['A', 'B', 'C']
+    assert result.provenance['D'].exact
+
+
+def test_unsupported_statements():
+    result = evaluate('A=1\nif true; then\nB=2\nfi\necho $A > /dev/null\nC=3 cmd\nD=4\n')
+    assert result.unsupported == [2, 4, 5, 6]
+    assert result.values == {'A': '1', 'B': '2', 'D': '4'}
+
+
+def test_provenance():
+    result = evaluate('# header\nexport GRUB_DEFAULT="saved"\nGRUB_TIMEOUT=5\nGRUB_TIMEOUT=10\n')
+    default = result.provenance['GRUB_DEFAULT']
+    assert (default.line, default.source, default.exported) == (2, 'GRUB_DEFAULT="saved"', True)
+    assert result.provenance['GRUB_TIMEOUT'].line == 4
+
+
+@pytest.mark.parametrize('value', ['5', 'quiet splash', '', 'a"b', '$HOME', 'back\\slash',
+                                   '`cmd`', "it's", 'x=y,z'])
+def test_quote_round_trip(value):
+    assert evaluate(f'A={quote(value)}\n').values['A'] == value
+
+
+def test_logical_lines():
+    text = ('A=1 # note\n'
+            'B="two\nlines"\n'
+            "C='x\n# not a comment\ny'\n"
+            'D=one\\\ntwo\n'
+            'E=$(echo "\n)")\n'
+            '# F="unterminated\n'
+            'G=7')
+    assert logical_lines(text) == [
+        'A=1 # note\n',
+        'B="two\nlines"\n',
+        "C='x\n# not a comment\ny'\n",
+        'D=one\\\ntwo\n',
+        'E=$(echo "\n)")\n',
+        '# F="unterminated\n',
+        'G=7',
+    ]
+    assert ''.join(logical_lines(text)) == text
+
+
+def test_logical_lines_unterminated_quote_runs_to_end():
+    assert logical_lines('A="open\nB=2\n') == ['A="open\nB=2\n']
+
+
+@pytest.mark.parametrize('line,span', [
+    ('GRUB_TIMEOUT=5\n', (0, 14)),
+    ('  export GRUB_TIMEOUT="5" # c\n', (9, 25)),
+    ('GRUB_CMDLINE="a\nb"\n', (0, 18)),
+    ('echo hi\n', None),
+    ('# GRUB_TIMEOUT=5\n', None),
+])
+def test_assignment_span(line, span):
+    assert assignment_span(line) == span
@@ -0,0 +1,120 @@
+"""Tests for multi-file transactions and their all-or-nothing application."""
+
+import os
+import errno
+
+import pytest
+
+from core import privileged_ops
+from core.transaction import GrubTransaction
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(privileged_ops, 'WRITABLE_PATHS', [os.path.realpath(tmp_path)])
+    return tmp_path
+
+
+def listing(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_apply_transaction(root):
+    (root / 'grub').write_text('old\n')
+    (root / 'custom.cfg').write_text('set color_normal=white/black\n')
+    (root / 'script').write_text('#!/bin/sh\n')
+    privileged_ops.apply_transaction([
+        {'op': 'write_file', 'path': str(root / 'grub'), 'content': 'new\n'},
+        {'op': 'write_file', 'path': str(root / 'theme.txt'), 'content': 'x\n', 'mode': 0o600},
+        {'op': 'unlink', 'path': str(root / 'custom.cfg')},
+        {'op': 'chmod', 'path': str(root / 'script'), 'mode': 0o755},
+    ])
+    assert (root / 'grub').read_text() == 'new\n'
+    assert os.stat(root / 'theme.txt').st_mode & 0o7777 == 0o600
+    assert os.stat(root / 'script').st_mode & 0o7777 == 0o755
+    assert listing(root) == ['grub', 'script', 'theme.txt']
+
+
+def test_failed_transaction_restores_every_file(root):
+    (root / 'grub').write_text('old\n')
+    (root / 'custom.cfg').write_text('custom\n')
+    (root / 'script').write_text('#!/bin/sh\n')
+    os.chmod(root / 'script', 0o644)
+    with pytest.raises(OSError):
+        privileged_ops.apply_transaction([
+            {'op': 'write_file', 'path': str(root / 'grub'), 'content': 'new\n'},
+            {'op': 'write_file', 'path': str(root / 'new.cfg'), 'content': 'x\n'},
+            {'op': 'unlink', 'path': str(root / 'custom.cfg')},
+            {'op': 'chmod', 'path': str(root / 'script'), 'mode': 0o755},
+            {'op': 'chmod', 'path': str(root / 'missing'), 'mode': 0o755},
+        ])
+    assert (root / 'grub').read_text() == 'old\n'
+    assert (root / 'custom.cfg').read_text() == 'custom\n'
+    assert os.stat(root / 'script').st_mode & 0o7777 == 0o644
+    # No new file, staged file or backup left behind
+    assert listing(root) == ['custom.cfg', 'grub', 'script']
+
+
+@pytest.mark.parametrize('code', [errno.EPERM, errno.EXDEV])
+def test_backups_copy_without_hard_links(root, monkeypatch, code):
+    def no_link(*args, **kwargs):
+        raise OSError(code, os.strerror(code))
+    monkeypatch.setattr(privileged_ops.os, 'link', no_link)
+    (root / 'grub').write_text('old\n')
+    (root / 'custom.cfg').write_text('custom\n')
+    with pytest.raises(OSError):
+        privileged_ops.apply_transaction([
+            {'op': 'write_file', 'path': str(root / 'grub'), 'content': 'new\n'},
+            {'op': 'unlink', 'path': str(root / 'custom.cfg')},
+            {'op': 'chmod', 'path': str(root / 'missing'), 'mode': 0o755},
+        ])
+    assert (root / 'grub').read_text() == 'old\n'
+    assert (root / 'custom.cfg').read_text() == 'custom\n'
+    assert listing(root) == ['custom.cfg', 'grub']
+
+    privileged_ops.apply_transaction([
+        {'op': 'write_file', 'path': str(root / 'grub'), 'content': 'new\n'},
+    ])
+    assert (root / 'grub').read_text() == 'new\n'
+    assert listing(root) == ['custom.cfg', 'grub']
+
+
+def test_apply_transaction_rejects_paths_outside_writable_tree(root):
+    with pytest.raises(privileged_ops.OperationError):
+        privileged_ops.apply_transaction([
+            {'op': 'write_file', 'path': '/etc/passwd', 'content': ''},
+        ])
+
+
+def test_grub_transaction_drops_changes_without_effect(tmp_path):
+    batches = []
+    transaction = GrubTransaction(lambda ops: batches.append(ops) or {'ok': True})
+    (tmp_path / 'grub').write_text('same\n')
+    os.chmod(tmp_path / 'grub', 0o644)
+    transaction.write(tmp_path / 'grub', 'same\n')
+    transaction.delete(tmp_path / 'absent')
+    transaction.chmod(tmp_path / 'grub', 0o644)
+    assert transaction.changes == []
+    assert transaction.commit()
+    assert batches == []
+
+
+def test_grub_transaction_commits_one_batch(tmp_path):
+    batches = []
+    transaction = GrubTransaction(lambda ops: batches.append(ops) or {'ok': True})
+    (tmp_path / 'grub').write_text('old\n')
+    transaction.write(tmp_path / 'grub', 'first\n')
+    transaction.write(tmp_path / 'grub', 'second\n')
+    transaction.set_executable(tmp_path / 'grub', True)
+    assert transaction.commit()
+    changes = batches[0][0]['changes']
+    assert [change['op'] for change in changes] == ['write_file', 'chmod']
+    assert changes[0]['content'] == 'second\n'
+    assert transaction.changes == []
+
+
+def test_grub_transaction_keeps_changes_on_failure(tmp_path):
+    transaction = GrubTransaction(lambda ops: {'ok': False, 'error': 'denied'})
+    transaction.write(tmp_path / 'grub', 'new\n')
+    assert not transaction.commit()
+    assert len(transaction.changes) == 1
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the .mo catalog backends of Soplos Grub Editor.
+
+Compares core.mo_catalog.MoCatalog with gettext.GNUTranslations: time to
+load a catalog, time to look up its messages, and the memory (Python heap
+and resident set) added by loading it and translating a few dozen
+strings. Each backend runs in a fresh interpreter so they share no caches.
+
+Usage: tools/bench_mo_catalog.py [--lang CODE] [--repeat N] [--lookups N]
+"""
+
+import os
+import sys
+import json
+import gettext
+import argparse
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOMAIN = 'soplos-grub-editor'
+
+BACKENDS = ('GNUTranslations', 'MoCatalog')
+
+# Runs in the child interpreter: prints a JSON object with the results
+CHILD = r'''
+import os, sys, gettext, time, tracemalloc
+sys.path.insert(0, {root!r})
+from core.mo_catalog import MoCatalog
+
+def rss_kib():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+def load():
+    if {backend!r} == 'MoCatalog':
+        return MoCatalog({path!r})
+    with open({path!r}, 'rb') as f:
+        return gettext.GNUTranslations(f)
+
+messages = {messages!r}
+before = rss_kib()
+start = time.perf_counter()
+catalog = load()
+loaded = time.perf_counter()
+for message in messages:
+    catalog.gettext(message)
+done = time.perf_counter()
+after = rss_kib()
+
+# Python heap of a second catalog, traced apart from the timings above
+tracemalloc.start()
+traced = load()
+for message in messages:
+    traced.gettext(message)
+heap = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+del traced
+
+repeat = {repeat}
+start_loads = time.perf_counter()
+for _ in range(repeat):
+    load()
+load_time = (time.perf_counter() - start_loads) / repeat
+start_lookups = time.perf_counter()
+for _ in range(repeat):
+    for message in messages:
+        catalog.gettext(message)
+lookup_time = (time.perf_counter() - start_lookups) / repeat / max(1, len(messages))
+print(json.dumps({{'first_load': loaded - start, 'first_lookups': done - loaded,
+                  'load': load_time, 'lookup': lookup_time, 'heap': heap, 'rss': after - before,
+                  'messages': len(messages)}}))
+'''
+
+
+def run(backend: str, path: str, repeat: int, messages: list) -> dict:
+    code = 'import json\n' + CHILD.format(root=PROJECT_ROOT, backend=backend, path=path,
+                                          repeat=repeat, messages=messages)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            check=True)
+    return json.loads(result.stdout)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the .mo catalog backends.")
+    parser.add_argument('--lang', default='es', help="catalog to load (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=200,
+                        help="loads and lookup rounds to average (default: %(default)s)")
+    parser.add_argument('--lookups', type=int, default=40,
+                        help="messages translated per round (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(PROJECT_ROOT, 'locale', args.lang, 'LC_MESSAGES', f'{DOMAIN}.mo')
+    if not os.path.isfile(path):
+        print(f"No catalog: {path}")
+        return 1
+
+    with open(path, 'rb') as f:
+        messages = [key for key in gettext.GNUTranslations(f)._catalog
+                    if isinstance(key, str) and key][:args.lookups]
+
+    print(f"{path} ({os.path.getsize(path)} bytes)")
+    print(f"{'backend':<16} {'load':>10} {'first load':>11} {'lookup':>9} "
+          f"{'heap':>10} {'RSS':>8}")
+    for backend in BACKENDS:
+        r = run(backend, path, args.repeat, messages)
+        print(f"{backend:<16} {r['load'] * 1e6:8.1f} us {r['first_load'] * 1e6:8.1f} us "
+              f"{r['lookup'] * 1e6:6.2f} us {r['heap'] / 1024:7.1f} KiB {r['rss']:4d} KiB")
+    print(f"lookup: mean per message over {r['messages']} messages; heap and RSS: "
+          "added by the first load and its lookups")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
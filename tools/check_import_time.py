@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-time budget check for Soplos Grub Editor.
+
+Imports the GTK-free core modules in a fresh interpreter with
+'python -X importtime' and fails if any of them loads GObject
+introspection, or if importing them takes longer than the budget.
+
+Usage: tools/check_import_time.py [--budget-ms MS] [--repeat N]
+Exit status is 0 within budget, 1 otherwise.
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must import without GTK (the CLI, the privileged helper and
+# the launcher rely on this)
+MODULES = [
+    'core',
+    'core.grub_manager',
+    'core.environment',
+    'core.i18n_manager',
+    'core.cli',
+]
+
+# Top-level packages none of MODULES may load
+FORBIDDEN = ('gi', 'cairo', 'core.application', 'core.theme_manager', 'ui')
+
+DEFAULT_BUDGET_MS = 150
+
+
+def measure(modules):
+    """
+    Import modules in a new interpreter.
+
+    Returns:
+        (cumulative microseconds per requested module, every module loaded)
+    """
+    code = 'import ' + ', '.join(modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else code)
+
+    cumulative = {}
+    loaded = []
+    for line in result.stderr.splitlines():
+        # import time: <self us> | <cumulative us> | <module, indented by depth>
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split(':', 1)[1].split('|')
+        loaded.append(name.strip())
+        # Nested imports are indented; each requested module is counted
+        # without what the modules requested before it already loaded
+        if name.strip() in modules and not name.startswith('  '):
+            cumulative[name.strip()] = int(cumulative_us)
+    return cumulative, loaded
+
+
+def is_forbidden(name: str) -> bool:
+    return any(name == prefix or name.startswith(prefix + '.') for prefix in FORBIDDEN)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import time of the core modules.")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="maximum total import time (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs to take the fastest of (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    best = None
+    for _ in range(max(1, args.repeat)):
+        cumulative, loaded = measure(MODULES)
+        total = sum(cumulative.values())
+        if best is None or total < best[0]:
+            best = (total, cumulative, loaded)
+    total, cumulative, loaded = best
+
+    failed = False
+    forbidden = sorted({name for name in loaded if is_forbidden(name)})
+    if forbidden:
+        print(f"FAIL: GTK-free modules import {', '.join(forbidden)}")
+        failed = True
+    for name in MODULES:
+        if name in cumulative:
+            print(f"{cumulative[name] / 1000:8.1f} ms  {name}")
+    print(f"{total / 1000:8.1f} ms  total (budget {args.budget_ms:g} ms)")
+    if total > args.budget_ms * 1000:
+        print("FAIL: import time over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
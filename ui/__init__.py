@@ -3,7 +3,7 @@ User interface module for Soplos Grub Editor.
 Contains all GTK-based UI components, windows, tabs, widgets, and dialogs.
 """
 
-from core.application import APP_VERSION
+from core import APP_VERSION
 
 # UI module information
 __version__ = APP_VERSION
@@ -0,0 +1,123 @@
+"""
+Filesystem watcher for Soplos Grub Editor.
+Monitors the GRUB configuration, the generated grub.cfg, themes and fonts
+with Gio.FileMonitor, so changes made outside the editor (e.g. a kernel
+upgrade running update-grub) show up without a manual refresh.
+"""
+
+import os
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gio, GLib
+
+from utils.logger import log_warning
+from core.i18n_manager import _
+
+# What changed, as reported to the listener
+CONFIG = 'config'      # /etc/default/grub or /etc/default/grub.d
+CUSTOM = 'custom'      # /boot/grub/custom.cfg
+MENU = 'menu'          # /boot/grub/grub.cfg
+THEMES = 'themes'      # /boot/grub/themes
+FONTS = 'fonts'        # /boot/grub/fonts
+
+# Watched directory -> {file name (None for any) -> category}. Directories
+# are watched rather than files because writers replace files by renaming.
+WATCHES = {
+    '/etc/default': {'grub': CONFIG},
+    '/etc/default/grub.d': {None: CONFIG},
+    '/boot/grub': {'grub.cfg': MENU, 'custom.cfg': CUSTOM},
+    '/boot/grub/themes': {None: THEMES},
+    '/boot/grub/fonts': {None: FONTS},
+}
+
+RELEVANT_EVENTS = (
+    Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+    Gio.FileMonitorEvent.DELETED,
+    Gio.FileMonitorEvent.CREATED,
+    Gio.FileMonitorEvent.ATTRIBUTE_CHANGED,
+    Gio.FileMonitorEvent.MOVED_IN,
+    Gio.FileMonitorEvent.MOVED_OUT,
+    Gio.FileMonitorEvent.RENAMED,
+)
+
+
+class GrubWatcher:
+    """
+    Watches GRUB files and reports the categories that changed.
+
+    Events are coalesced: the listener runs once, on the main loop,
+    after no event arrived for delay_ms (and at most max_delay_ms after
+    the first one), with the set of categories that changed meanwhile.
+    """
+
+    def __init__(self, on_changed, delay_ms: int = 300, max_delay_ms: int = 2000):
+        """
+        Initialize the watcher.
+
+        Args:
+            on_changed: Called with a set of categories (CONFIG, CUSTOM,
+                MENU, THEMES, FONTS)
+            delay_ms: Quiet period ending a burst of events
+            max_delay_ms: Longest a change is held back during a burst
+        """
+        self.on_changed = on_changed
+        self.delay_ms = delay_ms
+        self.max_delay_ms = max_delay_ms
+        self._monitors = []
+        self._pending = set()
+        self._timeout_id = 0
+        self._burst_start = 0
+
+    def start(self):
+        """Start monitoring every watched directory that exists."""
+        for directory, names in WATCHES.items():
+            if not os.path.isdir(directory):
+                continue
+            try:
+                monitor = Gio.File.new_for_path(directory).monitor_directory(
+                    Gio.FileMonitorFlags.WATCH_MOVES, None)
+            except GLib.Error as e:
+                log_warning(_("Cannot watch {path}: {err}").format(path=directory, err=e.message))
+                continue
+            monitor.connect('changed', self._on_event, directory, names)
+            self._monitors.append(monitor)
+
+    def stop(self):
+        """Stop monitoring and drop pending notifications."""
+        for monitor in self._monitors:
+            monitor.cancel()
+        self._monitors = []
+        self._pending.clear()
+        if self._timeout_id:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = 0
+
+    def _on_event(self, monitor, file, other_file, event, directory, names):
+        if event not in RELEVANT_EVENTS:
+            return
+        for changed in (file, other_file):
+            if changed is None:
+                continue
+            category = names.get(changed.get_basename(), names.get(None))
+            # Only direct children count: grub.cfg.new is not grub.cfg
+            if category and os.path.dirname(changed.get_path()) == directory:
+                self._queue(category)
+
+    def _queue(self, category: str):
+        now = GLib.get_monotonic_time() // 1000
+        if not self._pending:
+            self._burst_start = now
+        self._pending.add(category)
+        if self._timeout_id:
+            if now - self._burst_start >= self.max_delay_ms:
+                return
+            GLib.source_remove(self._timeout_id)
+        self._timeout_id = GLib.timeout_add(self.delay_ms, self._flush)
+
+    def _flush(self):
+        self._timeout_id = 0
+        changed, self._pending = self._pending, set()
+        if changed:
+            self.on_changed(changed)
+        return False
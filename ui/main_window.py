@@ -8,11 +8,12 @@ gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk, GLib, Pango, GdkPixbuf
 from pathlib import Path
 
+from core import APP_NAME, APP_VERSION
 from core.i18n_manager import _
+from core.update_task import UpdateGrubTask
+from ui.grub_watcher import GrubWatcher, CONFIG, CUSTOM, MENU, THEMES, FONTS
 
 # App constants
-APP_NAME = "Soplos GRUB Editor"
-APP_VERSION = "2.0.2"
 DEFAULT_WINDOW_WIDTH = 900
 DEFAULT_WINDOW_HEIGHT = 500
 
@@ -34,6 +35,7 @@ class MainWindow(Gtk.ApplicationWindow):
         self.theme_manager = theme_manager
         self.i18n_manager = i18n_manager
         self.grub_manager = grub_manager
+        self._update_task = None
         
         # Window properties
         self.set_title(_(APP_NAME))
@@ -61,6 +63,11 @@ class MainWindow(Gtk.ApplicationWindow):
         GLib.idle_add(lambda: self.notebook.set_current_page(0))
         self._update_system_info()
         
+        # Follow changes made outside the editor
+        self._config_snapshot = dict(self.grub_manager.config)
+        self.watcher = GrubWatcher(self._on_files_changed)
+        self.watcher.start()
+        
         # Connect signals
         self.connect('delete-event', self._on_delete_event)
         self.connect('key-press-event', self._on_key_press)
@@ -143,11 +150,20 @@ class MainWindow(Gtk.ApplicationWindow):
         progress_box.set_margin_end(20)
         progress_box.set_margin_bottom(10)
 
+        progress_row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
         self.progress_bar = Gtk.ProgressBar()
         self.progress_bar.set_show_text(True)
-        progress_box.pack_start(self.progress_bar, False, False, 0)
+        self.progress_bar.set_valign(Gtk.Align.CENTER)
+        progress_row.pack_start(self.progress_bar, True, True, 0)
+
+        self.progress_cancel_btn = Gtk.Button(label=_("Cancel"))
+        self.progress_cancel_btn.connect('clicked', self._on_cancel_update)
+        self.progress_cancel_btn.set_no_show_all(True)
+        progress_row.pack_start(self.progress_cancel_btn, False, False, 0)
+        progress_box.pack_start(progress_row, False, False, 0)
 
         self.progress_label = Gtk.Label(label=_("Ready"))
+        self.progress_label.set_ellipsize(Pango.EllipsizeMode.END)
         progress_box.pack_start(self.progress_label, False, False, 0)
 
         self.progress_revealer.add(progress_box)
@@ -236,17 +252,86 @@ class MainWindow(Gtk.ApplicationWindow):
             self.progress_bar.set_text(_("Working..."))
         
         self.progress_revealer.set_reveal_child(True)
-        
-        while Gtk.events_pending():
-            Gtk.main_iteration()
 
     def hide_progress(self):
         """Hide progress bar."""
         self.progress_revealer.set_reveal_child(False)
+        self.progress_cancel_btn.hide()
         self.progress_label.set_text(_("Ready"))
         self.progress_bar.set_fraction(0.0)
         self.progress_bar.set_text("")
 
+    def run_update_grub(self, on_finished=None, rescan_os=False) -> bool:
+        """
+        Run update-grub in the background, showing its progress in the window.
+        
+        Args:
+            on_finished: Called on the main loop with (success, cancelled)
+            rescan_os: Probe all partitions for other systems again
+            
+        Returns:
+            False if an update is already running
+        """
+        if self._update_task is not None and self._update_task.running:
+            return False
+
+        def finished(success, cancelled):
+            self._update_task = None
+            self.hide_progress()
+            if on_finished:
+                on_finished(success, cancelled)
+
+        self._update_task = UpdateGrubTask(
+            self.grub_manager,
+            on_progress=self.show_progress,
+            on_finished=finished,
+            dispatch=_idle_dispatch,
+            rescan_os=rescan_os
+        )
+        self.progress_cancel_btn.set_sensitive(True)
+        self.progress_cancel_btn.show()
+        self.show_progress(_("Updating GRUB configuration..."), 0.0)
+        self._update_task.start()
+        return True
+
+    def reload_views(self):
+        """Reload every tab from the current GRUB configuration."""
+        self._config_snapshot = dict(self.grub_manager.config)
+        self.general_view._load_data()
+        self.boot_entries_view._load_entries()
+        self.appearance_view._load_data()
+
+    def _on_files_changed(self, changed):
+        """
+        Push changes detected by the watcher into the affected views only.
+        
+        Args:
+            changed: Set of GrubWatcher categories
+        """
+        if CONFIG in changed:
+            config = dict(self.grub_manager.config)
+            keys = {key for key in set(config) | set(self._config_snapshot)
+                    if config.get(key) != self._config_snapshot.get(key)}
+            self._config_snapshot = config
+            if keys:
+                self.general_view.on_config_changed(keys)
+                self.appearance_view.on_config_changed(keys)
+        if CUSTOM in changed:
+            self.appearance_view._load_colors_from_config()
+        if MENU in changed:
+            self.boot_entries_view.refresh_entries()
+            self.general_view.refresh_entries()
+        if THEMES in changed:
+            self.appearance_view.refresh_themes()
+        if FONTS in changed:
+            self.appearance_view.refresh_fonts()
+    
+    def _on_cancel_update(self, button):
+        """Cancel the running update-grub."""
+        if self._update_task is not None and self._update_task.cancel():
+            button.set_sensitive(False)
+            self.progress_label.set_text(_("Cancelling..."))
+
     def _show_about(self, *args):
         dialog = Gtk.AboutDialog()
         dialog.set_transient_for(self)
@@ -326,6 +411,10 @@ class MainWindow(Gtk.ApplicationWindow):
     def _on_delete_event(self, widget, event):
         """Handle window close."""
         print(_("Main window closing..."))
+        self.watcher.stop()
+        if self._update_task is not None and self._update_task.running:
+            # Don't leave grub-mkconfig running behind a closed window
+            self._update_task.cancel()
         return False
 
     def _on_key_press(self, widget, event):
@@ -351,4 +440,12 @@ class MainWindow(Gtk.ApplicationWindow):
                 self.notebook.set_current_page(next_page)
                 return True
         
-        return False
\ No newline at end of file
+        return False
+
+
+def _idle_dispatch(callback, *args):
+    """Deliver a worker-thread callback on the GTK main loop."""
+    def run():
+        callback(*args)
+        return False
+    GLib.idle_add(run)
@@ -322,13 +322,13 @@ class AppearanceView(Gtk.ScrolledWindow):
             
             try:
                 # 1. Delete physical file
-                if os.geteuid() == 0:
-                    os.remove(font_path)
-                else:
-                    subprocess.run(['pkexec', 'rm', font_path], check=True)
+                result = self.grub_manager.run_privileged(
+                    [{'op': 'unlink', 'path': font_path, 'missing_ok': False}])
+                if not result['ok']:
+                    raise OSError(result['error'])
                 
                 # 2. Check if it was currently applied
-                current_config = self.grub_manager.read_config()
+                current_config = self.grub_manager.config
                 current_font = current_config.get('GRUB_FONT', '')
                 
                 # If deleted font was the active one, clear config
@@ -357,6 +357,28 @@ class AppearanceView(Gtk.ScrolledWindow):
         for theme in themes:
             self.theme_combo.append_text(theme)
         
+        self._load_appearance_config()
+    
+    def refresh_themes(self):
+        """Add and remove themes installed or deleted outside the editor."""
+        _sync_combo_text(self.theme_combo, self.grub_manager.get_available_themes())
+    
+    def refresh_fonts(self):
+        """Add and remove fonts installed or deleted outside the editor."""
+        _sync_combo_text(self.fonts_combo, self._installed_fonts())
+    
+    def on_config_changed(self, keys):
+        """
+        Show appearance values changed outside the editor.
+        
+        Args:
+            keys: GRUB_* keys whose value changed
+        """
+        if keys & {'GRUB_THEME', 'GRUB_BACKGROUND', 'GRUB_COLOR_NORMAL', 'GRUB_COLOR_HIGHLIGHT'}:
+            self._load_appearance_config()
+    
+    def _load_appearance_config(self):
+        """Show the configured theme, background and colors."""
         # Select current theme
         current_theme = self.grub_manager.config.get('GRUB_THEME', '')
         if current_theme:
@@ -417,18 +439,9 @@ class AppearanceView(Gtk.ScrolledWindow):
 
         # If not in main config, try loading from custom.cfg
         if not color_normal or not color_highlight:
-            try:
-                import os
-                custom_cfg = '/boot/grub/custom.cfg'
-                if os.path.exists(custom_cfg):
-                    with open(custom_cfg, 'r') as f:
-                        for line in f:
-                            if 'set color_normal=' in line:
-                                color_normal = line.split('=')[1].strip().strip('"')
-                            elif 'set color_highlight=' in line:
-                                color_highlight = line.split('=')[1].strip().strip('"')
-            except Exception:
-                pass
+            custom = self.grub_manager.custom_settings
+            color_normal = color_normal or custom.get('color_normal')
+            color_highlight = color_highlight or custom.get('color_highlight')
 
         if not color_normal: color_normal = default_normal
         if not color_highlight: color_highlight = default_highlight
@@ -563,16 +576,16 @@ class AppearanceView(Gtk.ScrolledWindow):
                 
                 dest_path = f"{themes_dir}/{theme_name}"
                 
-                # Copy to themes directory using pkexec
-                copy_cmd = ['pkexec', 'cp', '-r', theme_folder, dest_path]
-                result = subprocess.run(copy_cmd, capture_output=True, text=True)
+                # Copy to themes directory with the privileged helper
+                result = self.grub_manager.run_privileged(
+                    [{'op': 'copy_tree', 'src': theme_folder, 'dest': dest_path}])
                 
-                if result.returncode == 0:
+                if result['ok']:
                     self._show_info(_("Theme '{}' installed successfully!").format(theme_name))
                     # Refresh theme list
                     self._load_data()
                 else:
-                    self._show_error(_("Failed to install theme: {}").format(result.stderr))
+                    self._show_error(_("Failed to install theme: {}").format(result['error']))
                     
         except Exception as e:
             self._show_error(_("Error installing theme: {}").format(str(e)))
@@ -648,28 +661,34 @@ class AppearanceView(Gtk.ScrolledWindow):
         dialog.destroy()
         
         if response == Gtk.ResponseType.YES:
-            if self.grub_manager.update_grub():
-                info_dialog = Gtk.MessageDialog(
-                    transient_for=self.parent_window,
-                    flags=0,
-                    message_type=Gtk.MessageType.INFO,
-                    buttons=Gtk.ButtonsType.OK,
-                    text=_("Success")
-                )
-                info_dialog.format_secondary_text(_("GRUB configuration updated successfully!"))
-                info_dialog.run()
-                info_dialog.destroy()
-            else:
-                err_dialog = Gtk.MessageDialog(
-                    transient_for=self.parent_window,
-                    flags=0,
-                    message_type=Gtk.MessageType.ERROR,
-                    buttons=Gtk.ButtonsType.OK,
-                    text=_("Error")
-                )
-                err_dialog.format_secondary_text(_("Failed to update GRUB. Check logs for details."))
-                err_dialog.run()
-                err_dialog.destroy()
+            self.parent_window.run_update_grub(self._on_update_finished)
+    
+    def _on_update_finished(self, success, cancelled):
+        """Report the result of the background update-grub run."""
+        if cancelled:
+            return
+        if success:
+            info_dialog = Gtk.MessageDialog(
+                transient_for=self.parent_window,
+                flags=0,
+                message_type=Gtk.MessageType.INFO,
+                buttons=Gtk.ButtonsType.OK,
+                text=_("Success")
+            )
+            info_dialog.format_secondary_text(_("GRUB configuration updated successfully!"))
+            info_dialog.run()
+            info_dialog.destroy()
+        else:
+            err_dialog = Gtk.MessageDialog(
+                transient_for=self.parent_window,
+                flags=0,
+                message_type=Gtk.MessageType.ERROR,
+                buttons=Gtk.ButtonsType.OK,
+                text=_("Error")
+            )
+            err_dialog.format_secondary_text(_("Failed to update GRUB. Check logs for details."))
+            err_dialog.run()
+            err_dialog.destroy()
     
     def _show_error(self, message):
         """Show error dialog."""
@@ -722,10 +741,9 @@ class AppearanceView(Gtk.ScrolledWindow):
         theme_path = f"/boot/grub/themes/{theme_name}"
         
         # Remove theme directory
-        result = subprocess.run(['pkexec', 'rm', '-rf', theme_path], 
-                              capture_output=True, text=True)
+        result = self.grub_manager.run_privileged([{'op': 'remove_tree', 'path': theme_path}])
         
-        if result.returncode == 0:
+        if result['ok']:
             self._show_info(_("Theme '{}' removed successfully!").format(theme_name))
             # Clear theme config if it was the active one
             current_theme = self.grub_manager.config.get('GRUB_THEME', '')
@@ -735,7 +753,7 @@ class AppearanceView(Gtk.ScrolledWindow):
             # Refresh theme list
             self._load_data()
         else:
-            self._show_error(_("Failed to remove theme: {}").format(result.stderr))
+            self._show_error(_("Failed to remove theme: {}").format(result['error']))
     
     def _on_bg_entry_changed(self, entry):
         """Update preview when background path changes."""
@@ -875,20 +893,17 @@ class AppearanceView(Gtk.ScrolledWindow):
         """Load list of installed GRUB fonts."""
         self.fonts_combo.remove_all()
         
-        fonts_dir = "/boot/grub/fonts"
-        try:
-            import os
-            if os.path.exists(fonts_dir):
-                for f in sorted(os.listdir(fonts_dir)):
-                    if f.endswith('.pf2'):
-                        self.fonts_combo.append_text(f)
-        except Exception:
-            pass
+        for f in self._installed_fonts():
+            self.fonts_combo.append_text(f)
         
         # Select first if available
         if self.fonts_combo.get_model().iter_n_children(None) > 0:
             self.fonts_combo.set_active(0)
     
+    def _installed_fonts(self):
+        """Return the names of the .pf2 fonts in /boot/grub/fonts."""
+        return self.grub_manager.get_installed_fonts()
+    
     def _on_browse_font(self, button):
         """Browse for TTF/OTF font file."""
         dialog = Gtk.FileChooserDialog(
@@ -934,16 +949,12 @@ class AppearanceView(Gtk.ScrolledWindow):
             return
         
         font_size = int(self.font_size_spin.get_value())
-        font_name = os.path.splitext(os.path.basename(font_path))[0]
-        output_name = f"{font_name}_{font_size}.pf2"
-        output_path = f"/boot/grub/fonts/{output_name}"
         
         # Convert using grub-mkfont
         try:
-            cmd = ['pkexec', 'grub-mkfont', '-s', str(font_size), '-o', output_path, font_path]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = self.grub_manager.install_font(font_path, font_size)
             
-            if result.returncode == 0:
+            if result['ok']:
                 dialog = Gtk.MessageDialog(
                     transient_for=self.parent_window,
                     flags=0,
@@ -951,7 +962,8 @@ class AppearanceView(Gtk.ScrolledWindow):
                     buttons=Gtk.ButtonsType.OK,
                     text=_("Success")
                 )
-                dialog.format_secondary_text(_("Font converted and installed: {}").format(output_name))
+                dialog.format_secondary_text(_("Font converted and installed: {}").format(
+                    os.path.basename(result['path'])))
                 dialog.run()
                 dialog.destroy()
                 
@@ -965,7 +977,7 @@ class AppearanceView(Gtk.ScrolledWindow):
                     buttons=Gtk.ButtonsType.OK,
                     text=_("Error")
                 )
-                dialog.format_secondary_text(_("Failed to convert font: {}").format(result.stderr))
+                dialog.format_secondary_text(_("Failed to convert font: {}").format(result['error']))
                 dialog.run()
                 dialog.destroy()
                 
@@ -989,4 +1001,23 @@ class AppearanceView(Gtk.ScrolledWindow):
             
             # Save to /etc/default/grub
             if self.grub_manager.save_config({'GRUB_FONT': font_path}):
-                self._ask_update_grub(_("Font Applied"))
\ No newline at end of file
+                self._ask_update_grub(_("Font Applied"))
+
+
+def _sync_combo_text(combo, items):
+    """
+    Make the entries of a Gtk.ComboBoxText equal to items, removing and
+    inserting only what differs so the active entry is kept.
+    """
+    model = combo.get_model()
+    wanted = set(items)
+    for i in reversed(range(len(model))):
+        if model[i][0] not in wanted:
+            combo.remove(i)
+    present = [row[0] for row in model]
+    for i, item in enumerate(items):
+        if i >= len(present) or present[i] != item:
+            if item in present:
+                continue
+            combo.insert_text(i, item)
+            present.insert(i, item)
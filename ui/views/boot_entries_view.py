@@ -3,6 +3,8 @@ Boot Entries View for Soplos Grub Editor.
 FIXED: Compact table styling matching other Soplos apps.
 """
 
+import threading
+
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, GLib, Pango
@@ -24,6 +26,8 @@ class BootEntriesView(Gtk.Box):
         self.set_margin_top(10)
         self.set_margin_bottom(10)
         
+        self.entries = []
+        
         self._create_ui()
         self._load_entries()
         
@@ -116,9 +120,30 @@ class BootEntriesView(Gtk.Box):
     def _load_entries(self):
         """Load boot entries from GRUB configuration."""
         self.store.clear()
+        for row in self._entry_rows():
+            self.store.append(row)
+    
+    def refresh_entries(self):
+        """
+        Bring the list in line with grub.cfg, touching only the rows that
+        changed so the selection and scroll position are kept.
+        """
+        rows = self._entry_rows()
+        for i, row in enumerate(rows):
+            if i < len(self.store):
+                if list(self.store[i]) != row:
+                    self.store[i] = row
+            else:
+                self.store.append(row)
+        while len(self.store) > len(rows):
+            self.store.remove(self.store.get_iter(len(rows)))
+    
+    def _entry_rows(self):
+        """Build the list rows for the menu entries of grub.cfg."""
+        rows = []
         
-        # Parse grub.cfg for menu entries
-        entries = self.grub_manager.get_menu_entries()
+        # Parse grub.cfg for menu entries (hidden ones included)
+        entries = self.entries = self.grub_manager.get_menu_entries()
         
         for i, entry in enumerate(entries):
             # Show hierarchical name in the list for clarity
@@ -128,17 +153,53 @@ class BootEntriesView(Gtk.Box):
             else:
                 display_name = entry.get('display_name', full_name)
                 
-            self.store.append([
+            rows.append([
                 i,
                 display_name,
-                entry.get('type', _('system')),
+                _(entry.get('type', 'system')),
                 entry.get('path', ''),
                 entry.get('enabled', True)
             ])
+        return rows
     
     def _on_entry_toggled(self, renderer, path):
         """Toggle entry enabled state."""
-        self.store[path][4] = not self.store[path][4]
+        self._set_enabled(self.store.get_iter(path), not self.store[path][4])
+    
+    def _set_enabled(self, treeiter, enabled):
+        """
+        Show or hide the entry of a row in the boot menu. grub.cfg is
+        filtered in a worker thread (it may wait for authorization); the
+        list is locked until it is done.
+        """
+        entry = self.entries[self.store[treeiter][0]]
+        row = Gtk.TreeRowReference.new(self.store, self.store.get_path(treeiter))
+        self.tree.set_sensitive(False)
+        
+        def work():
+            succeeded = self.grub_manager.set_entry_enabled(entry, enabled)
+            GLib.idle_add(self._on_enabled_set, row, enabled, succeeded)
+        
+        threading.Thread(target=work, name='filter-menu', daemon=True).start()
+    
+    def _on_enabled_set(self, row, enabled, succeeded):
+        """Show the outcome of _set_enabled() on the GTK main loop."""
+        self.tree.set_sensitive(True)
+        if succeeded:
+            if row.valid():
+                self.store[row.get_path()][4] = enabled
+        else:
+            dialog = Gtk.MessageDialog(
+                transient_for=self.parent_window,
+                flags=0,
+                message_type=Gtk.MessageType.ERROR,
+                buttons=Gtk.ButtonsType.OK,
+                text=_("Error")
+            )
+            dialog.format_secondary_text(_("Could not update the boot menu"))
+            dialog.run()
+            dialog.destroy()
+        return False
     
     def _on_add_entry(self, button):
         """Add a new boot entry."""
@@ -171,4 +232,6 @@ class BootEntriesView(Gtk.Box):
             dialog.destroy()
             
             if response == Gtk.ResponseType.YES:
-                model.remove(treeiter)
\ No newline at end of file
+                # Entries are generated by /etc/grub.d: hide it, so that it
+                # can be enabled again from the list
+                self._set_enabled(treeiter, False)
\ No newline at end of file
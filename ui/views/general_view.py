@@ -54,6 +54,14 @@ class GeneralView(Gtk.Box):
         row1.pack_start(self.default_entry_combo, True, True, 0)
         config_box.pack_start(row1, False, False, 0)
         
+        # Shown when grub.cfg does not list the installed kernels
+        self.drift_label = Gtk.Label()
+        self.drift_label.set_halign(Gtk.Align.START)
+        self.drift_label.set_line_wrap(True)
+        self.drift_label.get_style_context().add_class('dim-label')
+        self.drift_label.set_no_show_all(True)
+        config_box.pack_start(self.drift_label, False, False, 0)
+        
         # Row 2: Timeout (seconds)
         row2 = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
         label2 = Gtk.Label(label=_("Timeout (seconds):"))
@@ -111,9 +119,16 @@ class GeneralView(Gtk.Box):
         advanced_box.set_margin_top(10)
         advanced_box.set_margin_bottom(15)
         
-        # Checkbox: Detect other operating systems
+        # Checkbox: Detect other operating systems (+ forced rescan)
+        detect_os_row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
         self.detect_os_check = Gtk.CheckButton(label=_("Detect other operating systems"))
-        advanced_box.pack_start(self.detect_os_check, False, False, 0)
+        self.detect_os_check.connect('toggled', self._on_detect_os_toggled)
+        detect_os_row.pack_start(self.detect_os_check, False, False, 0)
+        self.rescan_os_btn = Gtk.Button(label=_("Rescan other OSes"))
+        self.rescan_os_btn.set_tooltip_text(_("Probe all partitions again instead of using cached results"))
+        self.rescan_os_btn.connect('clicked', self._on_rescan_os)
+        detect_os_row.pack_end(self.rescan_os_btn, False, False, 0)
+        advanced_box.pack_start(detect_os_row, False, False, 0)
         
         # Checkbox: Show boot menu
         self.show_menu_check = Gtk.CheckButton(label=_("Show boot menu"))
@@ -183,90 +198,151 @@ class GeneralView(Gtk.Box):
         """Load current GRUB configuration."""
         try:
             config = self.grub_manager.config
+            self._load_entries_combo(config.get('GRUB_DEFAULT', '0'))
+            self._apply_config(config)
+        except Exception as e:
+            print(_("Error loading GRUB config: {}").format(e))
+    
+    def refresh_entries(self):
+        """Reload the Default Boot Entry choices, keeping the selection."""
+        selected = self.grub_manager.config.get('GRUB_DEFAULT', '0')
+        active_iter = self.default_entry_combo.get_active_iter()
+        if active_iter:
+            selected = self.default_entry_combo.get_model().get_value(active_iter, 1)
+        self._load_entries_combo(selected)
+    
+    def on_config_changed(self, keys):
+        """
+        Show values changed outside the editor.
+        
+        Args:
+            keys: GRUB_* keys whose value changed
+        """
+        config = self.grub_manager.config
+        if 'GRUB_DEFAULT' in keys:
+            self._load_entries_combo(config.get('GRUB_DEFAULT', '0'))
+        self._apply_config(config, keys)
+    
+    def _load_entries_combo(self, default):
+        """Fill the Default Boot Entry dropdown and select default."""
+        # Entries the next regeneration produces: kernels installed since
+        # grub.cfg was generated can be chosen right away. Hidden entries
+        # are left out, GRUB numbers the entries of the filtered grub.cfg.
+        entries = [entry for entry in self.grub_manager.get_predicted_menu_entries()
+                   if entry.get('enabled', True)]
+        self._update_drift_label()
+        
+        # Create a ListStore: Col 0 is display text, Col 1 is full name
+        store = Gtk.ListStore(str, str)
+        self.default_entry_combo.set_model(store)
+        
+        self.entry_names = []
+        for i, entry in enumerate(entries):
+            full_name = entry.get('name', _('Unknown'))
+            display_name = entry.get('display_name', full_name)
             
-            # Load boot entries for Default Boot Entry dropdown
-            entries = self.grub_manager.get_menu_entries()
-            
-            # Create a ListStore: Col 0 is display text, Col 1 is full name
-            store = Gtk.ListStore(str, str)
-            self.default_entry_combo.set_model(store)
-            
-            self.entry_names = []
-            for i, entry in enumerate(entries):
-                full_name = entry.get('name', _('Unknown'))
-                display_name = entry.get('display_name', full_name)
+            # Format for display: "0: Kernel name" or "0: Submenu » Kernel"
+            if '>' in full_name:
+                display_text = f"{i}: {full_name.replace('>', ' » ')}"
+            else:
+                display_text = f"{i}: {display_name}"
                 
-                # Format for display: "0: Kernel name" or "0: Submenu » Kernel"
-                if '>' in full_name:
-                    display_text = f"{i}: {full_name.replace('>', ' » ')}"
-                else:
-                    display_text = f"{i}: {display_name}"
-                    
-                store.append([display_text, full_name])
-                self.entry_names.append(full_name)
-            
-            # Select current default
-            default = config.get('GRUB_DEFAULT', '0')
-            
-            # Identify current selection either by index or name
-            try:
-                default_idx = int(default)
-                if 0 <= default_idx < len(self.entry_names):
-                    self.default_entry_combo.set_active(default_idx)
-                else:
-                    self.default_entry_combo.set_active(0)
-            except ValueError:
-                # Value is a hierarchical name string
-                if default in self.entry_names:
-                    idx = self.entry_names.index(default)
-                    self.default_entry_combo.set_active(idx)
-                else:
-                    # Fallback for "saved" or custom entries
-                    it = store.prepend([f"[{default}]", default])
-                    self.default_entry_combo.set_active_iter(it)
-            
-            # Timeout
+            store.append([display_text, full_name])
+            self.entry_names.append(full_name)
+        
+        # Identify current selection either by index or name
+        try:
+            default_idx = int(default)
+            if 0 <= default_idx < len(self.entry_names):
+                self.default_entry_combo.set_active(default_idx)
+            else:
+                self.default_entry_combo.set_active(0)
+        except ValueError:
+            # Value is a hierarchical name string
+            if default in self.entry_names:
+                idx = self.entry_names.index(default)
+                self.default_entry_combo.set_active(idx)
+            else:
+                # Fallback for "saved" or custom entries
+                it = store.prepend([f"[{default}]", default])
+                self.default_entry_combo.set_active_iter(it)
+    
+    def _update_drift_label(self):
+        """Show or hide the notice about grub.cfg missing installed kernels."""
+        drift = self.grub_manager.get_menu_drift()
+        if drift['missing'] or drift['stale']:
+            self.drift_label.set_text(_("grub.cfg does not match the installed kernels; "
+                                        "it will be regenerated when changes are applied"))
+            self.drift_label.show()
+        else:
+            self.drift_label.hide()
+    
+    def _apply_config(self, config, keys=None):
+        """
+        Set the widgets from config.
+        
+        Args:
+            config: GRUB configuration values
+            keys: Only update the widgets of these keys (all if None)
+        """
+        def wanted(key):
+            return keys is None or key in keys
+        
+        # Timeout
+        if wanted('GRUB_TIMEOUT'):
             timeout = config.get('GRUB_TIMEOUT', '5')
             try:
                 self.timeout_spin.set_value(int(timeout))
             except ValueError:
                 self.timeout_spin.set_value(5)
-            
-            # Resolution
+        
+        # Resolution
+        if wanted('GRUB_GFXMODE'):
             gfxmode = config.get('GRUB_GFXMODE', 'auto')
             model = self.resolution_combo.get_model()
             for i, row in enumerate(model):
                 if row[0] == gfxmode:
                     self.resolution_combo.set_active(i)
                     break
-            
-            # Kernel params
+        
+        # Kernel params
+        if wanted('GRUB_CMDLINE_LINUX_DEFAULT'):
             cmdline = config.get('GRUB_CMDLINE_LINUX_DEFAULT', '')
             self.kernel_entry.set_text(cmdline)
-            
-            # Booleans
+        
+        # Booleans
+        if wanted('GRUB_TIMEOUT_STYLE'):
             timeout_style = config.get('GRUB_TIMEOUT_STYLE', 'menu')
             self.show_menu_check.set_active(timeout_style != 'hidden')
-            
+        
+        if wanted('GRUB_DISABLE_RECOVERY'):
             disable_recovery = config.get('GRUB_DISABLE_RECOVERY', 'false')
             self.recovery_check.set_active(disable_recovery.lower() != 'true')
-            
+        
+        if wanted('GRUB_DISABLE_OS_PROBER'):
             disable_os_prober = config.get('GRUB_DISABLE_OS_PROBER', 'false')
             self.detect_os_check.set_active(disable_os_prober.lower() != 'true')
-            
-            # UUID - GRUB_DISABLE_LINUX_UUID=true means UUID is DISABLED
+        
+        # UUID - GRUB_DISABLE_LINUX_UUID=true means UUID is DISABLED
+        if wanted('GRUB_DISABLE_LINUX_UUID'):
             disable_uuid = config.get('GRUB_DISABLE_LINUX_UUID', 'false')
             self.uuid_check.set_active(disable_uuid.lower() != 'true')
-            
-            # Submenus - GRUB_DISABLE_SUBMENU=y or true means DISABLED
+        
+        # Submenus - GRUB_DISABLE_SUBMENU=y or true means DISABLED
+        if wanted('GRUB_DISABLE_SUBMENU'):
             disable_submenu = config.get('GRUB_DISABLE_SUBMENU', 'false')
             self.disable_submenu_check.set_active(disable_submenu.lower() in ['true', 'y'])
-            
-            # Apply UI automation rules for initial state
-            self._update_menu_checkbox_state()
-            
-        except Exception as e:
-            print(_("Error loading GRUB config: {}").format(e))
+        
+        # Apply UI automation rules for initial state
+        self._update_menu_checkbox_state()
+    
+    def _on_detect_os_toggled(self, check):
+        """Rescanning only makes sense while os-prober is enabled."""
+        self.rescan_os_btn.set_sensitive(check.get_active())
+    
+    def _on_rescan_os(self, button):
+        """Regenerate grub.cfg, probing all partitions for other systems again."""
+        self.parent_window.run_update_grub(self._on_update_finished, rescan_os=True)
     
     def _on_timeout_changed(self, spin_button):
         """Handle timeout changes to enforce logical rules."""
@@ -347,28 +423,7 @@ class GeneralView(Gtk.Box):
             dialog.destroy()
             
             if response == Gtk.ResponseType.YES:
-                if self.grub_manager.update_grub():
-                    info = Gtk.MessageDialog(
-                        transient_for=self.parent_window,
-                        flags=0,
-                        message_type=Gtk.MessageType.INFO,
-                        buttons=Gtk.ButtonsType.OK,
-                        text=_("Success")
-                    )
-                    info.format_secondary_text(_("GRUB updated successfully!"))
-                    info.run()
-                    info.destroy()
-                else:
-                    err = Gtk.MessageDialog(
-                        transient_for=self.parent_window,
-                        flags=0,
-                        message_type=Gtk.MessageType.ERROR,
-                        buttons=Gtk.ButtonsType.OK,
-                        text=_("Error")
-                    )
-                    err.format_secondary_text(_("Failed to update GRUB"))
-                    err.run()
-                    err.destroy()
+                self.parent_window.run_update_grub(self._on_update_finished)
         else:
             err = Gtk.MessageDialog(
                 transient_for=self.parent_window,
@@ -379,4 +434,31 @@ class GeneralView(Gtk.Box):
             )
             err.format_secondary_text(_("Failed to save configuration"))
             err.run()
-            err.destroy()
\ No newline at end of file
+            err.destroy()
+    
+    def _on_update_finished(self, success, cancelled):
+        """Report the result of the background update-grub run."""
+        if cancelled:
+            return
+        if success:
+            info = Gtk.MessageDialog(
+                transient_for=self.parent_window,
+                flags=0,
+                message_type=Gtk.MessageType.INFO,
+                buttons=Gtk.ButtonsType.OK,
+                text=_("Success")
+            )
+            info.format_secondary_text(_("GRUB updated successfully!"))
+            info.run()
+            info.destroy()
+        else:
+            err = Gtk.MessageDialog(
+                transient_for=self.parent_window,
+                flags=0,
+                message_type=Gtk.MessageType.ERROR,
+                buttons=Gtk.ButtonsType.OK,
+                text=_("Error")
+            )
+            err.format_secondary_text(_("Failed to update GRUB"))
+            err.run()
+            err.destroy()